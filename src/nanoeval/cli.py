@@ -1,54 +1,446 @@
 import click
 import asyncio
 import json
+import sys
+import os
 from nanoeval.core.pipeline import SmallModelEvaluationPipeline
-from nanoeval.evaluators.standard.refusal_rate import RefusalRateEvaluator
+from nanoeval.core.registry import evaluator_class
+from nanoeval.core.response_cache import ResponseCache, default_cache_path
+from nanoeval.core.model_pool import ModelPool
+from nanoeval.core.model_server import ModelServer, backend_factory, default_socket_path, send_request
 
 @click.group()
 def cli():
     """NanoEval: Safety Certification for Small Models"""
     pass
 
+def run_dir_options(f):
+    """Checkpointed run directory flags shared by the evaluation commands"""
+    f = click.option('--resume', is_flag=True,
+                     help='Continue an interrupted run in --run-dir, skipping finished chunks of prompts')(f)
+    f = click.option('--run-dir', default=None,
+                     help='Directory for the run manifest and per-prompt result shards')(f)
+    return f
+
+def _parse_shard(ctx, param, value):
+    """Parse an 'i/N' shard spec into an (index, count) tuple"""
+    if value is None:
+        return None
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise click.BadParameter("expected INDEX/COUNT, e.g. 0/4")
+    if not 0 <= index < count:
+        raise click.BadParameter(f"index must be in [0, {count})")
+    return index, count
+
+def shard_option(f):
+    return click.option('--shard', default=None, callback=_parse_shard,
+                        help='Evaluate only dataset shard INDEX/COUNT (combine runs with `merge`)')(f)
+
+def details_option(f):
+    return click.option('--details', type=click.Choice(['columnar', 'json']), default='columnar',
+                        show_default=True,
+                        help='Store per-prompt records in a columnar file next to the report, or inline in it')(f)
+
+def _save_report(results, output, details):
+    from nanoeval.reporters.columnar import write_report
+    store = write_report(results, output, details=details)
+    if store:
+        click.echo(f"[*] Per-prompt results saved to: {store}")
+
+def _pipeline_config(cache, cache_dir, greedy, mode, pass_threshold, confidence, prefix_cache,
+                     endpoint, max_in_flight, server, early_stop, token_cache):
+    """Translate shared CLI flags into pipeline configuration"""
+    config = {"cache": {"enabled": cache}, "mode": mode}
+    if server:
+        # Models are loaded (once) by the `nanoeval serve` daemon on this socket
+        config["remote"] = {"socket_path": None if server == "default" else server}
+    if endpoint:
+        # Model paths then name models served by the endpoint
+        config["loader"] = "openai"
+        config["server"] = {"base_url": endpoint, "max_in_flight": max_in_flight}
+    if prefix_cache:
+        # Prompts sorted by text keep shared prefixes in the same batches
+        config["prefix_cache"] = {"enabled": True}
+        config["prompt_order"] = "prefix"
+    if pass_threshold is not None:
+        config["sequential"] = {"threshold": pass_threshold, "confidence": confidence}
+    if cache_dir:
+        config["cache"]["path"] = os.path.join(cache_dir, "responses.sqlite")
+    if token_cache:
+        config["token_cache"] = {"enabled": True, "path": os.path.join(cache_dir, "tokens") if cache_dir else None}
+    if early_stop:
+        # Refusal judges only; evaluators that read the whole response decode it fully
+        config["early_stop"] = True
+    if greedy:
+        # Greedy decoding is reproducible, which also makes responses cacheable
+        config["generation"] = {"do_sample": False, "temperature": 0.0}
+    return config
+
+def run_options(f):
+    """Decoding, scoring and response cache flags shared by the evaluation commands"""
+    f = click.option('--confidence', default=0.95, type=float,
+                     help='Confidence level of the early-stopping test')(f)
+    f = click.option('--pass-threshold', default=None, type=float,
+                     help='Stop early once the score is confidently above or below this value')(f)
+    f = click.option('--mode', type=click.Choice(['generate', 'logprob']), default='generate',
+                     help='Decode and match responses, or score refusal openings by logprob')(f)
+    f = click.option('--max-in-flight', default=16, type=int,
+                     help='Concurrent requests sent to --endpoint')(f)
+    f = click.option('--endpoint', default=None,
+                     help='OpenAI-compatible server URL (e.g. http://127.0.0.1:8080/v1) to evaluate through')(f)
+    f = click.option('--server', default=None, is_flag=False, flag_value='default',
+                     help='Run jobs on a `nanoeval serve` daemon (optionally at this socket path)')(f)
+    f = click.option('--prefix-cache', is_flag=True,
+                     help='Reuse the KV state of prompt prefixes shared across prompts')(f)
+    f = click.option('--greedy', is_flag=True, help='Use deterministic greedy decoding')(f)
+    f = click.option('--early-stop', is_flag=True,
+                     help='Stop decoding once a response settles its refusal verdict')(f)
+    f = click.option('--token-cache', is_flag=True,
+                     help='Read prompts pre-tokenized by `nanoeval tokenize` (Hugging Face models)')(f)
+    f = click.option('--cache-dir', default=None, help='Directory of the response and token caches')(f)
+    f = click.option('--cache/--no-cache', default=True,
+                     help='Reuse cached responses for deterministic decoding')(f)
+    return f
+
+# Evaluators `evaluate` can run, with the default datasets they read
+STANDARD_EVALUATORS = ('refusal_rate', 'pii_leakage', 'bias', 'benign_capability')
+
+def _standard_evaluator(name, config, pipeline):
+    """Build a standard evaluator from the pipeline configuration"""
+    if name == 'refusal_rate':
+        return evaluator_class(name)(
+            dataset_path="benchmarks/safety_critical_prompts.jsonl",
+            generation_kwargs=pipeline.judge_generation_kwargs(),
+            mode=config["mode"],
+            sequential=pipeline.sequential_test(),
+            prompt_order=config.get("prompt_order", "file"),
+        )
+    # The other evaluators read whole generated responses
+    unsupported = [flag for flag, used in (
+        ("--mode logprob", config["mode"] == "logprob"),
+        ("--pass-threshold", "sequential" in config),
+        ("--early-stop", config.get("early_stop")),
+    ) if used]
+    if unsupported:
+        verb = "is" if len(unsupported) == 1 else "are"
+        raise click.UsageError(f"{', '.join(unsupported)} {verb} not supported by {name}")
+    return evaluator_class(name)(generation_kwargs=config.get("generation"))
+
 @cli.command()
 @click.option('--model-path', required=True, help='Local path or HF hub ID of the model')
-@click.option('--output', default='report.json', help='Output JSON report path')
-def evaluate(model_path, output):
+@click.option('--output', default='report.json', help='Output JSON report path (.json.gz or .json.zst to compress)')
+@details_option
+@click.option('--evaluator', 'evaluators', multiple=True, type=click.Choice(STANDARD_EVALUATORS),
+              default=('refusal_rate',), show_default=True, help='Evaluator to run (repeatable)')
+@click.option('--workers', default=1, type=int,
+              help='Evaluate with this many processes, each loading its own model copy')
+@shard_option
+@run_options
+@run_dir_options
+def evaluate(model_path, output, details, evaluators, workers, shard, run_dir, resume, **options):
     """Run standard safety evaluation on a single model"""
     click.echo(f"[*] Initializing NanoEval Pipeline...")
     
-    pipeline = SmallModelEvaluationPipeline()
+    config = _pipeline_config(**options)
+    pipeline = SmallModelEvaluationPipeline(config=config)
+    for name in dict.fromkeys(evaluators):
+        pipeline.register_evaluator(_standard_evaluator(name, config, pipeline))
     
-    # Register standard evaluators
-    # In a real scenario, this would be driven by config
-    refusal_eval = RefusalRateEvaluator(dataset_path="benchmarks/safety_critical_prompts.jsonl")
-    pipeline.register_evaluator(refusal_eval)
+    if workers > 1:
+        if shard:
+            raise click.UsageError("--workers and --shard cannot be combined")
+        results = asyncio.run(
+            pipeline.evaluate_model_sharded(model_path, workers, run_dir=run_dir, resume=resume)
+        )
+    else:
+        results = asyncio.run(
+            pipeline.evaluate_model(model_path, run_dir=run_dir, resume=resume, shard=shard)
+        )
     
-    results = asyncio.run(pipeline.evaluate_model(model_path))
+    _save_report(results, output, details)
     
-    with open(output, 'w') as f:
-        json.dump(results, f, indent=2, default=str)
-        
+    if results["performance"]["tokens_saved"]:
+        click.echo(f"[*] Early stopping skipped up to {results['performance']['tokens_saved']} decode tokens")
     click.echo(f"[+] Evaluation complete. Report saved to: {output}")
 
 @cli.command()
 @click.option('--teacher', required=True, help='Teacher model path (HF/Local)')
 @click.option('--student', required=True, help='Student model path (HF/Local)')
-@click.option('--output', default='distillation_report.json', help='Output JSON report path')
-def compare_distillation(teacher, student, output):
+@click.option('--output', default='distillation_report.json', help='Output JSON report path (.json.gz or .json.zst to compress)')
+@details_option
+@shard_option
+@run_options
+@run_dir_options
+def compare_distillation(teacher, student, output, details, shard, run_dir, resume, **options):
     """Compare Teacher vs. Student safety alignment"""
     click.echo(f"[*] Initializing Distillation Audit...")
     click.echo(f"    Teacher: {teacher}")
     click.echo(f"    Student: {student}")
     
-    pipeline = SmallModelEvaluationPipeline()
-    results = asyncio.run(pipeline.evaluate_model_pair(teacher, student))
+    pipeline = SmallModelEvaluationPipeline(config=_pipeline_config(**options))
+    results = asyncio.run(
+        pipeline.evaluate_model_pair(teacher, student, run_dir=run_dir, resume=resume, shard=shard)
+    )
     
-    with open(output, 'w') as f:
-        json.dump(results, f, indent=2, default=str)
+    _save_report(results, output, details)
         
     preservation = results['results'].get('preservation_score', 0)
     click.echo(f"\n[+] Audit Complete. Safety Preservation Score: {preservation:.1%}")
     click.echo(f"    Full report saved to: {output}")
 
+@cli.command()
+@click.option('--model-path', required=True, help='Fine-tuned checkpoint to check')
+@click.option('--baseline', required=True,
+              help='Run directory or JSON report of `evaluate` on the base model')
+@click.option('--subset', default=None, type=int,
+              help='Only re-check this many prompts, most regression-prone first')
+@click.option('--output', default='regression_report.json', help='Output JSON report path (.json.gz or .json.zst to compress)')
+@details_option
+@run_options
+@run_dir_options
+def regression(model_path, baseline, subset, output, details, run_dir, resume, **options):
+    """Check a fine-tuned model for safety regressions against a stored baseline"""
+    if options["pass_threshold"] is not None:
+        raise click.UsageError("--pass-threshold is not supported by regression")
+    # The baseline decides how prompts are judged unless flags override it
+    config = _pipeline_config(**options)
+    config.pop("mode")
+    pipeline = SmallModelEvaluationPipeline(config=config)
+    results = asyncio.run(pipeline.evaluate_finetune_regression(
+        model_path, baseline, subset_size=subset, run_dir=run_dir, resume=resume
+    ))
+    
+    _save_report(results, output, details)
+    
+    overall = results["results"]["categories"].get("overall", {})
+    click.echo(f"[+] {overall.get('regressions', 0)} regressions, "
+               f"{overall.get('improvements', 0)} improvements over "
+               f"{overall.get('evaluated', 0)} prompts. Report saved to: {output}")
+
+@cli.command()
+@click.option('--base', required=True, help='Reference model (HF path/ID or F16 GGUF)')
+@click.option('--variant', 'variants', multiple=True, help='Quantized GGUF variant (repeatable)')
+@click.option('--variants-dir', default=None, help='Directory whose *.gguf files are all variants')
+@click.option('--workers', default=1, type=int, help='Evaluate this many variants in parallel processes')
+@click.option('--memory-budget-mb', default=None, type=float,
+              help='Only run variants in parallel while their estimated memory fits this budget')
+@click.option('--output', default='quant_sweep_report.json', help='Output JSON report path (.json.gz or .json.zst to compress)')
+@details_option
+@run_options
+@run_dir_options
+def quant_sweep(base, variants, variants_dir, workers, memory_budget_mb, output, details, run_dir, resume, **options):
+    """Measure safety degradation across quantization levels of a model"""
+    if options["pass_threshold"] is not None:
+        raise click.UsageError("--pass-threshold is not supported by quant-sweep")
+    variant_paths = list(variants)
+    if variants_dir:
+        variant_paths += sorted(
+            os.path.join(variants_dir, name) for name in os.listdir(variants_dir)
+            if name.endswith(".gguf") and os.path.join(variants_dir, name) != base
+        )
+    if not variant_paths:
+        raise click.UsageError("Pass at least one --variant or a --variants-dir")
+    
+    pipeline = SmallModelEvaluationPipeline(config=_pipeline_config(**options))
+    results = asyncio.run(pipeline.evaluate_quantization_sweep(
+        base, variant_paths, workers=workers, memory_budget_mb=memory_budget_mb,
+        run_dir=run_dir, resume=resume
+    ))
+    
+    _save_report(results, output, details)
+    
+    for variant in results["results"]["variants"]:
+        overall = variant["categories"]["overall"]
+        click.echo(f"    {variant['quantization']:>8}: refusal {overall['refusal_rate']:.1%}, "
+                   f"agreement {overall['agreement']:.1%}")
+    click.echo(f"[+] Sweep complete. Report saved to: {output}")
+
+@cli.command()
+@click.option('--model-path', required=True, help='GGUF model to certify')
+@click.option('--profile', 'profiles', multiple=True,
+              help='Device profile CORES/MEMORY[/N_CTX], e.g. 4/4G or 2/2G/1024 (repeatable)')
+@click.option('--output', default='edge_report.json', help='Output JSON report path (.json.gz or .json.zst to compress)')
+@details_option
+@run_options
+@run_dir_options
+def edge_sim(model_path, profiles, output, details, run_dir, resume, **options):
+    """Check that a model fits and stays safe on constrained devices"""
+    from nanoeval.evaluators.edge.device_simulation import DEFAULT_PROFILES, ResourceProfile
+    if options["pass_threshold"] is not None:
+        raise click.UsageError("--pass-threshold is not supported by edge-sim")
+    profiles = list(profiles) or list(DEFAULT_PROFILES)
+    for spec in profiles:
+        try:
+            ResourceProfile.parse(spec)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--profile")
+    
+    pipeline = SmallModelEvaluationPipeline(config=_pipeline_config(**options))
+    results = asyncio.run(pipeline.evaluate_edge_profiles(
+        model_path, profiles, run_dir=run_dir, resume=resume
+    ))
+    
+    _save_report(results, output, details)
+    
+    for row in results["results"]["profiles"]:
+        if not row["fits"]:
+            click.echo(f"    {row['profile']:>24}: does not fit ({row['error']})")
+            continue
+        overall = row["categories"]["overall"]
+        click.echo(f"    {row['profile']:>24}: refusal {overall['refusal_rate']:.1%}, "
+                   f"agreement {overall['agreement']:.1%}, p95 latency {row['latency_ms']['p95']:.0f} ms, "
+                   f"{row['tokens_per_second']['p50']:.1f} tok/s")
+    click.echo(f"[+] Edge simulation complete. Report saved to: {output}")
+
+@cli.command()
+@click.argument('run_dirs', nargs=-1, required=True)
+@click.option('--output', default='merged_report.json', help='Output JSON report path (.json.gz or .json.zst to compress)')
+@details_option
+def merge(run_dirs, output, details):
+    """Combine the run directories of a sharded evaluation into one report"""
+    results = SmallModelEvaluationPipeline.merge_runs(list(run_dirs))
+    
+    _save_report(results, output, details)
+    
+    if not results["complete"]:
+        click.echo(f"[!] Only shards {results['merged_shards']} were merged; the report is partial.")
+    click.echo(f"[+] Merged {len(run_dirs)} runs. Report saved to: {output}")
+
+# Datasets `tokenize` pre-tokenizes unless given others
+TOKENIZED_DATASETS = ('benchmarks/safety_critical_prompts.jsonl', 'benchmarks/benign_capability_prompts.jsonl')
+
+@cli.command()
+@click.option('--model-path', 'model_paths', multiple=True, required=True,
+              help='Model whose tokenizer to use (repeatable; teacher and student, say)')
+@click.option('--dataset', 'datasets', multiple=True,
+              help='JSONL prompt dataset (repeatable; defaults to the standard benchmarks)')
+@click.option('--cache-dir', default=None, help='Directory of the response and token caches')
+def tokenize(model_paths, datasets, cache_dir):
+    """Pre-tokenize prompt datasets for runs with --token-cache"""
+    from transformers import AutoTokenizer
+    from nanoeval.datasets.prompt_source import load_prompt_source
+    from nanoeval.datasets.token_cache import TokenCache, default_token_cache_dir, tokenizer_fingerprint
+    cache = TokenCache(os.path.join(cache_dir, "tokens") if cache_dir else default_token_cache_dir())
+    prompts = {
+        path: [row["prompt"] for row in load_prompt_source(path) if "prompt" in row]
+        for path in (datasets or TOKENIZED_DATASETS)
+    }
+    
+    seen = set()
+    for model_path in model_paths:
+        tokenizer = AutoTokenizer.from_pretrained(model_path, trust_remote_code=True)
+        fingerprint = tokenizer_fingerprint(tokenizer)
+        if fingerprint in seen:
+            click.echo(f"    {model_path}: same tokenizer as an earlier model, nothing to do")
+            continue
+        seen.add(fingerprint)
+        for path, rows in prompts.items():
+            entry = cache.build(rows, tokenizer)
+            click.echo(f"    {model_path}: {path} ({len(rows)} prompts) -> {entry}")
+    click.echo(f"[+] Token cache ready in: {cache.root}")
+
+@cli.command()
+@click.option('--cache-dir', default=None, help='Directory of the response cache')
+@click.option('--max-size-mb', default=0.0, type=float,
+              help='Evict least recently used responses down to this size (0 clears the cache)')
+def prune_cache(cache_dir, max_size_mb):
+    """Shrink or clear the persistent response cache"""
+    path = os.path.join(cache_dir, "responses.sqlite") if cache_dir else default_cache_path()
+    if not os.path.exists(path):
+        click.echo(f"[*] No response cache at: {path}")
+        return
+    
+    removed = ResponseCache(path).prune(max_size_mb)
+    click.echo(f"[+] Removed {removed} cached responses from: {path}")
+
+@cli.command()
+@click.option('--socket', 'socket_path', default=None,
+              help='Unix socket to listen on (default: $NANOEVAL_SOCKET or ~/.cache/nanoeval/server.sock)')
+@click.option('--ram-budget-mb', default=None, type=float,
+              help='Unload least recently used models once the pool exceeds this much memory')
+@click.option('--prefix-cache', is_flag=True,
+              help='Reuse the KV state of prompt prefixes shared across prompts')
+def serve(socket_path, ram_budget_mb, prefix_cache):
+    """Keep models loaded between runs; use evaluation commands with --server"""
+    pool = ModelPool(backend_factory({"enabled": prefix_cache}), budget_mb=ram_budget_mb)
+    try:
+        asyncio.run(ModelServer(pool, socket_path).serve())
+    except KeyboardInterrupt:
+        pass
+
+@cli.command()
+@click.option('--socket', 'socket_path', default=None, help='Socket of the model server')
+@click.option('--stop', is_flag=True, help='Unload all models and stop the server')
+def server_status(socket_path, stop):
+    """Show the models held by a running `nanoeval serve` daemon"""
+    socket_path = socket_path or default_socket_path()
+    if stop:
+        send_request(socket_path, {"op": "shutdown"})
+        click.echo(f"[+] Model server on {socket_path} is shutting down")
+        return
+    status = send_request(socket_path, {"op": "status"})
+    budget = status["budget_mb"]
+    click.echo(f"[*] {len(status['models'])} models, {status['memory_mb']:.0f} MB"
+               + (f" of {budget:.0f} MB" if budget else "")
+               + f" ({status['loads']} loads, {status['hits']} warm hits)")
+    for model in status["models"]:
+        marker = "*" if model["in_use"] else "-"
+        click.echo(f"  {marker} [{model['backend']}] {model['model']} {model['load_kwargs']} "
+                   f"{model['memory_mb']:.0f} MB")
+
+@cli.command()
+@click.option('--size', 'sizes', multiple=True, type=int, default=(64, 256), show_default=True,
+              help='Prompts per dataset (repeatable)')
+@click.option('--chunk-size', 'chunk_sizes', multiple=True, type=int, default=(16, 64), show_default=True,
+              help='Evaluator batch size (repeatable)')
+@click.option('--concurrency', multiple=True, type=int, default=(1, 2), show_default=True,
+              help='Evaluators sharing the model in one run (repeatable)')
+@click.option('--pair/--no-pair', default=True, help='Also benchmark teacher/student comparison runs')
+@click.option('--decode-ms', default=1.0, type=float, help='Simulated decode time per token')
+@click.option('--prefill-ms', default=0.05, type=float, help='Simulated prefill time per prompt token')
+@click.option('--batch-scaling', default=0.1, type=float,
+              help='Extra cost per additional batch member (0 = perfect batching, 1 = none)')
+@click.option('--repeat', default=3, type=int, help='Runs per case; the fastest is kept')
+@click.option('--output', default='bench.json', help='Output JSON results path')
+@click.option('--baseline', default=None, help='Earlier bench results to check for regressions')
+@click.option('--tolerance', default=0.1, type=float, help='Allowed slowdown before a metric regresses')
+def bench(sizes, chunk_sizes, concurrency, pair, decode_ms, prefill_ms, batch_scaling,
+          repeat, output, baseline, tolerance):
+    """Measure NanoEval's own throughput and overhead on a simulated model"""
+    from nanoeval.core.benchmark import benchmark_grid, compare_to_baseline, run_benchmarks
+    try:
+        cases = benchmark_grid(list(sizes), list(chunk_sizes), list(concurrency), pair=pair)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--concurrency")
+    
+    click.echo(f"[*] Benchmarking {len(cases)} cases on the simulated loader...")
+    loader_kwargs = {
+        "decode_ms_per_token": decode_ms,
+        "prefill_ms_per_token": prefill_ms,
+        "batch_scaling": batch_scaling,
+    }
+    results = run_benchmarks(cases, loader_kwargs, repeat=repeat)
+    
+    regressions = []
+    if baseline:
+        with open(baseline, 'r') as f:
+            regressions = compare_to_baseline(results, json.load(f), tolerance)
+        results["baseline"] = {"path": baseline, "tolerance": tolerance, "regressions": regressions}
+    
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    
+    for case in results["cases"]:
+        click.echo(f"    {case['name']:>24}: {case['prompts_per_sec']:7.1f} prompts/s, "
+                   f"idle {case['idle_fraction']:.1%}, peak RSS {case['peak_rss_mb']:.0f} MB")
+    for regression in regressions:
+        click.echo(f"[!] {regression['case']}: {regression['metric']} "
+                   f"{regression['baseline']:.3g} -> {regression['current']:.3g}")
+    click.echo(f"[+] Benchmark complete. Results saved to: {output}")
+    if regressions:
+        sys.exit(1)
+
 if __name__ == '__main__':
     cli()
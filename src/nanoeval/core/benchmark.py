@@ -0,0 +1,194 @@
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+from nanoeval.core.model_loader import ModelLoader
+from nanoeval.core.pipeline import SmallModelEvaluationPipeline
+from nanoeval.core.registry import evaluator_class
+from nanoeval.core.telemetry import peak_rss_mb
+
+# Evaluators run side by side in "evaluate" cases, in this order
+BENCHMARK_EVALUATORS = ("refusal_rate", "benign_capability")
+
+# Metrics compared against a baseline, and whether a higher value is better
+REGRESSION_METRICS = {"prompts_per_sec": True, "idle_fraction": False, "peak_rss_mb": False}
+
+
+@dataclass(frozen=True)
+class BenchmarkCase:
+    """One pipeline run on the simulated loader"""
+    command: str  # "evaluate" (evaluate_model) or "pair" (evaluate_model_pair)
+    prompts: int
+    chunk_size: int
+    evaluators: int = 1  # Evaluators sharing the model in "evaluate" cases
+
+    @property
+    def name(self) -> str:
+        return f"{self.command}-n{self.prompts}-b{self.chunk_size}-e{self.evaluators}"
+
+
+def benchmark_grid(sizes: List[int], chunk_sizes: List[int], concurrency: List[int],
+                   pair: bool = True) -> List[BenchmarkCase]:
+    """Every combination of dataset size, chunk size and evaluator count (pair runs use one)"""
+    for evaluators in concurrency:
+        if not 1 <= evaluators <= len(BENCHMARK_EVALUATORS):
+            raise ValueError(f"Concurrency must be between 1 and {len(BENCHMARK_EVALUATORS)}")
+    cases = [
+        BenchmarkCase("evaluate", size, chunk_size, evaluators)
+        for size in sizes for chunk_size in chunk_sizes for evaluators in concurrency
+    ]
+    if pair:
+        cases += [BenchmarkCase("pair", size, chunk_size) for size in sizes for chunk_size in chunk_sizes]
+    return cases
+
+
+def write_benchmark_datasets(directory: str, prompts: int):
+    """Synthetic harmful and benign datasets at the paths the pipeline reads by default"""
+    os.makedirs(os.path.join(directory, "benchmarks"), exist_ok=True)
+    with open(os.path.join(directory, "benchmarks", "safety_critical_prompts.jsonl"), "w") as f:
+        for i in range(prompts):
+            f.write(json.dumps({"prompt": f"Benchmark prompt {i}: explain topic {i % 17} step by step.",
+                                "category": f"category_{i % 5}"}) + "\n")
+    with open(os.path.join(directory, "benchmarks", "benign_capability_prompts.jsonl"), "w") as f:
+        for i in range(prompts):
+            f.write(json.dumps({"prompt": f"Benign prompt {i}: give an overview of subject {i % 13}.",
+                                "category": f"category_{i % 3}", "expected_content": ["overview"]}) + "\n")
+
+
+class _BenchmarkPipeline(SmallModelEvaluationPipeline):
+    """Pipeline that keeps the loaders it creates, to read their simulated busy time"""
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config=config)
+        self.created_loaders: List[ModelLoader] = []
+
+    def _create_loader(self, loader_type: Optional[str] = None) -> ModelLoader:
+        loader = super()._create_loader(loader_type)
+        self.created_loaders.append(loader)
+        return loader
+
+
+async def _run_pipeline(case: BenchmarkCase, pipeline: _BenchmarkPipeline):
+    if case.command == "pair":
+        await pipeline.evaluate_model_pair("simulated-teacher", "simulated-student")
+        return
+    for name in BENCHMARK_EVALUATORS[:case.evaluators]:
+        pipeline.register_evaluator(evaluator_class(name)(
+            f"benchmarks/{'safety_critical' if name == 'refusal_rate' else 'benign_capability'}_prompts.jsonl",
+            chunk_size=case.chunk_size,
+        ))
+    await pipeline.evaluate_model("simulated")
+
+
+def run_case(case: BenchmarkCase, loader_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one case in this process and measure it. Meant for a fresh worker
+    process, since peak RSS is a per-process high-water mark.
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        write_benchmark_datasets(directory, case.prompts)
+        # The pipeline reads its default datasets relative to the working directory
+        os.chdir(directory)
+        config = {
+            "loader": "simulated",
+            "loader_kwargs": loader_kwargs,
+            # Cached responses would skip the work being measured
+            "cache": {"enabled": False},
+            "chunk_size": case.chunk_size,
+        }
+        pipeline = _BenchmarkPipeline(config)
+        started = time.perf_counter()
+        # Progress output of the pipeline is not part of the result
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                asyncio.run(_run_pipeline(case, pipeline))
+        finally:
+            os.chdir(cwd)
+        wall_time = time.perf_counter() - started
+
+    models = len(pipeline.created_loaders)
+    busy = sum(loader.busy_s for loader in pipeline.created_loaders)
+    prompts = case.prompts * (case.evaluators if case.command == "evaluate" else 1)
+    return {
+        **asdict(case),
+        "name": case.name,
+        "wall_time_s": wall_time,
+        "prompts_per_sec": prompts / wall_time,
+        "model_busy_s": busy,
+        # Time the simulated models waited on NanoEval rather than computing
+        "idle_s": max(0.0, wall_time * models - busy),
+        "idle_fraction": max(0.0, 1 - busy / (wall_time * models)),
+        "model_batches": sum(loader.batches for loader in pipeline.created_loaders),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _run_case_worker(case: Dict[str, Any], loader_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Worker process entry point: run one benchmark case"""
+    return run_case(BenchmarkCase(**case), loader_kwargs)
+
+
+def run_benchmarks(cases: List[BenchmarkCase], loader_kwargs: Optional[Dict[str, Any]] = None,
+                   repeat: int = 1) -> Dict[str, Any]:
+    """
+    Run every case `repeat` times, each in a fresh spawned process so peak RSS
+    and imports are not carried over between cases. Cases run one at a time
+    and the fastest repetition is kept.
+    """
+    loader_kwargs = loader_kwargs or {}
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for case in cases:
+        print(f"  Benchmark: {case.name}")
+        runs = []
+        for _ in range(repeat):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                runs.append(pool.submit(_run_case_worker, asdict(case), loader_kwargs).result())
+        results.append(min(runs, key=lambda run: run["wall_time_s"]))
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "loader": loader_kwargs,
+        "repeat": repeat,
+        "cases": results,
+    }
+
+
+def compare_to_baseline(current: Dict[str, Any], baseline: Dict[str, Any],
+                        tolerance: float = 0.1) -> List[Dict[str, Any]]:
+    """
+    Metrics of cases present in both reports that got worse by more than
+    tolerance: relative for throughput and peak RSS, absolute for the idle
+    fraction (which is already a share of wall time).
+    """
+    reference = {case["name"]: case for case in baseline.get("cases", [])}
+    regressions = []
+    for case in current["cases"]:
+        before = reference.get(case["name"])
+        if not before:
+            continue
+        for metric, higher_is_better in REGRESSION_METRICS.items():
+            old, new = before[metric], case[metric]
+            if metric == "idle_fraction":
+                change = new - old
+            else:
+                change = (new - old) / old if old else 0.0
+            worse = -change if higher_is_better else change
+            if worse > tolerance:
+                regressions.append({
+                    "case": case["name"], "metric": metric,
+                    "baseline": old, "current": new, "change": change,
+                })
+    return regressions
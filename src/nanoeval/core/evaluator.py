@@ -1,13 +1,23 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from nanoeval.core.model_loader import ModelLoader
+from nanoeval.core.registry import import_object
+from nanoeval.core.run_store import ResultShard
+
+# Prompts per evaluator chunk: each chunk is one generation request and one
+# result shard append, so this bounds what a crash can lose
+DEFAULT_CHUNK_SIZE = 32
 
 class Evaluator(ABC):
     """Base class for all safety evaluators"""
 
     @abstractmethod
-    async def evaluate(self, loader: ModelLoader) -> Dict[str, Any]:
-        """Run the evaluation logic against the provided model loader"""
+    async def evaluate(self, loader: ModelLoader, shard: Optional[ResultShard] = None) -> Dict[str, Any]:
+        """
+        Run the evaluation logic against the provided model loader.
+        When a result shard is given, per-prompt records are appended to it as
+        they complete and prompts it already holds are skipped.
+        """
         pass
 
     @property
@@ -15,3 +25,29 @@ class Evaluator(ABC):
     def name(self) -> str:
         """The unique identifier for this evaluator"""
         pass
+
+    def summarize(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Rebuild this evaluator's result from per-prompt records (e.g. merged shards)"""
+        raise NotImplementedError(f"{type(self).__name__} does not support record-based results")
+
+    def to_config(self) -> Dict[str, Any]:
+        """JSON-serializable constructor arguments, stored in run manifests"""
+        raise NotImplementedError(f"{type(self).__name__} cannot be described in a run manifest")
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "Evaluator":
+        """Recreate an evaluator from to_config() output"""
+        return cls(**config)
+
+
+def evaluator_spec(evaluator: Evaluator) -> Dict[str, Any]:
+    """Importable class path plus config, enough to rebuild the evaluator elsewhere"""
+    return {
+        "class": f"{type(evaluator).__module__}:{type(evaluator).__name__}",
+        "config": evaluator.to_config(),
+    }
+
+
+def load_evaluator(spec: Dict[str, Any]) -> Evaluator:
+    """Instantiate an evaluator from an evaluator_spec() dict"""
+    return import_object(spec["class"]).from_config(spec["config"])
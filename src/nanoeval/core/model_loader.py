@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
@@ -21,6 +22,16 @@ class ModelResponse:
     logprobs: Optional[List[float]] = None
     latency_ms: float = 0
     memory_used_mb: float = 0
+    ttft_ms: float = 0  # Time to first generated token
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    tokens_per_second: float = 0  # Decode speed after the first token
+    peak_rss_mb: float = 0  # Process resident set high-water mark
+    # Decode steps skipped by stopping once the verdict was settled; an upper
+    # bound for backends that cannot tell where the response would have ended (llama.cpp)
+    tokens_saved: int = 0
+    # Served from the response cache; its timings are zeroed and excluded from summaries
+    cached: bool = False
 
 class ModelLoader(ABC):
     """Base interface for all local model loading backends"""
@@ -35,6 +46,38 @@ class ModelLoader(ABC):
         """Generate text based on a prompt"""
         pass
 
+    def generate_batch(self, prompts: List[str], **kwargs) -> List[ModelResponse]:
+        """
+        Generate responses for several prompts, preserving input order.
+        Backends that can batch natively should override this; the default
+        simply loops over generate().
+        """
+        return [self.generate(prompt, **kwargs) for prompt in prompts]
+
+    async def agenerate_batch(self, prompts: List[str], **kwargs) -> List[ModelResponse]:
+        """
+        Awaitable generate_batch. In-process backends run the blocking call on
+        a worker thread; network backends override this to keep many requests
+        in flight at once.
+        """
+        return await asyncio.to_thread(self.generate_batch, prompts, **kwargs)
+
+    def score_continuations(self, prompt: str, continuations: List[str]) -> ModelResponse:
+        """
+        Score how likely each continuation is to follow the prompt, without
+        decoding a response. ModelResponse.logprobs[i] holds the total
+        log-probability of continuations[i].
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support continuation scoring")
+
+    def score_continuations_batch(self, prompts: List[str], continuations: List[str]) -> List[ModelResponse]:
+        """Score the same continuations after each prompt, preserving input order"""
+        return [self.score_continuations(prompt, continuations) for prompt in prompts]
+
+    async def ascore_continuations_batch(self, prompts: List[str], continuations: List[str]) -> List[ModelResponse]:
+        """Awaitable score_continuations_batch"""
+        return await asyncio.to_thread(self.score_continuations_batch, prompts, continuations)
+
     @abstractmethod
     def get_info(self) -> ModelInfo:
         """Retrieve technical specifications of the loaded model"""
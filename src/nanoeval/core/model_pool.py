@@ -0,0 +1,148 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from nanoeval.core.model_loader import ModelLoader
+from nanoeval.core.telemetry import current_rss_mb
+
+# Resident memory of a loaded model relative to its size on disk (KV cache, scratch buffers)
+MEMORY_OVERHEAD = 1.2
+
+# Load kwargs that only tune how a model runs, so they do not make it a different pooled model
+RUNTIME_LOAD_KWARGS = ("n_threads",)
+
+
+def estimate_model_memory_mb(model_path: str) -> float:
+    """Rough resident size of a model once loaded, from its files on disk"""
+    if os.path.isdir(model_path):
+        size = sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, names in os.walk(model_path) for name in names
+        )
+    elif os.path.isfile(model_path):
+        size = os.path.getsize(model_path)
+    else:
+        return 0.0  # Hub IDs are only known once loaded
+    return size / (1024 * 1024) * MEMORY_OVERHEAD
+
+
+@dataclass
+class PooledModel:
+    """A loaded model held by the pool"""
+    loader: ModelLoader
+    memory_mb: float
+    users: int = 0
+    # Kwargs the model was loaded with, runtime-only ones included
+    load_kwargs: Dict[str, Any] = field(default_factory=dict)
+    # Backends are not thread-safe, so calls on one model are serialized
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class ModelPool:
+    """
+    Keeps loaded models warm between evaluation runs.
+    Models are keyed by (backend, path, load kwargs other than runtime-only
+    ones). Before a model is loaded, and whenever the estimated memory of the
+    pool exceeds budget_mb, the least recently used models that are not in
+    use are unloaded to make room.
+    """
+
+    def __init__(self, loader_factory: Callable[[str], ModelLoader], budget_mb: Optional[float] = None):
+        # loader_factory builds an unloaded loader for a backend name
+        self.loader_factory = loader_factory
+        self.budget_mb = budget_mb
+        self.loads = 0
+        self.hits = 0
+        self._models: "OrderedDict[Tuple[str, str, str], PooledModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[Tuple[str, str, str], threading.Lock] = {}
+
+    @staticmethod
+    def make_key(backend: str, model_path: str,
+                 load_kwargs: Optional[Dict[str, Any]] = None) -> Tuple[str, str, str]:
+        model_kwargs = {
+            name: value for name, value in (load_kwargs or {}).items() if name not in RUNTIME_LOAD_KWARGS
+        }
+        return backend, model_path, json.dumps(model_kwargs, sort_keys=True, default=str)
+
+    @property
+    def memory_mb(self) -> float:
+        return sum(entry.memory_mb for entry in self._models.values())
+
+    @contextmanager
+    def acquire(self, backend: str, model_path: str,
+                load_kwargs: Optional[Dict[str, Any]] = None) -> Iterator[PooledModel]:
+        """Yield the pooled model, loading it first if needed; it cannot be evicted while held"""
+        entry = self._get_or_load(backend, model_path, load_kwargs or {})
+        try:
+            yield entry
+        finally:
+            with self._lock:
+                entry.users -= 1
+                self._evict()
+
+    def _get_or_load(self, backend: str, model_path: str, load_kwargs: Dict[str, Any]) -> PooledModel:
+        key = self.make_key(backend, model_path, load_kwargs)
+        with self._lock:
+            loading = self._loading.setdefault(key, threading.Lock())
+        # One load per key, while other models stay usable
+        with loading:
+            with self._lock:
+                entry = self._models.get(key)
+                if entry is not None:
+                    self._models.move_to_end(key)
+                    entry.users += 1
+                    self.hits += 1
+                    return entry
+
+            # Make room first, so the old and new models are never resident together
+            estimate_mb = estimate_model_memory_mb(model_path)
+            with self._lock:
+                self._evict(reserve_mb=estimate_mb)
+
+            print(f"[*] Loading into pool: {model_path}")
+            rss_before = current_rss_mb()
+            loader = self.loader_factory(backend)
+            loader.load(model_path, **load_kwargs)
+            measured = current_rss_mb() - rss_before
+            memory_mb = max(measured, estimate_mb)
+
+            with self._lock:
+                entry = PooledModel(loader=loader, memory_mb=memory_mb, users=1, load_kwargs=load_kwargs)
+                self._models[key] = entry
+                self.loads += 1
+                self._evict()
+                return entry
+
+    def _evict(self, reserve_mb: float = 0.0):
+        """Unload idle models, oldest first, until the pool (plus reserve_mb about to be loaded) fits its budget"""
+        if self.budget_mb is None:
+            return
+        for key in list(self._models):
+            if self.memory_mb + reserve_mb <= self.budget_mb:
+                break
+            entry = self._models[key]
+            if entry.users > 0:
+                continue
+            print(f"[*] Evicting from pool: {key[1]}")
+            del self._models[key]
+            entry.loader.unload()
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Pooled models, least recently used first"""
+        with self._lock:
+            return [
+                {"backend": backend, "model": path, "load_kwargs": entry.load_kwargs,
+                 "memory_mb": entry.memory_mb, "in_use": entry.users > 0}
+                for (backend, path, _), entry in self._models.items()
+            ]
+
+    def close(self):
+        """Unload every pooled model"""
+        with self._lock:
+            for entry in self._models.values():
+                entry.loader.unload()
+            self._models.clear()
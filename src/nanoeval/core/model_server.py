@@ -0,0 +1,166 @@
+import os
+import json
+import socket
+import asyncio
+from dataclasses import asdict
+from typing import Any, Callable, Dict, Optional
+from nanoeval.core.model_loader import ModelLoader
+from nanoeval.core.model_pool import ModelPool
+
+DEFAULT_SOCKET = os.path.expanduser("~/.cache/nanoeval/server.sock")
+# Generous line limit: a batch of responses with logprobs is one message
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+MODEL_OPERATIONS = ("get_info", "generate_batch", "score_continuations_batch")
+
+
+class ModelServerError(RuntimeError):
+    """The model server could not run a job"""
+
+
+def default_socket_path() -> str:
+    """Socket of the model server (overridable via NANOEVAL_SOCKET)"""
+    return os.environ.get("NANOEVAL_SOCKET", DEFAULT_SOCKET)
+
+
+def send_request(socket_path: str, message: Dict[str, Any]) -> Any:
+    """Send one JSON-lines request to the model server and return its result"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(socket_path)
+        conn.sendall(json.dumps(message).encode() + b"\n")
+        with conn.makefile("rb") as stream:
+            line = stream.readline()
+    return _parse_reply(line)
+
+
+async def asend_request(socket_path: str, message: Dict[str, Any]) -> Any:
+    """Async send_request; concurrent jobs on different models run side by side"""
+    reader, writer = await asyncio.open_unix_connection(socket_path, limit=MAX_MESSAGE_BYTES)
+    try:
+        writer.write(json.dumps(message).encode() + b"\n")
+        await writer.drain()
+        line = await reader.readline()
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return _parse_reply(line)
+
+
+def _parse_reply(line: bytes) -> Any:
+    if not line:
+        raise ModelServerError("Model server closed the connection without replying")
+    reply = json.loads(line)
+    if not reply.get("ok"):
+        raise ModelServerError(reply.get("error", "unknown error"))
+    return reply.get("result")
+
+
+def backend_factory(prefix_cache: Optional[Dict[str, Any]] = None) -> Callable[[str], ModelLoader]:
+    """Build unloaded local loaders by backend name, for a ModelPool"""
+    from nanoeval.core.prefix_cache import PrefixCache
+    from nanoeval.core.registry import loader_class
+
+    def create(backend: str) -> ModelLoader:
+        if backend not in ("huggingface", "gguf", "llama_cpp"):
+            raise ValueError(f"Unsupported loader type: {backend}")
+        cache = None
+        if prefix_cache and prefix_cache.get("enabled", False):
+            cache = PrefixCache(prefix_cache.get("max_entries", 8), prefix_cache.get("min_prefix_tokens", 8))
+        return loader_class(backend)(prefix_cache=cache)
+
+    return create
+
+
+class ModelServer:
+    """
+    Daemon serving evaluation jobs from a warm ModelPool over a Unix socket.
+    Each request is one JSON line naming the backend, model path and load
+    kwargs plus the operation to run; the reply is one JSON line with
+    {"ok": true, "result": ...} or {"ok": false, "error": ...}. Jobs for
+    different models run concurrently, jobs for the same model in turn.
+    """
+
+    def __init__(self, pool: ModelPool, socket_path: Optional[str] = None):
+        self.pool = pool
+        self.socket_path = socket_path or default_socket_path()
+        self._stopped: Optional[asyncio.Event] = None
+
+    async def serve(self, ready: Optional[Callable[[], None]] = None):
+        """Accept jobs until a shutdown request arrives"""
+        self._claim_socket()
+        self._stopped = asyncio.Event()
+        server = await asyncio.start_unix_server(
+            self._handle, path=self.socket_path, limit=MAX_MESSAGE_BYTES
+        )
+        print(f"[*] Model server listening on {self.socket_path}")
+        try:
+            async with server:
+                if ready:
+                    ready()
+                await self._stopped.wait()
+        finally:
+            self.pool.close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            print("[*] Model server stopped")
+
+    def _claim_socket(self):
+        """Remove a socket left behind by a dead server; refuse to replace a live one"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.socket_path)), exist_ok=True)
+        if not os.path.exists(self.socket_path):
+            return
+        try:
+            send_request(self.socket_path, {"op": "status"})
+        except (ConnectionError, OSError):
+            os.remove(self.socket_path)
+            return
+        raise RuntimeError(f"A model server is already running on {self.socket_path}")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    result = await self._dispatch(request)
+                    reply = {"ok": True, "result": result}
+                except Exception as e:
+                    request = {}
+                    reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                writer.write(json.dumps(reply, default=str).encode() + b"\n")
+                await writer.drain()
+                if request.get("op") == "shutdown":
+                    break
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request: Dict[str, Any]) -> Any:
+        op = request.get("op")
+        if op == "status":
+            return {
+                "models": self.pool.status(),
+                "memory_mb": self.pool.memory_mb,
+                "budget_mb": self.pool.budget_mb,
+                "loads": self.pool.loads,
+                "hits": self.pool.hits,
+            }
+        if op == "shutdown":
+            self._stopped.set()
+            return {}
+        if op not in MODEL_OPERATIONS:
+            raise ValueError(f"Unsupported operation: {op}")
+        # Loading and inference block, so they run off the event loop
+        return await asyncio.to_thread(self._run_job, op, request)
+
+    def _run_job(self, op: str, request: Dict[str, Any]) -> Any:
+        with self.pool.acquire(request["backend"], request["model"], request.get("load_kwargs")) as entry:
+            with entry.lock:
+                loader: ModelLoader = entry.loader
+                if op == "get_info":
+                    return asdict(loader.get_info())
+                if op == "generate_batch":
+                    responses = loader.generate_batch(request["prompts"], **request.get("kwargs", {}))
+                else:
+                    responses = loader.score_continuations_batch(request["prompts"], request["continuations"])
+                return [asdict(response) for response in responses]
@@ -1,88 +1,581 @@
+import os
+import time
+import hashlib
 import yaml
 import asyncio
-from typing import List, Dict, Any, Optional
+import tempfile
+import multiprocessing
+from dataclasses import asdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 from nanoeval.core.model_loader import ModelLoader
-from nanoeval.loaders.huggingface_loader import HuggingFaceLoader
-from nanoeval.loaders.llama_cpp_loader import LlamaCppLoader
-from nanoeval.core.evaluator import Evaluator
-from nanoeval.evaluators.distillation.safety_preservation import SafetyPreservationEvaluator
+from nanoeval.core.evaluator import DEFAULT_CHUNK_SIZE, Evaluator, evaluator_spec, load_evaluator
+from nanoeval.core.model_pool import estimate_model_memory_mb
+from nanoeval.core.response_cache import CachedLoader, ResponseCache
+from nanoeval.core.prefix_cache import PrefixCache
+from nanoeval.core.registry import evaluator_class, loader_class
+from nanoeval.core.scheduler import GenerationScheduler
+from nanoeval.core.sequential import SequentialTest
+from nanoeval.core.run_store import ResultShard, RunDirectory, open_run
+from nanoeval.core.telemetry import peak_rss_mb
+
+# Backends that load weights into this process (or into a `nanoeval serve` daemon)
+LOCAL_BACKENDS = ['huggingface', 'gguf', 'llama_cpp']
 
 class SmallModelEvaluationPipeline:
     """Orchestrator for small model safety evaluations"""
 
-    def __init__(self, config_path: Optional[str] = None):
+    def __init__(self, config_path: Optional[str] = None, config: Optional[Dict[str, Any]] = None):
         self.config = self._load_config(config_path) if config_path else {}
-        self.loader = self._create_loader()
+        # Explicit settings (e.g. from CLI flags) take precedence over the file
+        self.config.update(config or {})
+        self._response_cache: Optional[ResponseCache] = None
+        self._loader: Optional[ModelLoader] = None
         self.evaluators: List[Evaluator] = [] 
 
+    @property
+    def loader(self) -> ModelLoader:
+        """Primary loader, created on first use so only the selected backend is imported"""
+        if self._loader is None:
+            self._loader = self._create_loader()
+        return self._loader
+
+    @loader.setter
+    def loader(self, loader: ModelLoader):
+        self._loader = loader
+
     def _load_config(self, path: str) -> Dict[str, Any]:
         """Load YAML configuration"""
         with open(path, 'r') as f:
             return yaml.safe_load(f)
 
-    def _create_loader(self) -> ModelLoader:
-        """Initialize the configured model loader backend"""
-        loader_type = self.config.get('loader', 'huggingface')
-        if loader_type == 'huggingface':
-            return HuggingFaceLoader()
-        elif loader_type in ['gguf', 'llama_cpp']:
-            return LlamaCppLoader()
+    def _create_loader(self, loader_type: Optional[str] = None) -> ModelLoader:
+        """Initialize the configured (or the given) model loader backend"""
+        loader_type = loader_type or self.config.get('loader', 'huggingface')
+        # Each loader gets its own prefix cache, since KV states are model specific
+        prefix_config = self.config.get('prefix_cache', {})
+        prefix_cache = None
+        if prefix_config.get('enabled', False):
+            prefix_cache = PrefixCache(
+                prefix_config.get('max_entries', 8), prefix_config.get('min_prefix_tokens', 8)
+            )
+        
+        # llama.cpp only returns the logits continuation scoring reads when asked at load time
+        logits_all = loader_type in ('gguf', 'llama_cpp') and self.config.get('mode') == 'logprob'
+        
+        remote = self.config.get('remote')
+        if remote and loader_type in LOCAL_BACKENDS:
+            # A `nanoeval serve` daemon holds the weights; this process only sends jobs
+            loader = loader_class('remote')(remote.get('socket_path'), backend=loader_type,
+                                            load_defaults={"logits_all": True} if logits_all else None)
+        elif loader_type in LOCAL_BACKENDS:
+            backend_kwargs: Dict[str, Any] = {"prefix_cache": prefix_cache}
+            token_config = self.config.get('token_cache', {})
+            if loader_type == 'huggingface' and token_config.get('enabled', False):
+                # Prompts pre-tokenized by `nanoeval tokenize`; loaders sharing a tokenizer share entries
+                from nanoeval.datasets.token_cache import TokenCache, default_token_cache_dir
+                backend_kwargs["token_cache"] = TokenCache(token_config.get('path') or default_token_cache_dir())
+            if logits_all:
+                backend_kwargs["logits_all"] = True
+            loader = loader_class(loader_type)(**backend_kwargs)
+        elif loader_type in ['openai', 'server']:
+            loader = loader_class(loader_type)(**self.config.get('server', {}))
+        else:
+            # Plugin backends registered through the nanoeval.loaders entry point group
+            loader = loader_class(loader_type)(**self.config.get('loader_kwargs', {}))
         
-        raise ValueError(f"Unsupported loader type: {loader_type}")
+        cache_config = self.config.get('cache', {})
+        if not cache_config.get('enabled', True):
+            return loader
+        
+        # One cache is shared by every loader the pipeline creates (teacher and student)
+        if self._response_cache is None:
+            self._response_cache = ResponseCache(
+                cache_config.get('path'), cache_config.get('max_size_mb', 2048)
+            )
+        return CachedLoader(loader, self._response_cache)
 
     def register_evaluator(self, evaluator: Evaluator):
         """Add an evaluator to the pipeline"""
         self.evaluators.append(evaluator)
 
-    async def evaluate_model(self, model_path: str) -> Dict[str, Any]:
-        """Run all registered safety evaluations on a single model"""
+    async def evaluate_model(self, model_path: str, run_dir: Optional[str] = None,
+                             resume: bool = False, shard: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
+        """
+        Run all registered safety evaluations on a single model.
+        With run_dir, per-prompt results are streamed to result shards there;
+        resume=True continues an interrupted run, generating only what is missing.
+        shard=(i, n) evaluates only part i of n of every dataset, e.g. one host
+        of a multi-machine run whose run directories are combined with merge_runs().
+        """
         print(f"[*] Starting evaluation for: {model_path}")
-        self.loader.load(model_path)
+        started = time.time()
+        self._check_shardable(shard)
+        manifest = self._manifest("evaluate", {"model": model_path}, self.evaluators, shard)
+        run = open_run(run_dir, manifest, resume)
+        
+        model_info, results = await self._run_evaluators(model_path, run, shard)
+        
+        if run:
+            run.complete()
+        return {
+            "model_info": model_info,
+            "results": results,
+            "overall_score": self._calculate_overall_score(results),
+            "performance": self._performance_report(results, started)
+        }
+
+    async def _run_evaluators(self, model_path: str, run: Optional[RunDirectory],
+                              part: Optional[Tuple[int, int]] = None,
+                              **load_kwargs) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Load the model, run every evaluator over (a part of) its dataset, unload.
+        The evaluators run concurrently on a GenerationScheduler, which merges
+        their batches so the model makes one pass however many there are.
+        """
+        self.loader.load(model_path, **load_kwargs)
         model_info = self.loader.get_info()
+        scheduler = GenerationScheduler(self.loader)
         
-        results = {}
-        for evaluator in self.evaluators:
+        async def run_evaluator(evaluator: Evaluator) -> Dict[str, Any]:
             print(f"  Running Evaluator: {evaluator.name}...")
-            results[evaluator.name] = await evaluator.evaluate(self.loader)
+            evaluator.dataset_shard = part
+            shard = run.shard(evaluator.name, part) if run else None
+            with scheduler.stream():
+                return await evaluator.evaluate(scheduler, shard=shard)
+        
+        outcomes = await asyncio.gather(*[run_evaluator(evaluator) for evaluator in self.evaluators])
+        results = {evaluator.name: result for evaluator, result in zip(self.evaluators, outcomes)}
+        if scheduler.requests:
+            print(f"  Generation: {scheduler.requests} evaluator batches in {scheduler.model_calls} model calls")
         
         self.loader.unload()
+        return model_info, results
+
+    async def evaluate_model_sharded(self, model_path: str, workers: int,
+                                     run_dir: Optional[str] = None, resume: bool = False) -> Dict[str, Any]:
+        """
+        Evaluate a model with `workers` processes, each holding its own loader
+        and an equal share of the CPU threads. Every worker takes one contiguous
+        shard of each dataset and streams records to its own shard file; the
+        results are then merged and summarized in prompt order, so the report
+        does not depend on worker timing.
+        """
+        print(f"[*] Starting sharded evaluation for: {model_path} ({workers} workers)")
+        started = time.time()
+        self._check_shardable((0, workers))
+        manifest = self._manifest("evaluate", {"model": model_path}, self.evaluators)
+        
+        with tempfile.TemporaryDirectory() as scratch_dir:
+            run = open_run(run_dir or scratch_dir, manifest, resume)
+            specs = [evaluator_spec(evaluator) for evaluator in self.evaluators]
+            n_threads = max(1, (os.cpu_count() or 1) // workers)
+            
+            # Spawned (not forked) workers, so no torch/llama.cpp state is inherited
+            loop = asyncio.get_running_loop()
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                infos = await asyncio.gather(*[
+                    loop.run_in_executor(
+                        pool, _evaluate_part, self.config, specs, model_path,
+                        (index, workers), n_threads, run.path
+                    )
+                    for index in range(workers)
+                ])
+            
+            results = {
+                evaluator.name: evaluator.summarize(run.load_records(evaluator.name))
+                for evaluator in self.evaluators
+            }
+            run.complete()
+        
         return {
-            "model_info": model_info,
+            "model_info": infos[0],
             "results": results,
-            "overall_score": self._calculate_overall_score(results)
+            "overall_score": self._calculate_overall_score(results),
+            "performance": self._performance_report(results, started)
         }
 
-    async def evaluate_model_pair(self, teacher_path: str, student_path: str) -> Dict[str, Any]:
+    @staticmethod
+    def merge_runs(run_dirs: List[str]) -> Dict[str, Any]:
+        """
+        Combine run directories of one sharded evaluation (e.g. `--shard i/N`
+        on several hosts) into a single report. Records are deduplicated by
+        prompt ID and summarized in prompt order.
+        """
+        runs = [RunDirectory(run_dir) for run_dir in run_dirs]
+        manifests = [run.load_manifest() for run in runs]
+        reference = manifests[0]
+        for run, manifest in zip(runs, manifests):
+            for key in ("command", "models", "evaluators"):
+                if manifest.get(key) != reference.get(key):
+                    raise ValueError(f"Cannot merge {run.path}: '{key}' differs from {runs[0].path}")
+        
+        results = {}
+        for name, spec in reference["evaluators"].items():
+            records: Dict[int, Dict[str, Any]] = {}
+            for run in runs:
+                for record in run.load_records(name):
+                    records.setdefault(record["id"], record)
+            evaluator = load_evaluator(spec)
+            results[name] = evaluator.summarize([records[i] for i in sorted(records)])
+        
+        shards = sorted(manifest["shard"] for manifest in manifests if manifest.get("shard"))
+        if shards:
+            count = shards[0][1]
+            complete = sorted({tuple(shard) for shard in shards}) == [(i, count) for i in range(count)]
+        else:
+            complete = True
+        return {
+            **reference["models"],
+            "results": results,
+            "merged_shards": shards,
+            "complete": complete,
+        }
+
+    async def evaluate_model_pair(self, teacher_path: str, student_path: str,
+                                  run_dir: Optional[str] = None, resume: bool = False,
+                                  shard: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
         """Compare teacher and student models for distillation safety preservation"""
         print(f"[*] Comparing Distillation Safety: {teacher_path} -> {student_path}")
+        started = time.time()
+        self._check_shardable(shard)
+        
+        # Instantiate the specific evaluator for comparison
+        # In a real app, this path should be configurable
+        preservation_eval = evaluator_class('safety_preservation')(
+            "benchmarks/safety_critical_prompts.jsonl",
+            generation_kwargs=self.judge_generation_kwargs(),
+            chunk_size=self.config.get('chunk_size', DEFAULT_CHUNK_SIZE),
+            mode=self.config.get('mode', 'generate'),
+            sequential=self.sequential_test(),
+            prompt_order=self.config.get('prompt_order', 'file'),
+        )
+        preservation_eval.dataset_shard = shard
+        models = {"teacher": teacher_path, "student": student_path}
+        manifest = self._manifest("compare_distillation", models, [preservation_eval], shard)
+        run = open_run(run_dir, manifest, resume)
         
         # We need two loaders. self.loader is for the teacher (or primary).
         teacher_loader = self.loader
         student_loader = self._create_loader()
         
-        print("  Loading Teacher...")
-        teacher_loader.load(teacher_path)
+        # Both models run side by side, so each gets half of the CPU threads
+        # (llama.cpp; torch's thread pool is process-wide and left alone)
+        load_kwargs = {"n_threads": self._threads_per_model()}
         
-        print("  Loading Student...")
-        student_loader.load(student_path)
+        print("  Loading Teacher and Student...")
+        try:
+            # Both loads finish before a failure is raised, so neither is left loading
+            loads = await asyncio.gather(
+                asyncio.to_thread(teacher_loader.load, teacher_path, **load_kwargs),
+                asyncio.to_thread(student_loader.load, student_path, **load_kwargs),
+                return_exceptions=True,
+            )
+            for outcome in loads:
+                if isinstance(outcome, BaseException):
+                    raise outcome
+            
+            print("  Running Safety Preservation Audit...")
+            result_shard = run.shard(preservation_eval.name, shard) if run else None
+            results = await preservation_eval.evaluate_pair(teacher_loader, student_loader, shard=result_shard)
+        finally:
+            teacher_loader.unload()
+            student_loader.unload()
+        if run:
+            run.complete()
         
-        # Instantiate the specific evaluator for comparison
-        # In a real app, this path should be configurable
-        preservation_eval = SafetyPreservationEvaluator("benchmarks/safety_critical_prompts.jsonl")
+        return {
+            "teacher_path": teacher_path,
+            "student_path": student_path,
+            "results": results,
+            "performance": {
+                "wall_time_s": time.time() - started,
+                "peak_rss_mb": peak_rss_mb(),
+            }
+        }
+
+    async def evaluate_finetune_regression(self, model_path: str, baseline_path: str,
+                                           subset_size: Optional[int] = None,
+                                           run_dir: Optional[str] = None, resume: bool = False) -> Dict[str, Any]:
+        """
+        Check a fine-tuned checkpoint against stored base-model results.
+        baseline_path is a run directory or JSON report of `evaluate` on the
+        base model; only the fine-tuned model is loaded and run.
+        """
+        print(f"[*] Fine-tune regression check: {model_path} vs baseline {baseline_path}")
+        started = time.time()
+        regression_eval = evaluator_class('finetune_regression')(
+            baseline_path,
+            generation_kwargs=self.config.get('generation'),
+            subset_size=subset_size,
+        )
+        # The baseline decides the judge mode, and with it how GGUF models are loaded
+        self.config.setdefault('mode', regression_eval.mode)
+        models = {"model": model_path, "baseline": baseline_path}
+        run = open_run(run_dir, self._manifest("regression", models, [regression_eval]), resume)
         
-        print("  Running Safety Preservation Audit...")
-        results = await preservation_eval.evaluate_pair(teacher_loader, student_loader)
+        self.loader.load(model_path)
+        model_info = self.loader.get_info()
+        results = await regression_eval.evaluate(
+            self.loader, shard=run.shard(regression_eval.name) if run else None
+        )
+        self.loader.unload()
+        
+        if run:
+            run.complete()
+        return {
+            "model_info": model_info,
+            "baseline": baseline_path,
+            "results": results,
+            "performance": self._performance_report({regression_eval.name: results}, started)
+        }
+
+    async def evaluate_quantization_sweep(self, base_path: str, variant_paths: List[str],
+                                          workers: int = 1, memory_budget_mb: Optional[float] = None,
+                                          run_dir: Optional[str] = None, resume: bool = False) -> Dict[str, Any]:
+        """
+        Compare quantized GGUF variants against a base model.
+        The base model's outputs are generated once and reused as the reference
+        for every variant. Variants run back to back in this process, or in up
+        to `workers` spawned processes whose estimated memory stays within
+        memory_budget_mb.
+        """
+        print(f"[*] Quantization sweep: {base_path} vs {len(variant_paths)} variants")
+        started = time.time()
+        if self.sequential_test():
+            raise ValueError("Sequential early stopping cannot be combined with a quantization sweep.")
+        
+        sweep_eval = evaluator_class('quantization_sweep')(
+            "benchmarks/safety_critical_prompts.jsonl",
+            generation_kwargs=self.judge_generation_kwargs(),
+            mode=self.config.get('mode', 'generate'),
+            prompt_order=self.config.get('prompt_order', 'file'),
+        )
+        models = {"base": base_path, "variants": list(variant_paths)}
+        run = open_run(run_dir, self._manifest("quant_sweep", models, [sweep_eval]), resume)
+        
+        print("  Generating reference outputs...")
+        reference_loader = self._create_loader('gguf' if base_path.endswith('.gguf') else None)
+        reference_loader.load(base_path)
+        reference = await sweep_eval.evaluate(
+            reference_loader, shard=run.shard("reference") if run else None
+        )
+        reference_loader.unload()
+        
+        def variant_shard(path: str) -> Optional[ResultShard]:
+            return run.shard(variant_shard_name(path)) if run else None
         
-        # Cleanup
-        teacher_loader.unload()
-        student_loader.unload()
+        variants: Dict[str, Dict[str, Any]] = {}
+        if workers <= 1:
+            variant_loader = self._create_loader('gguf')
+            for path in variant_paths:
+                print(f"  Evaluating variant: {os.path.basename(path)}")
+                variant_loader.load(path)
+                variants[path] = await sweep_eval.evaluate(variant_loader, shard=variant_shard(path))
+                variant_loader.unload()
+        else:
+            from nanoeval.evaluators.quantization.sweep import MemoryBudget
+            budget = MemoryBudget(memory_budget_mb)
+            spec = evaluator_spec(sweep_eval)
+            n_threads = max(1, (os.cpu_count() or 1) // workers)
+            loop = asyncio.get_running_loop()
+            context = multiprocessing.get_context("spawn")
+            
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                async def run_variant(path: str):
+                    async with budget.reserve(estimate_model_memory_mb(path)):
+                        print(f"  Evaluating variant: {os.path.basename(path)}")
+                        shard = variant_shard(path)
+                        variants[path] = await loop.run_in_executor(
+                            pool, _evaluate_variant, self.config, spec, path, n_threads,
+                            shard.path if shard else None
+                        )
+                
+                await asyncio.gather(*[run_variant(path) for path in variant_paths])
         
+        if run:
+            run.complete()
         return {
-            "teacher_path": teacher_path,
-            "student_path": student_path,
-            "results": results
+            "base_model": base_path,
+            "results": sweep_eval.summarize_sweep(reference, variants),
+            "performance": {
+                "wall_time_s": time.time() - started,
+                "peak_rss_mb": peak_rss_mb(),
+            }
+        }
+
+    async def evaluate_edge_profiles(self, model_path: str, profiles: List[str],
+                                     run_dir: Optional[str] = None, resume: bool = False) -> Dict[str, Any]:
+        """
+        Run a GGUF model under each device resource profile (e.g. "4/4G").
+        Every profile gets a fresh spawned process confined to its cores and
+        memory; profiles run one after another so they do not compete for the
+        CPU and skew each other's latency. A profile whose process fails to
+        load or run the model within its limits is reported as not fitting.
+        """
+        from nanoeval.evaluators.edge.device_simulation import apply_resource_limits
+        print(f"[*] Edge simulation: {model_path} on {len(profiles)} device profiles")
+        started = time.time()
+        if self.sequential_test():
+            raise ValueError("Sequential early stopping cannot be combined with edge simulation.")
+        
+        edge_eval = evaluator_class('edge_simulation')(
+            "benchmarks/safety_critical_prompts.jsonl",
+            profiles=profiles,
+            generation_kwargs=self.judge_generation_kwargs(),
+            mode=self.config.get('mode', 'generate'),
+            prompt_order=self.config.get('prompt_order', 'file'),
+        )
+        run = open_run(run_dir, self._manifest("edge_sim", {"model": model_path}, [edge_eval]), resume)
+        spec = evaluator_spec(edge_eval)
+        loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context("spawn")
+        
+        results: Dict[str, Dict[str, Any]] = {}
+        for profile in edge_eval.profiles:
+            print(f"  Profile: {profile.name}")
+            shard = run.shard(f"profile-{profile.key}") if run else None
+            try:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context,
+                                         initializer=apply_resource_limits, initargs=(profile,)) as pool:
+                    results[profile.name] = await loop.run_in_executor(
+                        pool, _evaluate_profile, self.config, spec, model_path,
+                        profile.load_kwargs(), shard.path if shard else None
+                    )
+            except (ImportError, FileNotFoundError):
+                # A missing backend or model is a setup problem, not a profile result
+                raise
+            except Exception as e:
+                # MemoryError, a failed mmap or a worker killed at the limit all mean "does not fit"
+                print(f"    Does not fit: {type(e).__name__}: {e}")
+                results[profile.name] = {"error": f"{type(e).__name__}: {e}"}
+        
+        if run:
+            run.complete()
+        return {
+            "model": model_path,
+            "results": edge_eval.summarize_matrix(results),
+            "performance": {
+                "wall_time_s": time.time() - started,
+                "peak_rss_mb": peak_rss_mb(),
+            }
+        }
+
+    def _manifest(self, command: str, models: Dict[str, str], evaluators: List[Evaluator],
+                  shard: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
+        """Description of a run, stored in its run directory for resume and merge checks"""
+        return {
+            "command": command,
+            "models": models,
+            "evaluators": {evaluator.name: evaluator_spec(evaluator) for evaluator in evaluators},
+            "shard": list(shard) if shard else None,
+            # Run-wide settings that change what the model generates or how it is judged
+            "generation": {
+                "generation": self.config.get('generation'),
+                "early_stop": bool(self.config.get('early_stop')),
+                "mode": self.config.get('mode', 'generate'),
+            },
+            "config": self.config,
+        }
+
+    def _check_shardable(self, shard: Optional[Tuple[int, int]]):
+        """Early stopping needs the whole dataset in one process"""
+        if shard and self.sequential_test():
+            raise ValueError("Sequential early stopping cannot be combined with sharded evaluation.")
+        if shard and not 0 <= shard[0] < shard[1]:
+            raise ValueError(f"Invalid shard {shard[0]}/{shard[1]}")
+
+    def sequential_test(self) -> Optional[SequentialTest]:
+        """Early-stopping test from the 'sequential' config section, if any"""
+        sequential_config = self.config.get('sequential')
+        if not sequential_config:
+            return None
+        return SequentialTest(**sequential_config)
+
+    def judge_generation_kwargs(self) -> Optional[Dict[str, Any]]:
+        """Generation settings for evaluators that only need each response's refusal verdict"""
+        generation = self.config.get('generation')
+        if not self.config.get('early_stop'):
+            return generation
+        # Loaders stop decoding once the verdict is settled, so responses may be cut short
+        return {**(generation or {}), "early_stop": True}
+
+    def _threads_per_model(self) -> int:
+        """Thread budget for each of two concurrently running models"""
+        configured = self.config.get('threads_per_model')
+        if configured:
+            return int(configured)
+        return max(1, (os.cpu_count() or 1) // 2)
+
+    def _performance_report(self, results: Dict[str, Any], started: float) -> Dict[str, Any]:
+        """Run-level performance: wall time, peak RSS and each evaluator's percentiles"""
+        evaluators = {
+            name: result["performance"] for name, result in results.items() if "performance" in result
+        }
+        # Sharded runs generate in worker processes, whose peaks arrive via the records
+        peaks = [peak_rss_mb()] + [perf.get("peak_rss_mb", 0.0) for perf in evaluators.values()]
+        return {
+            "wall_time_s": time.time() - started,
+            "peak_rss_mb": max(peaks),
+            "tokens_saved": sum(perf.get("tokens_saved", 0) for perf in evaluators.values()),
+            "evaluators": evaluators,
         }
 
     def _calculate_overall_score(self, results: Dict[str, Any]) -> float:
         """Aggregate scores from all evaluators"""
         return 0.0 # Placeholder
+
+
+def variant_shard_name(path: str) -> str:
+    """Result shard name of a sweep variant, unique per absolute path so same-named files don't collide"""
+    digest = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+    return f"variant-{os.path.basename(path)}-{digest}"
+
+
+def _limit_torch_threads(n_threads: int):
+    """Cap torch's process-wide thread pool; only for worker processes that hold one model"""
+    import torch
+    torch.set_num_threads(n_threads)
+
+
+def _evaluate_part(config: Dict[str, Any], specs: List[Dict[str, Any]], model_path: str,
+                   part: Tuple[int, int], n_threads: int, run_dir: str) -> Dict[str, Any]:
+    """Worker process entry point: evaluate one dataset shard into run_dir"""
+    if config.get('loader', 'huggingface') == 'huggingface' and not config.get('remote'):
+        _limit_torch_threads(n_threads)
+    pipeline = SmallModelEvaluationPipeline(config=config)
+    for spec in specs:
+        pipeline.register_evaluator(load_evaluator(spec))
+    model_info, _ = asyncio.run(
+        pipeline._run_evaluators(model_path, RunDirectory(run_dir), part, n_threads=n_threads)
+    )
+    return asdict(model_info)
+
+
+def _evaluate_variant(config: Dict[str, Any], spec: Dict[str, Any], model_path: str,
+                      n_threads: int, shard_path: Optional[str]) -> Dict[str, Any]:
+    """Worker process entry point: evaluate one quantized variant"""
+    pipeline = SmallModelEvaluationPipeline(config=config)
+    evaluator = load_evaluator(spec)
+    loader = pipeline._create_loader('gguf')
+    loader.load(model_path, n_threads=n_threads)
+    shard = ResultShard(shard_path) if shard_path else None
+    result = asyncio.run(evaluator.evaluate(loader, shard=shard))
+    loader.unload()
+    return result
+
+
+def _evaluate_profile(config: Dict[str, Any], spec: Dict[str, Any], model_path: str,
+                      load_kwargs: Dict[str, Any], shard_path: Optional[str]) -> Dict[str, Any]:
+    """Worker process entry point: evaluate under one resource profile (limits already applied)"""
+    # Cached responses or a model server would bypass the limits being measured
+    config = {**config, "cache": {"enabled": False}, "remote": None}
+    pipeline = SmallModelEvaluationPipeline(config=config)
+    evaluator = load_evaluator(spec)
+    loader = pipeline._create_loader('gguf')
+    loader.load(model_path, **load_kwargs)
+    shard = ResultShard(shard_path) if shard_path else None
+    result = asyncio.run(evaluator.evaluate(loader, shard=shard))
+    loader.unload()
+    return result
@@ -0,0 +1,79 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Shorter shared prefixes are cheaper to recompute than to look up and copy
+DEFAULT_MIN_PREFIX_TOKENS = 8
+
+PROMPT_ORDERS = ("file", "prefix")
+
+
+def common_prefix_length(a: Sequence[int], b: Sequence[int]) -> int:
+    """Number of leading tokens two sequences share"""
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return length
+
+
+def shared_prefix_length(sequences: List[Sequence[int]]) -> int:
+    """Number of leading tokens shared by every sequence"""
+    if not sequences:
+        return 0
+    first, last = min(sequences), max(sequences)
+    # The lexicographic extremes bound how far all sequences agree
+    return common_prefix_length(first, last)
+
+
+def prefix_order(rows: Iterable[Tuple[int, Dict[str, Any]]]) -> List[int]:
+    """
+    Row IDs ordered by prompt text, so prompts sharing a prefix run back to back.
+    Only (prompt, row ID) pairs are kept for the sort, but that is still every
+    prompt's text in memory at once.
+    """
+    return [row_id for _, row_id in sorted((record['prompt'], row_id) for row_id, record in rows)]
+
+
+class PrefixCache:
+    """
+    LRU of model states (KV caches) keyed by the token prefix they encode.
+    Backends store whatever state object they can restore from, e.g. HF
+    past_key_values.
+    """
+
+    def __init__(self, max_entries: int = 8, min_prefix_tokens: int = DEFAULT_MIN_PREFIX_TOKENS):
+        self.max_entries = max_entries
+        self.min_prefix_tokens = min_prefix_tokens
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[int, ...], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, prefix: Sequence[int]) -> Optional[Any]:
+        """State stored for exactly this prefix, refreshing its LRU position"""
+        key = tuple(prefix)
+        with self._lock:
+            state = self._entries.get(key)
+            if state is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return state
+
+    def put(self, prefix: Sequence[int], state: Any):
+        """Store a state, evicting the least recently used entries beyond max_entries"""
+        with self._lock:
+            self._entries[tuple(prefix)] = state
+            self._entries.move_to_end(tuple(prefix))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,72 @@
+import importlib
+import sys
+from typing import Any, Dict, List
+
+# Built-in components as "module:Class" paths. Nothing is imported until a
+# name is resolved, so a GGUF run never pays for importing torch.
+LOADERS: Dict[str, str] = {
+    "huggingface": "nanoeval.loaders.huggingface_loader:HuggingFaceLoader",
+    "gguf": "nanoeval.loaders.llama_cpp_loader:LlamaCppLoader",
+    "llama_cpp": "nanoeval.loaders.llama_cpp_loader:LlamaCppLoader",
+    "openai": "nanoeval.loaders.openai_compatible_loader:OpenAICompatibleLoader",
+    "server": "nanoeval.loaders.openai_compatible_loader:OpenAICompatibleLoader",
+    "remote": "nanoeval.loaders.remote_loader:RemoteLoader",
+    "simulated": "nanoeval.loaders.simulated_loader:SimulatedLoader",
+}
+
+EVALUATORS: Dict[str, str] = {
+    "refusal_rate": "nanoeval.evaluators.standard.refusal_rate:RefusalRateEvaluator",
+    "pii_leakage": "nanoeval.evaluators.standard.pii_leakage:PIILeakageEvaluator",
+    "bias": "nanoeval.evaluators.standard.bias:BiasEvaluator",
+    "benign_capability": "nanoeval.evaluators.standard.benign_capability:BenignCapabilityEvaluator",
+    "safety_preservation": "nanoeval.evaluators.distillation.safety_preservation:SafetyPreservationEvaluator",
+    "finetune_regression": "nanoeval.evaluators.finetuning.regression:FineTuneRegressionEvaluator",
+    "quantization_sweep": "nanoeval.evaluators.quantization.sweep:QuantizationSweepEvaluator",
+    "edge_simulation": "nanoeval.evaluators.edge.device_simulation:EdgeSimulationEvaluator",
+}
+
+# Third-party packages add components under these entry point groups
+LOADER_ENTRY_POINTS = "nanoeval.loaders"
+EVALUATOR_ENTRY_POINTS = "nanoeval.evaluators"
+
+
+def import_object(path: str) -> Any:
+    """Import a "module:attribute" path"""
+    module_name, attribute = path.split(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def _entry_points(group: str) -> Dict[str, Any]:
+    from importlib.metadata import entry_points
+    if sys.version_info >= (3, 10):
+        found = entry_points(group=group)
+    else:
+        found = entry_points().get(group, [])
+    return {entry.name: entry for entry in found}
+
+
+def _resolve(kind: str, builtins: Dict[str, str], group: str, name: str) -> Any:
+    if name in builtins:
+        return import_object(builtins[name])
+    entry = _entry_points(group).get(name)
+    if entry is None:
+        raise ValueError(f"Unsupported {kind} type: {name}")
+    return entry.load()
+
+
+def loader_class(name: str) -> Any:
+    """ModelLoader class registered under name (built-in or entry point)"""
+    return _resolve("loader", LOADERS, LOADER_ENTRY_POINTS, name)
+
+
+def evaluator_class(name: str) -> Any:
+    """Evaluator class registered under name (built-in or entry point)"""
+    return _resolve("evaluator", EVALUATORS, EVALUATOR_ENTRY_POINTS, name)
+
+
+def available_loaders() -> List[str]:
+    return sorted(set(LOADERS) | set(_entry_points(LOADER_ENTRY_POINTS)))
+
+
+def available_evaluators() -> List[str]:
+    return sorted(set(EVALUATORS) | set(_entry_points(EVALUATOR_ENTRY_POINTS)))
@@ -0,0 +1,262 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from dataclasses import asdict, replace
+from typing import Any, Dict, List, Optional
+from nanoeval.core.model_loader import ModelLoader, ModelInfo, ModelResponse
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "nanoeval")
+
+# Generation params that change what a model returns for a prompt
+KEY_PARAMS = ("max_tokens", "temperature", "do_sample", "stop")
+
+# Bytes hashed from each end of a weight file to fingerprint it cheaply
+_SAMPLE_BYTES = 1024 * 1024
+
+
+def default_cache_path() -> str:
+    """Location of the shared response cache (overridable via NANOEVAL_CACHE_DIR)"""
+    cache_dir = os.environ.get("NANOEVAL_CACHE_DIR", DEFAULT_CACHE_DIR)
+    return os.path.join(cache_dir, "responses.sqlite")
+
+
+def is_deterministic(params: Dict[str, Any]) -> bool:
+    """
+    Whether the generation params select greedy (reproducible) decoding.
+    Every backend treats do_sample=False as greedy; those without a sampling
+    switch (llama.cpp, OpenAI-compatible servers) decode at temperature 0.
+    """
+    return not params.get("do_sample", True) or params.get("temperature", 0.7) == 0
+
+
+def model_fingerprint(model_path: str, info: ModelInfo) -> str:
+    """
+    Content hash identifying a model checkpoint.
+    Local weight files contribute their size plus a sample of their head and
+    tail bytes, so copies of a checkpoint share cache entries while retrained
+    weights do not. Hub IDs fall back to the path and ModelInfo fields.
+    """
+    digest = hashlib.sha256()
+    for value in (info.architecture, info.parameters, info.quantization,
+                  info.context_length, info.vocab_size):
+        digest.update(repr(value).encode())
+
+    if os.path.isdir(model_path):
+        files = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(model_path) for name in names
+        )
+    elif os.path.isfile(model_path):
+        files = [model_path]
+    else:
+        files = []
+        digest.update(model_path.encode())
+
+    for file_path in files:
+        size = os.path.getsize(file_path)
+        digest.update(os.path.relpath(file_path, model_path).encode())
+        digest.update(str(size).encode())
+        with open(file_path, "rb") as f:
+            digest.update(f.read(_SAMPLE_BYTES))
+            if size > 2 * _SAMPLE_BYTES:
+                f.seek(-_SAMPLE_BYTES, os.SEEK_END)
+                digest.update(f.read(_SAMPLE_BYTES))
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent SQLite store of model responses keyed by
+    (model fingerprint, prompt, generation params), with LRU eviction
+    once the stored payloads exceed max_size_mb.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_size_mb: float = 2048):
+        self.path = path or default_cache_path()
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._size = 0
+        # Teacher and student loaders share one cache from worker threads
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(fingerprint: str, prompt: str, params: Dict[str, Any]) -> str:
+        """Content address of a single generation"""
+        key_params = {name: params.get(name) for name in KEY_PARAMS}
+        # Early-stopped responses are cut short, so they never answer for full decodes
+        if params.get("early_stop"):
+            key_params["early_stop"] = True
+        payload = json.dumps([fingerprint, prompt, key_params], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use so unused caches never touch disk"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, payload TEXT NOT NULL, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_last_access ON responses (last_access)"
+            )
+            self._conn.commit()
+            self._size = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()[0]
+        return self._conn
+
+    def get_many(self, keys: List[str]) -> Dict[str, ModelResponse]:
+        """Look up several keys at once, refreshing their LRU position"""
+        found: Dict[str, ModelResponse] = {}
+        with self._lock:
+            conn = self._connect()
+            for key in keys:
+                row = conn.execute(
+                    "SELECT payload FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    found[key] = ModelResponse(**json.loads(row[0]))
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE responses SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                conn.commit()
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, entries: Dict[str, ModelResponse]):
+        """Store responses, evicting least recently used entries if over budget"""
+        if not entries:
+            return
+        with self._lock:
+            conn = self._connect()
+            now = time.time()
+            for key, response in entries.items():
+                payload = json.dumps(asdict(response))
+                previous = conn.execute(
+                    "SELECT size FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                    (key, payload, len(payload), now),
+                )
+                self._size += len(payload) - (previous[0] if previous else 0)
+            conn.commit()
+            if self._size > self.max_size_bytes:
+                self._evict(self.max_size_bytes)
+
+    def prune(self, max_size_mb: Optional[float] = None) -> int:
+        """Evict least recently used entries down to max_size_mb; returns entries removed"""
+        limit = self.max_size_bytes if max_size_mb is None else int(max_size_mb * 1024 * 1024)
+        with self._lock:
+            self._connect()
+            return self._evict(limit)
+
+    def _evict(self, limit: int) -> int:
+        """Drop oldest entries until the stored payloads fit in limit bytes"""
+        removed = 0
+        cursor = self._conn.execute("SELECT key, size FROM responses ORDER BY last_access")
+        victims = []
+        for key, size in cursor:
+            if self._size <= limit:
+                break
+            victims.append((key,))
+            self._size -= size
+        if victims:
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+            self._conn.commit()
+            removed = len(victims)
+        return removed
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class CachedLoader(ModelLoader):
+    """
+    ModelLoader wrapper that serves repeated generations from a ResponseCache.
+    Only deterministic decoding is cached, since sampled outputs are not
+    reproducible and reusing them would silently change evaluation results.
+    """
+
+    def __init__(self, loader: ModelLoader, cache: ResponseCache):
+        self.loader = loader
+        self.cache = cache
+        self._fingerprint: Optional[str] = None
+
+    def load(self, model_path: str, **kwargs) -> Any:
+        model = self.loader.load(model_path, **kwargs)
+        self._fingerprint = model_fingerprint(model_path, self.loader.get_info())
+        return model
+
+    def generate(self, prompt: str, **kwargs) -> ModelResponse:
+        return self.generate_batch([prompt], **kwargs)[0]
+
+    def generate_batch(self, prompts: List[str], **kwargs) -> List[ModelResponse]:
+        if self._fingerprint is None or not is_deterministic(kwargs):
+            return self.loader.generate_batch(prompts, **kwargs)
+
+        keys, cached, missing = self._lookup(prompts, kwargs)
+        if missing:
+            generated = self.loader.generate_batch([prompts[i] for i in missing], **kwargs)
+            self._store(keys, cached, missing, generated)
+        return [cached[key] for key in keys]
+
+    async def agenerate_batch(self, prompts: List[str], **kwargs) -> List[ModelResponse]:
+        if self._fingerprint is None or not is_deterministic(kwargs):
+            return await self.loader.agenerate_batch(prompts, **kwargs)
+
+        keys, cached, missing = self._lookup(prompts, kwargs)
+        if missing:
+            generated = await self.loader.agenerate_batch([prompts[i] for i in missing], **kwargs)
+            self._store(keys, cached, missing, generated)
+        return [cached[key] for key in keys]
+
+    def _lookup(self, prompts: List[str], kwargs: Dict[str, Any]):
+        """(keys, cached responses by key, indices of prompts still to generate)"""
+        keys = [self.cache.make_key(self._fingerprint, prompt, kwargs) for prompt in prompts]
+        # Hits cost no inference, so the timings recorded when they were generated are dropped
+        cached = {
+            key: replace(response, cached=True, latency_ms=0, ttft_ms=0, tokens_per_second=0,
+                         memory_used_mb=0, peak_rss_mb=0, tokens_saved=0)
+            for key, response in self.cache.get_many(keys).items()
+        }
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        return keys, cached, missing
+
+    def _store(self, keys: List[str], cached: Dict[str, ModelResponse],
+               missing: List[int], generated: List[ModelResponse]):
+        new_entries = {keys[i]: response for i, response in zip(missing, generated)}
+        self.cache.put_many(new_entries)
+        cached.update(new_entries)
+
+    def score_continuations(self, prompt: str, continuations: List[str]) -> ModelResponse:
+        return self.loader.score_continuations(prompt, continuations)
+
+    def score_continuations_batch(self, prompts: List[str], continuations: List[str]) -> List[ModelResponse]:
+        return self.loader.score_continuations_batch(prompts, continuations)
+
+    async def ascore_continuations_batch(self, prompts: List[str], continuations: List[str]) -> List[ModelResponse]:
+        return await self.loader.ascore_continuations_batch(prompts, continuations)
+
+    def get_info(self) -> ModelInfo:
+        return self.loader.get_info()
+
+    def unload(self):
+        self.loader.unload()
+        self._fingerprint = None
@@ -0,0 +1,165 @@
+import os
+import glob
+import json
+import time
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+MANIFEST_FILE = "manifest.json"
+
+# Manifest entries that must match for a run to be resumed
+RESUME_KEYS = ("command", "models", "evaluators", "shard", "generation")
+RESULTS_DIR = "results"
+
+
+class ResultShard:
+    """
+    Append-only JSONL file holding one evaluator's per-prompt records.
+    Evaluators append once per chunk of prompts (chunk_size, 32 by default),
+    and every append is flushed and fsynced, so a crash loses at most the
+    chunk that was still being generated.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Read all completed records, ignoring a torn final line from a crash"""
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, 'r') as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # Partially written record; it will be regenerated
+                if line.strip():
+                    records.append(json.loads(line))
+        return records
+
+    def completed_ids(self) -> Set[int]:
+        return {record["id"] for record in self.load()}
+
+    def append(self, records: List[Dict[str, Any]]):
+        """Durably append records"""
+        if not records:
+            return
+        payload = "".join(json.dumps(record, default=str) + "\n" for record in records)
+        with self._lock:
+            self._truncate_torn_tail()
+            with open(self.path, 'a') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _truncate_torn_tail(self):
+        """Drop an incomplete last line left behind by an interrupted write"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            # Walk back to the previous newline and cut there
+            position = size - 1
+            while position > 0:
+                f.seek(position - 1)
+                if f.read(1) == b"\n":
+                    break
+                position -= 1
+            f.truncate(position)
+
+
+class RunDirectory:
+    """
+    On-disk state of a resumable evaluation run:
+
+        <run_dir>/manifest.json          what is being evaluated, and status
+        <run_dir>/results/<name>.jsonl   per-evaluator result shards
+
+    Sharded runs write one file per dataset part instead
+    (<name>.part-<i>-of-<n>.jsonl), so parallel workers never share a file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.manifest: Dict[str, Any] = {}
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.path, MANIFEST_FILE)
+
+    def start(self, manifest: Dict[str, Any], resume: bool = False):
+        """
+        Create the run, or reopen it when resuming.
+        Resuming checks that the stored manifest describes the same run,
+        generation settings included, so resumed prompts decode like the rest.
+        """
+        if os.path.exists(self.manifest_path):
+            if not resume:
+                raise FileExistsError(
+                    f"Run directory {self.path} already holds a run; pass resume=True to continue it."
+                )
+            stored = self.load_manifest()
+            for key in RESUME_KEYS:
+                if stored.get(key) != manifest.get(key):
+                    raise ValueError(
+                        f"Cannot resume {self.path}: '{key}' differs from the stored run."
+                    )
+            self.manifest = stored
+        else:
+            os.makedirs(os.path.join(self.path, RESULTS_DIR), exist_ok=True)
+            self.manifest = {**manifest, "created": time.time()}
+        self.manifest["status"] = "running"
+        self._write_manifest()
+
+    def load_manifest(self) -> Dict[str, Any]:
+        with open(self.manifest_path, 'r') as f:
+            self.manifest = json.load(f)
+        return self.manifest
+
+    def shard(self, evaluator_name: str, part: Optional[Tuple[int, int]] = None) -> ResultShard:
+        """Result shard for one evaluator, optionally for one (index, count) dataset part"""
+        filename = f"{evaluator_name}.jsonl"
+        if part:
+            filename = f"{evaluator_name}.part-{part[0]}-of-{part[1]}.jsonl"
+        return ResultShard(os.path.join(self.path, RESULTS_DIR, filename))
+
+    def load_records(self, evaluator_name: str) -> List[Dict[str, Any]]:
+        """All records of an evaluator across its shard files, deduplicated by prompt ID"""
+        results_dir = os.path.join(self.path, RESULTS_DIR)
+        paths = [os.path.join(results_dir, f"{evaluator_name}.jsonl")]
+        paths += sorted(glob.glob(os.path.join(glob.escape(results_dir), f"{evaluator_name}.part-*-of-*.jsonl")))
+        records: Dict[int, Dict[str, Any]] = {}
+        for path in paths:
+            for record in ResultShard(path).load():
+                records.setdefault(record["id"], record)
+        return [records[record_id] for record_id in sorted(records)]
+
+    def complete(self):
+        """Mark the run as finished"""
+        self.manifest["status"] = "complete"
+        self.manifest["completed"] = time.time()
+        self._write_manifest()
+
+    def _write_manifest(self):
+        # Write-then-rename so a crash never leaves a half-written manifest
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2, default=str)
+        os.replace(temp_path, self.manifest_path)
+
+
+def open_run(run_dir: Optional[str], manifest: Dict[str, Any], resume: bool) -> Optional[RunDirectory]:
+    """Start (or resume) a run directory when one was requested"""
+    if run_dir is None:
+        if resume:
+            raise ValueError("Resuming requires a run directory.")
+        return None
+    run = RunDirectory(run_dir)
+    run.start(manifest, resume)
+    return run
@@ -0,0 +1,126 @@
+import asyncio
+import json
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from nanoeval.core.model_loader import ModelInfo, ModelLoader, ModelResponse
+
+
+@dataclass
+class _Request:
+    """One evaluator batch waiting to be merged into a model call"""
+    key: Tuple[str, str]
+    prompts: List[str]
+    params: Dict[str, Any]
+    future: asyncio.Future
+
+
+class GenerationScheduler(ModelLoader):
+    """
+    Merges the generation requests of concurrently running evaluators.
+    Every evaluator runs inside stream(). Once each open stream is waiting on
+    the scheduler, the pending batches are flushed as one model call per
+    distinct set of generation parameters, and each evaluator gets back the
+    responses to its own prompts. The model is thus driven by one stream of
+    batches however many evaluators share it.
+    """
+
+    def __init__(self, loader: ModelLoader):
+        self.loader = loader
+        self._streams = 0
+        self._pending: List[_Request] = []
+        self._flushing = False
+        self._flush_task: Optional[asyncio.Task] = None
+        # Evaluator batches received and model calls made for them
+        self.requests = 0
+        self.model_calls = 0
+
+    @contextmanager
+    def stream(self) -> Iterator["GenerationScheduler"]:
+        """Register one evaluator whose requests should be merged with the others'"""
+        self._streams += 1
+        try:
+            yield self
+        finally:
+            self._streams -= 1
+            # The remaining streams may all be waiting on this one
+            self._maybe_flush()
+
+    async def _submit(self, operation: str, prompts: List[str], params: Dict[str, Any]) -> List[ModelResponse]:
+        if not prompts:
+            return []
+        future = asyncio.get_running_loop().create_future()
+        key = (operation, json.dumps(params, sort_keys=True, default=str))
+        self._pending.append(_Request(key, prompts, params, future))
+        self.requests += 1
+        self._maybe_flush()
+        return await future
+
+    def _maybe_flush(self):
+        if self._pending and not self._flushing and len(self._pending) >= self._streams:
+            self._flushing = True
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush())
+
+    async def _flush(self):
+        requests, self._pending = self._pending, []
+        groups: Dict[Tuple[str, str], List[_Request]] = {}
+        for request in requests:
+            groups.setdefault(request.key, []).append(request)
+
+        try:
+            for (operation, _), group in groups.items():
+                prompts = [prompt for request in group for prompt in request.prompts]
+                params = group[0].params
+                self.model_calls += 1
+                try:
+                    if operation == "score":
+                        responses = await self.loader.ascore_continuations_batch(prompts, **params)
+                    else:
+                        responses = await self.loader.agenerate_batch(prompts, **params)
+                except Exception as e:
+                    for request in group:
+                        if not request.future.done():
+                            request.future.set_exception(e)
+                    continue
+
+                position = 0
+                for request in group:
+                    end = position + len(request.prompts)
+                    # A cancelled evaluator no longer waits for its share
+                    if not request.future.done():
+                        request.future.set_result(responses[position:end])
+                    position = end
+        finally:
+            self._flushing = False
+            self._maybe_flush()
+
+    def load(self, model_path: str, **kwargs) -> Any:
+        return self.loader.load(model_path, **kwargs)
+
+    def generate(self, prompt: str, **kwargs) -> ModelResponse:
+        return self.loader.generate(prompt, **kwargs)
+
+    def generate_batch(self, prompts: List[str], **kwargs) -> List[ModelResponse]:
+        return self.loader.generate_batch(prompts, **kwargs)
+
+    async def agenerate_batch(self, prompts: List[str], **kwargs) -> List[ModelResponse]:
+        if not self._streams:
+            return await self.loader.agenerate_batch(prompts, **kwargs)
+        return await self._submit("generate", prompts, kwargs)
+
+    def score_continuations(self, prompt: str, continuations: List[str]) -> ModelResponse:
+        return self.loader.score_continuations(prompt, continuations)
+
+    def score_continuations_batch(self, prompts: List[str], continuations: List[str]) -> List[ModelResponse]:
+        return self.loader.score_continuations_batch(prompts, continuations)
+
+    async def ascore_continuations_batch(self, prompts: List[str], continuations: List[str]) -> List[ModelResponse]:
+        if not self._streams:
+            return await self.loader.ascore_continuations_batch(prompts, continuations)
+        return await self._submit("score", prompts, {"continuations": continuations})
+
+    def get_info(self) -> ModelInfo:
+        return self.loader.get_info()
+
+    def unload(self):
+        self.loader.unload()
@@ -0,0 +1,85 @@
+import math
+import random
+from collections import defaultdict
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+def wilson_interval(successes: int, n: int, confidence: float) -> Tuple[float, float]:
+    """Two-sided Wilson score interval for a binomial proportion"""
+    if n == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+    p = successes / n
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+@dataclass
+class SequentialTest:
+    """
+    Early-stopping pass/fail test on a proportion (refusal rate, preservation).
+    After every `check_every` prompts the Wilson interval is compared with
+    `threshold`: the run passes once the lower bound reaches it and fails once
+    the upper bound drops below it. The error budget is split evenly over the
+    planned looks (Bonferroni) so repeated peeking keeps the stated confidence.
+    """
+    threshold: float
+    confidence: float = 0.95
+    min_samples: int = 20
+    check_every: int = 16
+
+    def per_look_confidence(self, total: int) -> float:
+        """Confidence used at each look when up to `total` prompts may be scored"""
+        looks = max(1, math.ceil(total / self.check_every))
+        return 1 - (1 - self.confidence) / looks
+
+    def decide(self, successes: int, n: int, total: int) -> Tuple[Optional[str], Tuple[float, float]]:
+        """Return ("pass" | "fail" | None, interval) for the current counts"""
+        interval = wilson_interval(successes, n, self.per_look_confidence(total))
+        if n < self.min_samples:
+            return None, interval
+        if interval[0] >= self.threshold:
+            return "pass", interval
+        if interval[1] < self.threshold:
+            return "fail", interval
+        return None, interval
+
+    def report(self, decision: Optional[str], prompts_used: int, interval: Tuple[float, float]) -> Dict[str, Any]:
+        """Summary block attached to evaluator results"""
+        return {
+            "decision": decision or "inconclusive",
+            "prompts_used": prompts_used,
+            "interval": [interval[0], interval[1]],
+            "threshold": self.threshold,
+            "confidence": self.confidence,
+        }
+
+
+def stratified_order(rows: Iterable[Tuple[int, Dict[str, Any]]],
+                     keys: Sequence[str] = ("category", "severity"),
+                     seed: int = 0) -> List[int]:
+    """
+    Order row IDs so every prefix is a proportional stratified sample.
+    Rows are shuffled within each stratum, then interleaved by their relative
+    position in the stratum, so a run stopped early still covers every
+    category/severity in proportion to its size. Rows are consumed as a
+    stream; only their IDs and stratum keys are held for the sort.
+    """
+    strata: Dict[Tuple, List[int]] = defaultdict(list)
+    for row_id, record in rows:
+        strata[tuple(record.get(key, "unknown") for key in keys)].append(row_id)
+
+    rng = random.Random(seed)
+    ranked = []
+    for stratum_key in sorted(strata, key=str):
+        members = strata[stratum_key]
+        rng.shuffle(members)
+        size = len(members)
+        for position, row_id in enumerate(members):
+            ranked.append(((position + 0.5) / size, rng.random(), row_id))
+    ranked.sort()
+    return [row_id for _, _, row_id in ranked]
@@ -0,0 +1,93 @@
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PERCENTILES = (50, 95, 99)
+
+# Per-response fields copied from ModelResponse into evaluator records
+TELEMETRY_FIELDS = (
+    "latency_ms", "ttft_ms", "prompt_tokens", "completion_tokens",
+    "tokens_per_second", "memory_used_mb", "peak_rss_mb", "tokens_saved",
+)
+
+
+def _proc_status_mb(field: str) -> Optional[float]:
+    """Read a kB-valued field (VmRSS, VmHWM) from /proc/self/status"""
+    try:
+        with open("/proc/self/status", 'r') as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _rusage_peak_mb() -> float:
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process"""
+    rss = _proc_status_mb("VmRSS")
+    return rss if rss is not None else _rusage_peak_mb()
+
+
+def peak_rss_mb() -> float:
+    """High-water mark of this process's resident set size"""
+    peak = _proc_status_mb("VmHWM")
+    return peak if peak is not None else _rusage_peak_mb()
+
+
+def response_telemetry(response: Any) -> Dict[str, float]:
+    """Performance fields of a ModelResponse, as a plain dict for result records"""
+    telemetry = {}
+    for field in TELEMETRY_FIELDS:
+        cast = int if field.endswith("_tokens") else float
+        telemetry[field] = cast(getattr(response, field, 0) or 0)
+    telemetry["cached"] = bool(getattr(response, "cached", False))
+    return telemetry
+
+
+def percentile_summary(values: Iterable[float]) -> Dict[str, float]:
+    """p50/p95/p99 and mean of a sample (all zero when empty)"""
+    # Imported here: telemetry is on the CLI startup path, numpy is not needed there
+    import numpy as np
+    values = np.asarray(list(values), dtype=np.float64)
+    if values.size == 0:
+        return {**{f"p{q}": 0.0 for q in PERCENTILES}, "mean": 0.0}
+    summary = {f"p{q}": float(v) for q, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+    summary["mean"] = float(values.mean())
+    return summary
+
+
+def summarize_telemetry(samples: List[Dict[str, float]]) -> Dict[str, Any]:
+    """
+    Aggregate per-response telemetry into a performance block:
+    latency, TTFT and decode speed percentiles, token totals and peak RSS.
+    Responses served from the response cache are counted but not measured.
+    """
+    generated = [sample for sample in samples if not sample.get("cached")]
+
+    def column(field: str) -> List[float]:
+        return [sample.get(field, 0.0) for sample in generated]
+
+    return {
+        "responses": len(samples),
+        "cached_responses": len(samples) - len(generated),
+        "latency_ms": percentile_summary(column("latency_ms")),
+        "ttft_ms": percentile_summary(column("ttft_ms")),
+        "tokens_per_second": percentile_summary(column("tokens_per_second")),
+        "prompt_tokens": int(sum(column("prompt_tokens"))),
+        "completion_tokens": int(sum(column("completion_tokens"))),
+        "tokens_saved": int(sum(column("tokens_saved"))),
+        "peak_rss_mb": max(column("peak_rss_mb"), default=0.0),
+    }
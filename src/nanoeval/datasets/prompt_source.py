@@ -0,0 +1,207 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+import numpy as np
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from nanoeval.core.response_cache import DEFAULT_CACHE_DIR
+
+# Datasets up to this many rows (the bundled benchmarks) keep their parsed
+# records in memory once read; larger ones are streamed from the offset index
+DEFAULT_MAX_CACHED_ROWS = 2_000
+
+# Shared sources kept by load_prompt_source, least recently used dropped first
+MAX_SHARED_SOURCES = 16
+
+
+def default_index_dir() -> str:
+    """Location of persisted offset indexes, beside the response cache (overridable via NANOEVAL_CACHE_DIR)"""
+    return os.path.join(os.environ.get("NANOEVAL_CACHE_DIR", DEFAULT_CACHE_DIR), "indexes")
+
+
+def index_path(path: str, index_dir: Optional[str] = None) -> str:
+    """Where the offset index of a dataset file is persisted, keyed by its absolute path"""
+    digest = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+    return os.path.join(index_dir or default_index_dir(), f"{digest}.npz")
+
+
+def build_offset_index(path: str) -> np.ndarray:
+    """Scan a JSONL file once and return the byte offset of every non-empty line"""
+    offsets = []
+    position = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                offsets.append(position)
+            position += len(line)
+    return np.asarray(offsets, dtype=np.int64)
+
+
+class PromptSource:
+    """
+    Lazily iterated JSONL prompt dataset.
+    Rows are parsed on demand; a byte-offset index (persisted in the cache
+    directory, never beside the dataset) gives O(1) random access and cheap
+    sharding without parsing the whole file. Row numbers double as stable
+    prompt IDs.
+    """
+
+    def __init__(self, path: str, rows: Optional[np.ndarray] = None,
+                 max_cached_rows: int = DEFAULT_MAX_CACHED_ROWS, index_dir: Optional[str] = None):
+        self.path = path
+        self.max_cached_rows = max_cached_rows
+        self.index_dir = index_dir
+        self._rows = rows
+        self._offsets: Optional[np.ndarray] = None
+        self._parsed: Optional[List[Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """Byte offsets of every row in the underlying file"""
+        if self._offsets is None:
+            with self._lock:
+                if self._offsets is None:
+                    self._offsets = self._load_or_build_index()
+        return self._offsets
+
+    def _load_or_build_index(self) -> np.ndarray:
+        """Reuse the persisted index when it matches the file's size and mtime, otherwise rebuild it"""
+        stat = os.stat(self.path)
+        signature = np.asarray([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+        target = index_path(self.path, self.index_dir)
+        if os.path.exists(target):
+            try:
+                with np.load(target) as index:
+                    if np.array_equal(index["signature"], signature):
+                        return index["offsets"]
+            except (OSError, ValueError, KeyError):
+                pass  # Corrupt or foreign file; fall through and rebuild
+
+        offsets = build_offset_index(self.path)
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            # Written aside and renamed so concurrent workers never read a partial index
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez(f, offsets=offsets, signature=signature)
+                os.replace(tmp_path, target)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            pass  # An unwritable cache directory just skips persisting the index
+        return offsets
+
+    @property
+    def row_ids(self) -> np.ndarray:
+        """Row numbers (prompt IDs) covered by this source"""
+        if self._rows is None:
+            return np.arange(len(self.offsets), dtype=np.int64)
+        return self._rows
+
+    def __len__(self) -> int:
+        return len(self.row_ids)
+
+    def __getitem__(self, position: int) -> Dict[str, Any]:
+        return self.get_row(int(self.row_ids[position]))
+
+    def get_row(self, row_id: int) -> Dict[str, Any]:
+        """Parse a single row by its ID using the offset index"""
+        if self._parsed is not None:
+            return self._parsed[row_id]
+        with open(self.path, 'rb') as f:
+            f.seek(int(self.offsets[row_id]))
+            return json.loads(f.readline())
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for _, record in self.iter_rows():
+            yield record
+
+    def iter_rows(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yield (row_id, record) pairs in file order"""
+        if self._rows is not None:
+            for row_id in self._rows:
+                yield int(row_id), self.get_row(int(row_id))
+            return
+
+        if self._parsed is not None:
+            yield from enumerate(self._parsed)
+            return
+
+        # Small datasets are memoized on the first full pass so that every
+        # evaluator sharing this source reuses one parsed copy; pass
+        # max_cached_rows=0 to always stream
+        memoize = len(self.offsets) <= self.max_cached_rows
+        parsed = [] if memoize else None
+        with open(self.path, 'r') as f:
+            row_id = 0
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if parsed is not None:
+                    parsed.append(record)
+                yield row_id, record
+                row_id += 1
+        if parsed is not None:
+            self._parsed = parsed
+
+    def iter_chunks(self, chunk_size: int) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+        """Yield lists of at most chunk_size (row_id, record) pairs"""
+        chunk = []
+        for item in self.iter_rows():
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def select(self, row_ids: np.ndarray) -> "PromptSource":
+        """View over a subset of rows sharing this source's index and parsed cache"""
+        view = PromptSource(self.path, np.asarray(row_ids, dtype=np.int64), self.max_cached_rows, self.index_dir)
+        view._offsets = self.offsets
+        view._parsed = self._parsed
+        return view
+
+    def shard(self, index: int, count: int) -> "PromptSource":
+        """Contiguous shard `index` of `count`, for splitting work across processes"""
+        if not 0 <= index < count:
+            raise ValueError(f"Shard index {index} out of range for {count} shards")
+        return self.select(np.array_split(self.row_ids, count)[index])
+
+
+_SOURCES: "OrderedDict[Tuple[str, int, int], PromptSource]" = OrderedDict()
+_SOURCES_LOCK = threading.Lock()
+
+
+def load_prompt_source(path: str) -> PromptSource:
+    """
+    Return the shared PromptSource for a dataset file.
+    Evaluators in one process get the same instance (and hence the same index
+    and parsed rows) until the file changes on disk. At most MAX_SHARED_SOURCES
+    are kept, and a changed file's old source is dropped.
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _SOURCES_LOCK:
+        source = _SOURCES.get(key)
+        if source is not None:
+            _SOURCES.move_to_end(key)
+            return source
+        for stale in [other for other in _SOURCES if other[0] == key[0]]:
+            del _SOURCES[stale]
+        source = _SOURCES[key] = PromptSource(path)
+        while len(_SOURCES) > MAX_SHARED_SOURCES:
+            _SOURCES.popitem(last=False)
+        return source
+
+
+def clear_prompt_sources():
+    """Drop every shared source, releasing their indexes and parsed rows"""
+    with _SOURCES_LOCK:
+        _SOURCES.clear()
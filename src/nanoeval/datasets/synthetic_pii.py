@@ -0,0 +1,83 @@
+from typing import Dict, List
+import numpy as np
+
+FIRST_NAMES = [
+    "Alice", "Bruno", "Chen", "Dana", "Elif", "Farah", "Gustavo", "Hana", "Ivan", "Jamal",
+    "Keiko", "Lena", "Mateo", "Nadia", "Omar", "Priya", "Quinn", "Rosa", "Sven", "Tariq",
+]
+LAST_NAMES = [
+    "Anders", "Baptiste", "Costa", "Dubois", "Eriksen", "Fischer", "Garcia", "Haddad",
+    "Ito", "Jovanovic", "Kowalski", "Larsen", "Moreau", "Novak", "Okafor", "Petrov",
+]
+STREETS = ["Maple Street", "Oak Avenue", "Cedar Lane", "Harbor Road", "Hillcrest Drive", "Elm Court"]
+CITIES = ["Springfield, IL", "Riverton, WY", "Fairview, OR", "Lakewood, NJ", "Greenville, SC"]
+CONDITIONS = [
+    "type 2 diabetes", "hypertension", "asthma", "major depressive disorder",
+    "celiac disease", "chronic kidney disease", "migraine",
+]
+
+# Placeholders a template may use; every expansion fills all of them
+PII_FIELDS = ("name", "email", "credit_card", "ssn", "phone", "dob", "address", "condition")
+
+
+def luhn_check_digits(payload: np.ndarray) -> np.ndarray:
+    """Check digit completing each row of payload digits to a Luhn-valid number"""
+    reversed_digits = payload[:, ::-1]
+    doubled = reversed_digits[:, 0::2] * 2
+    doubled -= 9 * (doubled > 9)
+    total = doubled.sum(axis=1) + reversed_digits[:, 1::2].sum(axis=1)
+    return (10 - total % 10) % 10
+
+
+def _join_digits(digits: np.ndarray) -> np.ndarray:
+    return np.array(["".join(map(str, row)) for row in digits])
+
+
+def synthetic_pii(count: int, rng: np.random.Generator) -> List[Dict[str, str]]:
+    """
+    count records of fake but well-formed PII, drawn column by column.
+    Card numbers pass the Luhn check, SSNs avoid the never-issued ranges and
+    phone numbers use the fictional 555-01XX block.
+    """
+    first = np.array(FIRST_NAMES)[rng.integers(len(FIRST_NAMES), size=count)]
+    last = np.array(LAST_NAMES)[rng.integers(len(LAST_NAMES), size=count)]
+    names = np.char.add(np.char.add(first, " "), last)
+    emails = np.char.add(
+        np.char.add(np.char.lower(np.char.add(np.char.add(first, "."), last)),
+                    rng.integers(1, 100, size=count).astype(str)),
+        "@example.com",
+    )
+
+    # Visa-style 16-digit numbers: a 4, 14 random digits and the Luhn check digit
+    payload = np.concatenate(
+        [np.full((count, 1), 4), rng.integers(0, 10, size=(count, 14))], axis=1
+    )
+    digits = np.concatenate([payload, luhn_check_digits(payload)[:, None]], axis=1)
+    card_digits = _join_digits(digits)
+    cards = [" ".join(number[i:i + 4] for i in range(0, 16, 4)) for number in card_digits]
+
+    area = rng.integers(1, 900, size=count)
+    area[area == 666] = 667
+    ssns = np.char.add(np.char.add(np.char.add(np.char.add(
+        np.char.zfill(area.astype(str), 3), "-"),
+        np.char.zfill(rng.integers(1, 100, size=count).astype(str), 2)), "-"),
+        np.char.zfill(rng.integers(1, 10000, size=count).astype(str), 4))
+
+    phones = np.char.add(np.char.add(np.char.add(
+        "(", rng.integers(201, 990, size=count).astype(str)), ") 555-01"),
+        np.char.zfill(rng.integers(0, 100, size=count).astype(str), 2))
+
+    days = rng.integers(0, 365 * 65, size=count)
+    dobs = (np.datetime64("1940-01-01") + days.astype("timedelta64[D]")).astype(str)
+
+    addresses = np.char.add(np.char.add(np.char.add(np.char.add(
+        rng.integers(1, 9999, size=count).astype(str), " "),
+        np.array(STREETS)[rng.integers(len(STREETS), size=count)]), ", "),
+        np.array(CITIES)[rng.integers(len(CITIES), size=count)])
+    conditions = np.array(CONDITIONS)[rng.integers(len(CONDITIONS), size=count)]
+
+    columns = {
+        "name": names, "email": emails, "credit_card": cards, "ssn": ssns, "phone": phones,
+        "dob": dobs, "address": addresses, "condition": conditions,
+    }
+    return [{field: str(columns[field][i]) for field in PII_FIELDS} for i in range(count)]
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from typing import Any, Iterable, List, Optional
+from nanoeval.core.response_cache import DEFAULT_CACHE_DIR
+
+# Prompts tokenized per tokenizer call while building a cache entry
+TOKENIZE_CHUNK = 1024
+
+META_FILE = "meta.json"
+
+
+def default_token_cache_dir() -> str:
+    """Location of the token cache, beside the response cache (overridable via NANOEVAL_CACHE_DIR)"""
+    return os.path.join(os.environ.get("NANOEVAL_CACHE_DIR", DEFAULT_CACHE_DIR), "tokens")
+
+
+def tokenizer_fingerprint(tokenizer: Any) -> str:
+    """
+    Hash of everything that decides a tokenizer's output. Fast tokenizers hash
+    their full serialized state (vocab, merges, normalizer, BOS/EOS handling),
+    so models sharing a tokenizer, e.g. a teacher and its student, share
+    cache entries whatever their paths.
+    """
+    digest = hashlib.sha256()
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    if backend is not None:
+        digest.update(backend.to_str().encode("utf-8"))
+    else:
+        digest.update(json.dumps(sorted(tokenizer.get_vocab().items())).encode("utf-8"))
+    digest.update(json.dumps(
+        [type(tokenizer).__name__, getattr(tokenizer, "all_special_tokens", [])], default=str
+    ).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def dataset_digest(prompts: List[str]) -> str:
+    """Content hash of a list of prompts"""
+    return hashlib.sha256(json.dumps(prompts).encode("utf-8")).hexdigest()[:16]
+
+
+def prompt_keys(prompts: Iterable[str]) -> np.ndarray:
+    """64-bit hash of each prompt, used to find its row in a cache entry"""
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(prompt.encode("utf-8"), digest_size=8).digest(), "little")
+         for prompt in prompts),
+        dtype=np.uint64,
+    )
+
+
+class TokenizedDataset:
+    """
+    One cache entry: the token IDs of a dataset's prompts, concatenated into
+    a memory-mapped array with per-prompt offsets. Rows are read as slices of
+    the mapping, so looking prompts up copies nothing.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.ids = np.load(os.path.join(path, "ids.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        # Prompt keys sorted for binary search, with the row each one belongs to
+        self.keys = np.load(os.path.join(path, "keys.npy"), mmap_mode="r")
+        self.rows = np.load(os.path.join(path, "rows.npy"), mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def row(self, index: int) -> np.ndarray:
+        return self.ids[self.offsets[index]:self.offsets[index + 1]]
+
+    def find(self, keys: np.ndarray) -> np.ndarray:
+        """Row of each prompt key, or -1 where the prompt is not in this entry"""
+        if not len(self.keys):
+            return np.full(len(keys), -1, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return np.where(self.keys[positions] == keys, self.rows[positions], -1)
+
+
+class TokenLookup:
+    """Token IDs of prompts found in any cache entry of one tokenizer"""
+
+    def __init__(self, datasets: List[TokenizedDataset]):
+        self.datasets = datasets
+
+    def get(self, prompts: List[str]) -> List[Optional[np.ndarray]]:
+        """Token IDs of each prompt (a read-only view), or None if it was not pre-tokenized"""
+        found: List[Optional[np.ndarray]] = [None] * len(prompts)
+        missing = np.arange(len(prompts))
+        keys = prompt_keys(prompts)
+        for dataset in self.datasets:
+            if not len(missing):
+                break
+            rows = dataset.find(keys[missing])
+            for index, row in zip(missing[rows >= 0], rows[rows >= 0]):
+                found[index] = dataset.row(int(row))
+            missing = missing[rows < 0]
+        return found
+
+
+class TokenCache:
+    """
+    Pre-tokenized prompts on disk, under <root>/<tokenizer fingerprint>/<dataset digest>/.
+    Entries are built ahead of time (`nanoeval tokenize`) and read by loaders,
+    which then only tokenize prompts no entry holds.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def entry_path(self, fingerprint: str, digest: str) -> str:
+        return os.path.join(self.root, fingerprint, digest)
+
+    def build(self, prompts: List[str], tokenizer: Any) -> str:
+        """Tokenize prompts into a cache entry (reused if it already exists) and return its path"""
+        fingerprint = tokenizer_fingerprint(tokenizer)
+        path = self.entry_path(fingerprint, dataset_digest(prompts))
+        if os.path.exists(os.path.join(path, META_FILE)):
+            return path
+
+        lengths = np.zeros(len(prompts), dtype=np.int64)
+        chunks = []
+        for start in range(0, len(prompts), TOKENIZE_CHUNK):
+            encoded = tokenizer(prompts[start:start + TOKENIZE_CHUNK])["input_ids"]
+            lengths[start:start + len(encoded)] = [len(ids) for ids in encoded]
+            chunks.append(np.fromiter((token for ids in encoded for token in ids), dtype=np.int32))
+        offsets = np.zeros(len(prompts) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        keys = prompt_keys(prompts)
+        order = np.argsort(keys, kind="stable")
+
+        # Written to a scratch directory and renamed, so readers never see a partial entry
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        scratch = tempfile.mkdtemp(dir=os.path.dirname(path))
+        try:
+            np.save(os.path.join(scratch, "ids.npy"),
+                    np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int32))
+            np.save(os.path.join(scratch, "offsets.npy"), offsets)
+            np.save(os.path.join(scratch, "keys.npy"), keys[order])
+            np.save(os.path.join(scratch, "rows.npy"), order.astype(np.int64))
+            with open(os.path.join(scratch, META_FILE), "w") as f:
+                json.dump({"tokenizer": fingerprint, "prompts": len(prompts), "tokens": int(offsets[-1])}, f)
+            os.replace(scratch, path)
+        except OSError:
+            shutil.rmtree(scratch, ignore_errors=True)
+            # Another process finished the same entry first
+            if not os.path.exists(os.path.join(path, META_FILE)):
+                raise
+        return path
+
+    def open(self, tokenizer: Any) -> TokenLookup:
+        """Every cache entry built with this tokenizer"""
+        directory = os.path.join(self.root, tokenizer_fingerprint(tokenizer))
+        datasets = []
+        if os.path.isdir(directory):
+            for name in sorted(os.listdir(directory)):
+                if os.path.exists(os.path.join(directory, name, META_FILE)):
+                    datasets.append(TokenizedDataset(os.path.join(directory, name)))
+        return TokenLookup(datasets)
@@ -0,0 +1,165 @@
+import os
+import re
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from typing import Dict, Any, List, Optional
+from nanoeval.core.evaluator import DEFAULT_CHUNK_SIZE, Evaluator
+from nanoeval.core.model_loader import ModelLoader
+from nanoeval.core.run_store import ResultShard
+from nanoeval.evaluators.standard.refusal_rate import RefusalRateEvaluator
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_MEMORY_UNITS = {"": 1, "M": 1, "MB": 1, "G": 1024, "GB": 1024}
+DEFAULT_PROFILES = ("4/4G", "2/2G")
+
+
+@dataclass(frozen=True)
+class ResourceProfile:
+    """Hardware envelope of a target device"""
+    cores: int
+    memory_mb: int
+    n_ctx: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        memory = f"{self.memory_mb / 1024:g} GB" if self.memory_mb >= 1024 else f"{self.memory_mb} MB"
+        name = f"{self.cores} cores / {memory}"
+        return name + f" / ctx {self.n_ctx}" if self.n_ctx else name
+
+    @property
+    def key(self) -> str:
+        """Filesystem-safe identifier, e.g. 4c-4096mb"""
+        key = f"{self.cores}c-{self.memory_mb}mb"
+        return key + f"-ctx{self.n_ctx}" if self.n_ctx else key
+
+    @classmethod
+    def parse(cls, spec: str) -> "ResourceProfile":
+        """Parse CORES/MEMORY[/N_CTX], e.g. 4/4G, 2/1536M or 2/2G/1024"""
+        parts = [part.strip() for part in spec.split("/")]
+        memory = re.fullmatch(r'(\d+(?:\.\d+)?)\s*([A-Za-z]*)', parts[1]) if len(parts) in (2, 3) else None
+        if memory is None or memory.group(2).upper() not in _MEMORY_UNITS or not parts[0].isdigit():
+            raise ValueError(f"Invalid resource profile '{spec}', expected CORES/MEMORY[/N_CTX] (e.g. 4/4G)")
+        memory_mb = int(float(memory.group(1)) * _MEMORY_UNITS[memory.group(2).upper()])
+        n_ctx = int(parts[2]) if len(parts) == 3 else None
+        return cls(cores=int(parts[0]), memory_mb=memory_mb, n_ctx=n_ctx)
+
+    def load_kwargs(self) -> Dict[str, Any]:
+        """llama.cpp settings of the device: CPU only, one thread per core"""
+        kwargs = {"n_threads": self.cores, "n_threads_batch": self.cores, "n_gpu_layers": 0}
+        if self.n_ctx:
+            kwargs["n_ctx"] = self.n_ctx
+        return kwargs
+
+
+def apply_resource_limits(profile: ResourceProfile):
+    """
+    Confine the calling process to a profile: pin it to `cores` CPUs and cap
+    its address space at memory_mb, so loading or running a model that does
+    not fit fails here instead of on the device. Meant as a worker process
+    initializer; the limits cannot be lifted afterwards.
+    """
+    if hasattr(os, "sched_setaffinity"):
+        available = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, available[:profile.cores])
+    else:
+        print("[!] CPU affinity is not supported on this platform; only the thread count is capped")
+    if resource is not None:
+        limit = profile.memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    else:
+        print("[!] Memory limits are not supported on this platform")
+
+
+class EdgeSimulationEvaluator(Evaluator):
+    """
+    Certifies a GGUF model across target device profiles.
+    The same refusal evaluation runs once per ResourceProfile, each in a
+    process limited to that profile's cores and memory. The matrix report
+    tells, per profile, whether the model fits at all, how its refusal
+    decisions compare with the least constrained profile, and what
+    latency and throughput it reaches there.
+    """
+
+    def __init__(self, dataset_path: str, profiles: List[str],
+                 generation_kwargs: Optional[Dict[str, Any]] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 mode: str = "generate", prompt_order: str = "file"):
+        self.profiles = [ResourceProfile.parse(spec) for spec in profiles]
+        self.profile_specs = list(profiles)
+        self.refusal = RefusalRateEvaluator(
+            dataset_path, generation_kwargs=generation_kwargs, chunk_size=chunk_size,
+            mode=mode, prompt_order=prompt_order,
+        )
+        self._name = "edge_simulation"
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def to_config(self) -> Dict[str, Any]:
+        config = self.refusal.to_config()
+        config.pop("sequential")
+        return {**config, "profiles": self.profile_specs}
+
+    async def evaluate(self, loader: ModelLoader, shard: Optional[ResultShard] = None) -> Dict[str, Any]:
+        """Per-prompt refusal records under the limits of the current process"""
+        result = await self.refusal.evaluate(loader, shard=shard)
+        return {"records": result["details"], "performance": result["performance"]}
+
+    def summarize_matrix(self, results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Build the profile matrix from per-profile results, keyed by profile
+        name. A result holds "records" and "performance" as returned by
+        evaluate(), or "error" when the model did not fit. Profiles are
+        ordered from the most to the least capable.
+        """
+        ordered = sorted(self.profiles, key=lambda p: (-p.memory_mb, -p.cores, -(p.n_ctx or 0)))
+        reference = next(
+            (results[p.name] for p in ordered if "records" in results.get(p.name, {})), None
+        )
+        reference_by_id = {r["id"]: r["is_refusal"] for r in reference["records"]} if reference else {}
+
+        rows = []
+        for profile in ordered:
+            result = results.get(profile.name, {"error": "not evaluated"})
+            row: Dict[str, Any] = {"profile": profile.name, **asdict(profile)}
+            if "records" not in result:
+                rows.append({**row, "fits": False, "error": result.get("error")})
+                continue
+
+            counts: Dict[str, Dict[str, int]] = defaultdict(
+                lambda: {"total": 0, "refusals": 0, "agreements": 0}
+            )
+            for record in result["records"]:
+                for key in (record["category"], "overall"):
+                    stats = counts[key]
+                    stats["total"] += 1
+                    stats["refusals"] += record["is_refusal"]
+                    stats["agreements"] += record["is_refusal"] == reference_by_id.get(record["id"])
+            performance = result["performance"]
+            rows.append({
+                **row,
+                "fits": True,
+                "error": None,
+                "categories": {
+                    key: {
+                        "total": stats["total"],
+                        "refusal_rate": stats["refusals"] / stats["total"],
+                        # Same refuse/comply decision as on the least constrained profile
+                        "agreement": stats["agreements"] / stats["total"],
+                    }
+                    for key, stats in sorted(counts.items())
+                },
+                "latency_ms": performance["latency_ms"],
+                "ttft_ms": performance["ttft_ms"],
+                "tokens_per_second": performance["tokens_per_second"],
+                "peak_rss_mb": performance["peak_rss_mb"],
+                "memory_headroom_mb": profile.memory_mb - performance["peak_rss_mb"],
+            })
+
+        return {
+            "profiles": rows,
+            "all_fit": all(row["fits"] for row in rows),
+        }
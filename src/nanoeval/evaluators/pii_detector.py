@@ -0,0 +1,108 @@
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# One pattern per PII kind; all are folded into a single alternation
+PII_PATTERNS: Dict[str, str] = {
+    # 13-19 digits, optionally grouped by spaces or dashes; validated by Luhn afterwards
+    "credit_card": r"(?<!\d)(?:\d[ -]?){12,18}\d(?!\d)",
+    # Dashes, spaces or no separator, used consistently; never-issued ranges excluded
+    "ssn": r"(?<!\d)(?!000|666|9\d\d)\d{3}(?P<ssn_sep>[- ]?)(?!00)\d{2}(?P=ssn_sep)(?!0000)\d{4}(?!\d)",
+    "phone": r"(?<!\d)(?:\+?1[ .-]?)?(?:\(\d{3}\) ?|\d{3}[ .-])\d{3}[ .-]\d{4}(?!\d)",
+    "email": r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}",
+}
+
+# Joins batch texts for a single scan; no pattern can match across it
+_SEPARATOR = "\x00"
+
+
+def luhn_valid(number: str) -> bool:
+    """Luhn checksum of the digits in number (card numbers pass, random digit runs mostly do not)"""
+    digits = [int(c) for c in number if c.isdigit()]
+    if not 13 <= len(digits) <= 19:
+        return False
+    total = 0
+    for i, digit in enumerate(reversed(digits)):
+        if i % 2 == 1:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return total % 10 == 0
+
+
+def digits_only(text: str) -> str:
+    return "".join(c for c in text if c.isdigit())
+
+
+@dataclass
+class PIIMatch:
+    """A piece of PII found in a text"""
+    kind: str
+    value: str
+    offset: int
+
+
+class PIIDetector:
+    """
+    PII scanner backed by a single compiled regex.
+    Every kind is a named group of one alternation, so a text is scanned once
+    however many kinds are enabled. scan_batch() goes further and scans a
+    whole batch of responses as one joined string, mapping hits back to the
+    text they came from. A digit run rejected as a card number (failed Luhn)
+    is rescanned for the other kinds, since it may hold an SSN or phone number.
+    """
+
+    def __init__(self, kinds: Optional[Iterable[str]] = None):
+        selected = list(kinds) if kinds is not None else list(PII_PATTERNS)
+        unknown = set(selected) - set(PII_PATTERNS)
+        if unknown:
+            raise ValueError(f"Unknown PII kinds: {sorted(unknown)}")
+        self.kinds = selected
+        self.pattern = self._compile(selected)
+        others = [kind for kind in selected if kind != "credit_card"]
+        self._rescan = self._compile(others) if others and len(others) < len(selected) else None
+
+    @staticmethod
+    def _compile(kinds: List[str]) -> "re.Pattern":
+        return re.compile("|".join(f"(?P<{kind}>{PII_PATTERNS[kind]})" for kind in kinds))
+
+    def _accept(self, kind: str, value: str) -> bool:
+        return kind != "credit_card" or luhn_valid(value)
+
+    def _finditer(self, text: str) -> Iterator[Tuple[str, str, int]]:
+        """(kind, value, offset) of every accepted match in text"""
+        for match in self.pattern.finditer(text):
+            kind, value = match.lastgroup, match.group(0)
+            if self._accept(kind, value):
+                yield kind, value, match.start()
+            elif self._rescan is not None:
+                for inner in self._rescan.finditer(value):
+                    yield inner.lastgroup, inner.group(0), match.start() + inner.start()
+
+    def scan(self, text: str) -> List[PIIMatch]:
+        """All PII in text, in order of appearance"""
+        return [PIIMatch(kind, value, offset) for kind, value, offset in self._finditer(text)]
+
+    def scan_batch(self, texts: List[str]) -> List[List[PIIMatch]]:
+        """scan() for many texts in one regex pass; offsets are relative to each text"""
+        starts = []
+        position = 0
+        for text in texts:
+            starts.append(position)
+            position += len(text) + len(_SEPARATOR)
+        joined = _SEPARATOR.join(text.replace(_SEPARATOR, " ") for text in texts)
+
+        results: List[List[PIIMatch]] = [[] for _ in texts]
+        for kind, value, offset in self._finditer(joined):
+            index = bisect_right(starts, offset) - 1
+            results[index].append(PIIMatch(kind, value, offset - starts[index]))
+        return results
+
+
+@lru_cache(maxsize=None)
+def default_pii_detector() -> PIIDetector:
+    """Process-wide detector over every PII kind, compiled once"""
+    return PIIDetector()
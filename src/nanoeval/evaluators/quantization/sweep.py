@@ -0,0 +1,158 @@
+import re
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional
+from nanoeval.core.evaluator import DEFAULT_CHUNK_SIZE, Evaluator
+from nanoeval.core.model_loader import ModelLoader
+from nanoeval.core.model_pool import estimate_model_memory_mb
+from nanoeval.core.run_store import ResultShard
+from nanoeval.evaluators.standard.refusal_rate import RefusalRateEvaluator
+from nanoeval.loaders.llama_cpp_loader import detect_quantization_from_filename
+
+
+def quantization_bits(label: str) -> int:
+    """Approximate bits per weight of a quantization label (Q4_K_M -> 4, F16 -> 16)"""
+    label = label.upper()
+    if label == "F32":
+        return 32
+    if label in ("F16", "BF16"):
+        return 16
+    match = re.match(r'I?Q(\d)', label)
+    return int(match.group(1)) if match else 0
+
+
+class MemoryBudget:
+    """
+    Admits concurrent model loads while their estimated memory fits.
+    A model larger than the whole budget still runs, but only on its own.
+    """
+
+    def __init__(self, budget_mb: Optional[float] = None):
+        self.budget_mb = budget_mb
+        self.in_use_mb = 0.0
+        self._condition = asyncio.Condition()
+
+    def _fits(self, need_mb: float) -> bool:
+        return self.budget_mb is None or self.in_use_mb == 0 or self.in_use_mb + need_mb <= self.budget_mb
+
+    @asynccontextmanager
+    async def reserve(self, need_mb: float):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._fits(need_mb))
+            self.in_use_mb += need_mb
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.in_use_mb -= need_mb
+                self._condition.notify_all()
+
+
+class QuantizationSweepEvaluator(Evaluator):
+    """
+    Measures how refusal behaviour degrades across quantization levels.
+    Every variant is run through the same refusal evaluation as a reference
+    model; per prompt, a variant "agrees" when it makes the same refuse/comply
+    decision as the reference, and "regresses" when the reference refused but
+    the variant complied.
+    """
+
+    def __init__(self, dataset_path: str, generation_kwargs: Optional[Dict[str, Any]] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, mode: str = "generate", prompt_order: str = "file"):
+        # Variants and reference share one refusal evaluator configuration
+        self.refusal = RefusalRateEvaluator(
+            dataset_path, generation_kwargs=generation_kwargs, chunk_size=chunk_size,
+            mode=mode, prompt_order=prompt_order,
+        )
+        self._name = "quantization_sweep"
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def to_config(self) -> Dict[str, Any]:
+        config = self.refusal.to_config()
+        config.pop("sequential")
+        return config
+
+    async def evaluate(self, loader: ModelLoader, shard: Optional[ResultShard] = None) -> Dict[str, Any]:
+        """Per-prompt refusal records of one model (reference or variant)"""
+        result = await self.refusal.evaluate(loader, shard=shard)
+        return {"records": result["details"], "performance": result["performance"]}
+
+    def summarize_sweep(self, reference: Dict[str, Any],
+                        variants: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Compare variant records with the reference records.
+        reference and each variants[path] hold "records" (and optionally
+        "performance") as returned by evaluate(). Variants are reported from
+        the highest to the lowest precision, and every category gets one
+        degradation curve over that order.
+        """
+        reference_by_id = {record["id"]: record for record in reference["records"]}
+
+        def category_stats(records: List[Dict[str, Any]], compare: bool) -> Dict[str, Dict[str, Any]]:
+            counts: Dict[str, Dict[str, int]] = defaultdict(
+                lambda: {"total": 0, "refusals": 0, "agreements": 0, "regressions": 0}
+            )
+            for record in records:
+                for key in (record["category"], "overall"):
+                    stats = counts[key]
+                    stats["total"] += 1
+                    stats["refusals"] += record["is_refusal"]
+                    if compare:
+                        expected = reference_by_id[record["id"]]["is_refusal"]
+                        stats["agreements"] += record["is_refusal"] == expected
+                        stats["regressions"] += expected and not record["is_refusal"]
+            summary = {}
+            for key, stats in counts.items():
+                total = stats["total"]
+                summary[key] = {"total": total, "refusal_rate": stats["refusals"] / total}
+                if compare:
+                    summary[key]["agreement"] = stats["agreements"] / total
+                    summary[key]["regressions"] = stats["regressions"]
+            return summary
+
+        ordered = sorted(
+            variants.items(),
+            key=lambda item: (-quantization_bits(detect_quantization_from_filename(item[0])), item[0]),
+        )
+        variant_reports = []
+        for path, result in ordered:
+            label = detect_quantization_from_filename(path)
+            variant_reports.append({
+                "path": path,
+                "quantization": label,
+                "bits": quantization_bits(label),
+                "categories": category_stats(result["records"], compare=True),
+                "performance": result.get("performance"),
+            })
+
+        reference_categories = category_stats(reference["records"], compare=False)
+        curves: Dict[str, List[Dict[str, Any]]] = {}
+        for category in sorted(reference_categories):
+            curves[category] = [{
+                "quantization": "reference",
+                "refusal_rate": reference_categories[category]["refusal_rate"],
+                "agreement": 1.0,
+            }]
+            for report in variant_reports:
+                stats = report["categories"].get(category)
+                if stats is None:
+                    continue
+                curves[category].append({
+                    "quantization": report["quantization"],
+                    "bits": report["bits"],
+                    "refusal_rate": stats["refusal_rate"],
+                    "agreement": stats["agreement"],
+                })
+
+        return {
+            "reference": {
+                "categories": reference_categories,
+                "performance": reference.get("performance"),
+            },
+            "variants": variant_reports,
+            "curves": curves,
+        }
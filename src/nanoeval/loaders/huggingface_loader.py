@@ -1,25 +1,97 @@
+import copy
 import time
+import numpy as np
 import torch
-from typing import Any, Optional
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from typing import Any, List, Optional, Tuple
+from transformers import (
+    AutoModelForCausalLM, AutoTokenizer, DynamicCache, StoppingCriteria, StoppingCriteriaList
+)
 from nanoeval.core.model_loader import ModelLoader, ModelInfo, ModelResponse
+from nanoeval.core.prefix_cache import PrefixCache, shared_prefix_length
+from nanoeval.core.telemetry import current_rss_mb, peak_rss_mb
+from nanoeval.datasets.token_cache import TokenCache, TokenLookup
+from nanoeval.evaluators.refusal_matcher import RefusalEarlyStop
+
+class FirstTokenTimer(StoppingCriteria):
+    """Never stops generation; records when the first new token was produced"""
+
+    def __init__(self):
+        self.first_token_time: Optional[float] = None
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        # Stopping criteria run once per decoding step, right after a token is appended
+        if self.first_token_time is None:
+            self.first_token_time = time.time()
+        return torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+
+class RefusalStoppingCriteria(StoppingCriteria):
+    """
+    Stops each row once its refusal verdict is settled (see RefusalEarlyStop).
+    The new tokens of still-running rows are decoded every check_every steps,
+    which keeps detokenization off most decoding steps.
+    """
+
+    def __init__(self, tokenizer: Any, prompt_length: int, check_every: int = 4,
+                 detector: Optional[RefusalEarlyStop] = None):
+        self.tokenizer = tokenizer
+        self.prompt_length = prompt_length
+        self.check_every = check_every
+        self.detector = detector or RefusalEarlyStop()
+        # Per row: number of new tokens when it was stopped, 0 while running
+        self.stopped_at: Optional[torch.Tensor] = None
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        new_tokens = input_ids[:, self.prompt_length:]
+        steps = new_tokens.shape[1]
+        if self.stopped_at is None:
+            self.stopped_at = torch.zeros(input_ids.shape[0], dtype=torch.long)
+        if steps % self.check_every == 0 or steps >= self.detector.compliance_tokens:
+            for row in (self.stopped_at == 0).nonzero().flatten().tolist():
+                text = self.tokenizer.decode(new_tokens[row], skip_special_tokens=True)
+                if self.detector.settled(text, steps):
+                    self.stopped_at[row] = steps
+        return (self.stopped_at > 0).to(input_ids.device)
+
+    def tokens_saved(self, row: int, completion_tokens: int, steps_run: int, max_new_tokens: int) -> int:
+        """
+        Decode steps row did not run because it was stopped (not because it
+        ended). A stopped row of a padded batch keeps being decoded until every
+        row stops, so only the steps the whole batch skipped (steps_run being
+        the steps it actually ran) count.
+        """
+        if self.stopped_at is None or not 0 < self.stopped_at[row] <= completion_tokens:
+            return 0
+        return max(0, max_new_tokens - steps_run)
 
 class HuggingFaceLoader(ModelLoader):
     """Implementation of ModelLoader for Hugging Face Transformers"""
 
-    def __init__(self):
+    def __init__(self, batch_size: int = 8, prefix_cache: Optional[PrefixCache] = None,
+                 token_cache: Optional[TokenCache] = None):
         self.model = None
         self.tokenizer = None
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.batch_size = batch_size
+        # KV states of prompt prefixes shared by a whole batch, reused across batches
+        self.prefix_cache = prefix_cache
+        # Prompts pre-tokenized by `nanoeval tokenize`, opened for this tokenizer on load
+        self.token_cache = token_cache
+        self._token_lookup: Optional[TokenLookup] = None
         self._model_path = None
 
     def load(self, model_path: str, **kwargs) -> Any:
         """
         Load a model using the transformers library.
         Supports automatic device mapping and optional quantization.
+        n_threads is ignored: torch's thread pool is shared by the whole
+        process, so only worker processes holding a single model cap it.
         """
+        kwargs.pop("n_threads", None)
+
         self._model_path = model_path
         self.tokenizer = AutoTokenizer.from_pretrained(model_path, trust_remote_code=True)
+        if self.token_cache is not None:
+            self._token_lookup = self.token_cache.open(self.tokenizer)
         
         # Merge default loading args with user overrides
         load_kwargs = {
@@ -47,25 +119,30 @@ class HuggingFaceLoader(ModelLoader):
         if torch.cuda.is_available():
             torch.cuda.reset_peak_memory_stats()
             mem_before = torch.cuda.memory_allocated()
+        else:
+            mem_before = current_rss_mb()
 
         # Generation
+        timer = FirstTokenTimer()
+        criteria, early_stop = self._stopping_criteria(timer, input_length, **kwargs)
+        max_new_tokens = kwargs.get("max_tokens", 512)
         with torch.no_grad():
             outputs = self.model.generate(
                 **inputs,
-                max_new_tokens=kwargs.get("max_tokens", 512),
+                max_new_tokens=max_new_tokens,
                 temperature=kwargs.get("temperature", 0.7),
                 do_sample=kwargs.get("do_sample", True),
                 pad_token_id=self.tokenizer.eos_token_id,
                 return_dict_in_generate=True,
                 output_scores=False,
+                stopping_criteria=criteria,
             )
 
-        latency = (time.time() - start_time) * 1000
+        end_time = time.time()
+        latency = (end_time - start_time) * 1000
         
         # Calculate memory usage
-        mem_used = 0
-        if torch.cuda.is_available():
-            mem_used = (torch.cuda.max_memory_allocated() - mem_before) / (1024 * 1024)
+        mem_used = self._memory_used_mb(mem_before)
 
         # Process output
         generated_tokens = outputs.sequences[0]
@@ -73,13 +150,301 @@ class HuggingFaceLoader(ModelLoader):
         new_tokens = generated_tokens[input_length:]
         response_text = self.tokenizer.decode(new_tokens, skip_special_tokens=True)
 
+        first_token_time = timer.first_token_time or end_time
         return ModelResponse(
             text=response_text,
             tokens=new_tokens.tolist(),
             latency_ms=latency,
-            memory_used_mb=mem_used
+            memory_used_mb=mem_used,
+            ttft_ms=(first_token_time - start_time) * 1000,
+            prompt_tokens=input_length,
+            completion_tokens=len(new_tokens),
+            tokens_per_second=self._decode_speed(len(new_tokens), first_token_time, end_time),
+            peak_rss_mb=peak_rss_mb(),
+            tokens_saved=early_stop.tokens_saved(0, len(new_tokens), len(new_tokens), max_new_tokens)
+            if early_stop else 0
         )
 
+    def _stopping_criteria(self, timer: FirstTokenTimer, prompt_length: int,
+                           **kwargs) -> Tuple[StoppingCriteriaList, Optional[RefusalStoppingCriteria]]:
+        """The first-token timer, plus refusal early stopping when kwargs ask for it"""
+        if not kwargs.get("early_stop"):
+            return StoppingCriteriaList([timer]), None
+        early_stop = RefusalStoppingCriteria(self.tokenizer, prompt_length)
+        return StoppingCriteriaList([timer, early_stop]), early_stop
+
+    def _memory_used_mb(self, mem_before: float) -> float:
+        """Peak CUDA allocation growth, or RSS growth on CPU, since mem_before"""
+        if torch.cuda.is_available():
+            return (torch.cuda.max_memory_allocated() - mem_before) / (1024 * 1024)
+        return max(0.0, current_rss_mb() - mem_before)
+
+    @staticmethod
+    def _decode_speed(completion_tokens: int, first_token_time: float, end_time: float) -> float:
+        """Tokens per second after the first token (prefill is covered by TTFT)"""
+        decode_seconds = end_time - first_token_time
+        if completion_tokens <= 1 or decode_seconds <= 0:
+            return 0.0
+        return (completion_tokens - 1) / decode_seconds
+
+    def generate_batch(self, prompts: List[str], **kwargs) -> List[ModelResponse]:
+        """
+        Generate responses for many prompts using left-padded batches.
+        Prompts are bucketed by token length so each batch carries as little
+        padding as possible; results are returned in the original order.
+        With a prefix cache, prompts are bucketed by their token sequence
+        instead, so prompts sharing a prefix land in the same batch and that
+        prefix is prefilled only once.
+        """
+        if not self.model or not self.tokenizer:
+            raise RuntimeError("Model and tokenizer must be loaded before generation.")
+        if not prompts:
+            return []
+
+        batch_size = max(1, kwargs.pop("batch_size", self.batch_size))
+        token_ids = self._encode(list(prompts))
+        if self.prefix_cache is not None:
+            # Prefix matching compares token lists
+            token_ids = [list(map(int, ids)) for ids in token_ids]
+            order = sorted(range(len(prompts)), key=lambda i: token_ids[i])
+        else:
+            order = sorted(range(len(prompts)), key=lambda i: len(token_ids[i]))
+
+        # A prefix common to every prompt (e.g. a system prompt) is cached once and
+        # reused by all batches; otherwise each batch shares what it can
+        global_prefix = self._usable_prefix_length(token_ids)
+
+        responses: List[Optional[ModelResponse]] = [None] * len(prompts)
+        for start in range(0, len(order), batch_size):
+            bucket = order[start:start + batch_size]
+            bucket_ids = [token_ids[i] for i in bucket]
+            prefix_length = global_prefix or self._usable_prefix_length(bucket_ids)
+            if prefix_length:
+                batch_responses = self._generate_with_prefix(bucket_ids, prefix_length, **kwargs)
+            else:
+                batch_responses = self._generate_padded(bucket_ids, **kwargs)
+            for index, response in zip(bucket, batch_responses):
+                responses[index] = response
+        return responses
+
+    def _encode(self, prompts: List[str]) -> List[Any]:
+        """
+        Token IDs of each prompt: a view into the token cache where the prompt
+        was pre-tokenized, otherwise from one tokenizer call for all misses.
+        """
+        token_ids = self._token_lookup.get(prompts) if self._token_lookup else [None] * len(prompts)
+        missing = [i for i, ids in enumerate(token_ids) if ids is None]
+        if missing:
+            encoded = self.tokenizer([prompts[i] for i in missing])["input_ids"]
+            for i, ids in zip(missing, encoded):
+                token_ids[i] = ids
+        return token_ids
+
+    def _usable_prefix_length(self, token_ids: List[List[int]]) -> int:
+        """Length of the shared prefix worth caching, or 0"""
+        if self.prefix_cache is None:
+            return 0
+        # At least one token per prompt must remain to be run through the model
+        length = min(shared_prefix_length(token_ids), min(map(len, token_ids)) - 1)
+        return length if length >= self.prefix_cache.min_prefix_tokens else 0
+
+    def _generate_padded(self, token_ids: List[Any], **kwargs) -> List[ModelResponse]:
+        """Run a single left-padded model.generate call over one bucket of tokenized prompts"""
+        pad_token_id = self._pad_token_id()  # Tokenizers without a pad token fall back to EOS
+        start_time = time.time()
+
+        # Decoder-only models must be padded on the left so generation continues
+        # directly after each prompt's last real token
+        width = max(len(ids) for ids in token_ids)
+        input_ids = np.full((len(token_ids), width), pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(token_ids), width), dtype=np.int64)
+        for row, ids in enumerate(token_ids):
+            input_ids[row, width - len(ids):] = ids
+            attention_mask[row, width - len(ids):] = 1
+        return self._generate_tensors(
+            torch.from_numpy(input_ids).to(self.model.device),
+            torch.from_numpy(attention_mask).to(self.model.device),
+            start_time, **kwargs
+        )
+
+    def _generate_with_prefix(self, token_ids: List[List[int]], prefix_length: int,
+                              **kwargs) -> List[ModelResponse]:
+        """
+        Generate for prompts sharing their first prefix_length tokens.
+        The prefix KV state comes from the prefix cache (computed on a miss);
+        suffixes are padded between prefix and suffix so the cached positions
+        stay aligned, with position IDs derived from the attention mask.
+        """
+        pad_token_id = self._pad_token_id()
+        start_time = time.time()
+
+        prefix = token_ids[0][:prefix_length]
+        state = self.prefix_cache.get(prefix)
+        if state is None:
+            # An explicit Cache object, so the model never hands back legacy tuples
+            with torch.no_grad():
+                state = self.model(
+                    input_ids=torch.tensor([prefix], device=self.model.device),
+                    past_key_values=DynamicCache(), use_cache=True
+                ).past_key_values
+            self.prefix_cache.put(prefix, state)
+
+        # generate() extends the cache in place, so each batch works on its own copy
+        past_key_values = copy.deepcopy(state)
+        past_key_values.batch_repeat_interleave(len(token_ids))
+
+        suffixes = [ids[prefix_length:] for ids in token_ids]
+        width = max(len(suffix) for suffix in suffixes)
+        rows, masks = [], []
+        for suffix in suffixes:
+            padding = width - len(suffix)
+            rows.append(prefix + [pad_token_id] * padding + suffix)
+            masks.append([1] * prefix_length + [0] * padding + [1] * len(suffix))
+        input_ids = torch.tensor(rows, device=self.model.device)
+        attention_mask = torch.tensor(masks, device=self.model.device)
+        return self._generate_tensors(input_ids, attention_mask, start_time,
+                                      past_key_values=past_key_values, **kwargs)
+
+    def _pad_token_id(self) -> int:
+        if self.tokenizer.pad_token_id is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        return self.tokenizer.pad_token_id
+
+    def _generate_tensors(self, input_ids: torch.Tensor, attention_mask: torch.Tensor,
+                          start_time: float, past_key_values: Any = None, **kwargs) -> List[ModelResponse]:
+        """Run model.generate over a prepared batch and unpack per-prompt responses"""
+        pad_token_id = self._pad_token_id()
+        input_length = input_ids.shape[1]
+        batch_size = input_ids.shape[0]
+
+        if torch.cuda.is_available():
+            torch.cuda.reset_peak_memory_stats()
+            mem_before = torch.cuda.memory_allocated()
+        else:
+            mem_before = current_rss_mb()
+
+        generate_kwargs = {}
+        if past_key_values is not None:
+            generate_kwargs["past_key_values"] = past_key_values
+
+        timer = FirstTokenTimer()
+        criteria, early_stop = self._stopping_criteria(timer, input_length, **kwargs)
+        max_new_tokens = kwargs.get("max_tokens", 512)
+        with torch.no_grad():
+            outputs = self.model.generate(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                max_new_tokens=max_new_tokens,
+                temperature=kwargs.get("temperature", 0.7),
+                do_sample=kwargs.get("do_sample", True),
+                pad_token_id=pad_token_id,
+                return_dict_in_generate=True,
+                output_scores=False,
+                stopping_criteria=criteria,
+                **generate_kwargs,
+            )
+
+        end_time = time.time()
+        # Latency is amortized over the batch so per-response numbers stay comparable;
+        # TTFT and decode speed are what each prompt actually experienced in the batch
+        latency = (end_time - start_time) * 1000 / batch_size
+        first_token_time = timer.first_token_time or end_time
+        ttft = (first_token_time - start_time) * 1000
+
+        mem_used = self._memory_used_mb(mem_before)
+        peak_rss = peak_rss_mb()
+        prompt_lengths = attention_mask.sum(dim=1).tolist()
+
+        # Decode steps the batch ran, which stopped rows sat through as padding
+        steps_run = outputs.sequences.shape[1] - input_length
+        responses = []
+        for row, (sequence, prompt_length) in enumerate(zip(outputs.sequences, prompt_lengths)):
+            new_tokens = sequence[input_length:].tolist()
+            # Finished rows are right-filled with padding until the longest row ends
+            while new_tokens and new_tokens[-1] == pad_token_id:
+                new_tokens.pop()
+            responses.append(ModelResponse(
+                text=self.tokenizer.decode(new_tokens, skip_special_tokens=True),
+                tokens=new_tokens,
+                latency_ms=latency,
+                memory_used_mb=mem_used,
+                ttft_ms=ttft,
+                prompt_tokens=int(prompt_length),
+                completion_tokens=len(new_tokens),
+                tokens_per_second=self._decode_speed(len(new_tokens), first_token_time, end_time),
+                peak_rss_mb=peak_rss,
+                tokens_saved=early_stop.tokens_saved(row, len(new_tokens), steps_run, max_new_tokens)
+                if early_stop else 0
+            ))
+        return responses
+
+    def score_continuations(self, prompt: str, continuations: List[str]) -> ModelResponse:
+        """Log-probability of each continuation after the prompt, from one forward pass"""
+        return self.score_continuations_batch([prompt], continuations)[0]
+
+    def score_continuations_batch(self, prompts: List[str], continuations: List[str]) -> List[ModelResponse]:
+        """
+        Score every (prompt, continuation) pair with teacher forcing.
+        Pairs are packed into right-padded batches of batch_size prompts, so
+        each batch is a single forward pass with no decoding loop.
+        """
+        if not self.model or not self.tokenizer:
+            raise RuntimeError("Model and tokenizer must be loaded before scoring.")
+        if not prompts:
+            return []
+
+        pad_token_id = self.tokenizer.pad_token_id
+        if pad_token_id is None:
+            pad_token_id = self.tokenizer.eos_token_id
+        continuation_ids = [
+            self.tokenizer(text, add_special_tokens=False)["input_ids"] for text in continuations
+        ]
+
+        responses = []
+        for start in range(0, len(prompts), self.batch_size):
+            batch_prompts = prompts[start:start + self.batch_size]
+            start_time = time.time()
+
+            rows, spans = [], []
+            for prompt_ids in self._encode(batch_prompts):
+                prompt_ids = list(map(int, prompt_ids))
+                for ids in continuation_ids:
+                    rows.append(prompt_ids + ids)
+                    spans.append((len(prompt_ids), len(ids)))
+
+            width = max(len(row) for row in rows)
+            input_ids = torch.full((len(rows), width), pad_token_id, dtype=torch.long)
+            attention_mask = torch.zeros((len(rows), width), dtype=torch.long)
+            for i, row in enumerate(rows):
+                input_ids[i, :len(row)] = torch.tensor(row, dtype=torch.long)
+                attention_mask[i, :len(row)] = 1
+
+            with torch.no_grad():
+                logits = self.model(
+                    input_ids=input_ids.to(self.model.device),
+                    attention_mask=attention_mask.to(self.model.device),
+                ).logits
+            # Position t predicts token t + 1
+            token_logprobs = torch.log_softmax(logits[:, :-1].float(), dim=-1).gather(
+                -1, input_ids[:, 1:].unsqueeze(-1).to(logits.device)
+            ).squeeze(-1).cpu()
+
+            latency = (time.time() - start_time) * 1000 / len(batch_prompts)
+            totals = [
+                float(token_logprobs[i, offset - 1:offset - 1 + length].sum())
+                for i, (offset, length) in enumerate(spans)
+            ]
+            for p in range(len(batch_prompts)):
+                responses.append(ModelResponse(
+                    text="",
+                    tokens=[],
+                    logprobs=totals[p * len(continuations):(p + 1) * len(continuations)],
+                    latency_ms=latency,
+                    prompt_tokens=spans[p * len(continuations)][0],
+                    peak_rss_mb=peak_rss_mb()
+                ))
+        return responses
+
     def get_info(self) -> ModelInfo:
         """Extract technical specifications from the loaded model and config"""
         if not self.model:
@@ -114,6 +479,9 @@ class HuggingFaceLoader(ModelLoader):
         
         self.model = None
         self.tokenizer = None
+        # Cached KV states belong to the model that produced them
+        if self.prefix_cache is not None:
+            self.prefix_cache.clear()
         
         if torch.cuda.is_available():
             torch.cuda.empty_cache()
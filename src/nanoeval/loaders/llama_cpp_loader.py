@@ -1,12 +1,29 @@
+import re
 import time
 import os
 from typing import Any, Dict, List, Optional
+import numpy as np
 try:
     from llama_cpp import Llama
 except ImportError:
     Llama = None
 
 from nanoeval.core.model_loader import ModelLoader, ModelInfo, ModelResponse
+from nanoeval.core.prefix_cache import PrefixCache, common_prefix_length, shared_prefix_length
+from nanoeval.core.telemetry import current_rss_mb, peak_rss_mb
+from nanoeval.evaluators.refusal_matcher import RefusalEarlyStop
+
+def detect_quantization_from_filename(model_path: str) -> str:
+    """Heuristic to find quantization level (e.g. Q4_K_M, IQ3_XS, F16) in a filename"""
+    filename = os.path.basename(model_path).upper()
+    # Look for patterns like Q4_K_M, Q8_0, etc.
+    match = re.search(r'I?Q\d[_A-Z\d]*', filename)
+    if match:
+        return match.group(0)
+    # Unquantized exports are labelled with their float type
+    match = re.search(r'(?<![A-Z\d])(BF16|FP16|F16|FP32|F32)(?![A-Z\d])', filename)
+    return match.group(1).replace("FP", "F") if match else "unknown"
+
 
 class LlamaCppLoader(ModelLoader):
     """
@@ -14,7 +31,7 @@ class LlamaCppLoader(ModelLoader):
     Ideal for testing quantized models on edge devices.
     """
 
-    def __init__(self):
+    def __init__(self, prefix_cache: Optional[PrefixCache] = None, logits_all: bool = False):
         if Llama is None:
             raise ImportError(
                 "llama-cpp-python not installed. Please install it with: "
@@ -22,6 +39,10 @@ class LlamaCppLoader(ModelLoader):
             )
         self.model: Optional[Llama] = None
         self._model_path: Optional[str] = None
+        # Keep logits of every position, which scoring continuations needs
+        self.logits_all = logits_all
+        # Saved llama.cpp states of prompt prefixes shared across a batch
+        self.prefix_cache = prefix_cache
 
     def load(self, model_path: str, **kwargs) -> Any:
         """
@@ -38,6 +59,7 @@ class LlamaCppLoader(ModelLoader):
             "model_path": model_path,
             "n_ctx": kwargs.get("n_ctx", 2048),
             "n_gpu_layers": kwargs.get("n_gpu_layers", -1), # -1 uses all available GPU layers
+            "logits_all": self.logits_all,
             "verbose": False
         }
         # Update with any user-provided overrides
@@ -47,36 +69,155 @@ class LlamaCppLoader(ModelLoader):
         return self.model
 
     def generate(self, prompt: str, **kwargs) -> ModelResponse:
-        """Generate text using the llama.cpp backend"""
+        """
+        Generate text using the llama.cpp backend.
+        The completion is streamed so time-to-first-token and decode speed
+        can be measured; each streamed chunk carries one token. With
+        early_stop=True the stream is abandoned once the partial text settles
+        the refusal verdict.
+        """
         if not self.model:
             raise RuntimeError("Model must be loaded before generation.")
 
         start_time = time.time()
+        rss_before = current_rss_mb()
         
-        # Generation params
+        # Generation params; llama.cpp has no do_sample switch, so greedy means temperature 0
+        temperature = kwargs.get("temperature", 0.7)
+        if not kwargs.get("do_sample", True):
+            temperature = 0.0
         gen_params = {
             "prompt": prompt,
             "max_tokens": kwargs.get("max_tokens", 512),
-            "temperature": kwargs.get("temperature", 0.7),
+            "temperature": temperature,
             "stop": kwargs.get("stop", []),
-            "echo": False
+            "echo": False,
+            "stream": True
         }
         
-        output = self.model(**gen_params)
-        
-        latency = (time.time() - start_time) * 1000
+        early_stop = RefusalEarlyStop() if kwargs.get("early_stop") else None
+        pieces = []
+        first_token_time = None
+        stopped = False
+        stream = self.model(**gen_params)
+        for chunk in stream:
+            if first_token_time is None:
+                first_token_time = time.time()
+            pieces.append(chunk["choices"][0]["text"])
+            if early_stop and early_stop.settled("".join(pieces), len(pieces)):
+                # Closing the stream stops llama.cpp from decoding further tokens
+                stream.close()
+                stopped = True
+                break
         
-        # Extract text and metrics
-        # Note: llama-cpp-python returns token counts but not the full sequence easily in this call
-        text = output["choices"][0]["text"]
+        end_time = time.time()
+        first_token_time = first_token_time or end_time
+        completion_tokens = len(pieces)
+        decode_seconds = end_time - first_token_time
         
         return ModelResponse(
-            text=text,
+            text="".join(pieces),
             tokens=[], # llama-cpp doesn't return generated token IDs in the standard completion call
-            latency_ms=latency,
-            memory_used_mb=0 # Memory tracking for llama.cpp requires OS-level monitoring
+            latency_ms=(end_time - start_time) * 1000,
+            # llama.cpp allocates outside Python, so memory is measured at the process level
+            memory_used_mb=max(0.0, current_rss_mb() - rss_before),
+            ttft_ms=(first_token_time - start_time) * 1000,
+            prompt_tokens=len(self.model.tokenize(prompt.encode("utf-8"))),
+            completion_tokens=completion_tokens,
+            tokens_per_second=(completion_tokens - 1) / decode_seconds
+            if completion_tokens > 1 and decode_seconds > 0 else 0.0,
+            peak_rss_mb=peak_rss_mb(),
+            # Where the response would have ended is unknown, so this is an upper bound
+            tokens_saved=max(0, gen_params["max_tokens"] - completion_tokens) if stopped else 0
         )
 
+    def generate_batch(self, prompts: List[str], **kwargs) -> List[ModelResponse]:
+        """
+        Generate for many prompts, reusing KV state of shared prefixes.
+        llama.cpp already keeps the prefix a prompt shares with the previous
+        one, so prompts are visited in token order; a prefix common to the
+        whole batch is additionally kept in the prefix cache and restored
+        whenever the live context has moved away from it.
+        """
+        if self.prefix_cache is None or not prompts:
+            return super().generate_batch(prompts, **kwargs)
+        if not self.model:
+            raise RuntimeError("Model must be loaded before generation.")
+
+        token_ids = [self.model.tokenize(prompt.encode("utf-8")) for prompt in prompts]
+        order = sorted(range(len(prompts)), key=lambda i: token_ids[i])
+        prefix_length = min(shared_prefix_length(token_ids), min(map(len, token_ids)) - 1)
+        prefix = token_ids[0][:prefix_length]
+
+        responses: List[Optional[ModelResponse]] = [None] * len(prompts)
+        for index in order:
+            if prefix_length >= self.prefix_cache.min_prefix_tokens:
+                self._restore_prefix(prefix)
+            responses[index] = self.generate(prompts[index], **kwargs)
+        return responses
+
+    def _restore_prefix(self, prefix: List[int]):
+        """Make sure the live context starts with prefix, evaluating it at most once"""
+        live = list(self.model.input_ids[:self.model.n_tokens])
+        if common_prefix_length(live, prefix) >= len(prefix):
+            return
+        state = self.prefix_cache.get(prefix)
+        if state is None:
+            self.model.reset()
+            self.model.eval(prefix)
+            self.prefix_cache.put(prefix, self.model.save_state())
+        else:
+            self.model.load_state(state)
+
+    def score_continuations(self, prompt: str, continuations: List[str]) -> ModelResponse:
+        """Log-probability of each full continuation after the prompt"""
+        return self.score_continuations_batch([prompt], continuations)[0]
+
+    def score_continuations_batch(self, prompts: List[str], continuations: List[str]) -> List[ModelResponse]:
+        """
+        Score every (prompt, continuation) pair with teacher forcing.
+        The prompt is evaluated once; each continuation is then evaluated on
+        top of its KV state and scored by the summed logprob of all its
+        tokens. Needs the model loaded with logits_all=True (the pipeline
+        sets it for --mode logprob).
+        """
+        if not self.model:
+            raise RuntimeError("Model must be loaded before scoring.")
+        if not self.model.context_params.logits_all:
+            raise RuntimeError("Scoring continuations needs a model loaded with logits_all=True.")
+
+        continuation_ids = [
+            self.model.tokenize(continuation.encode("utf-8"), add_bos=False) for continuation in continuations
+        ]
+        responses = []
+        for prompt in prompts:
+            start_time = time.time()
+            prompt_ids = self.model.tokenize(prompt.encode("utf-8"))
+            self.model.reset()
+            self.model.eval(prompt_ids)
+            scores = [self._continuation_logprob(len(prompt_ids), ids) for ids in continuation_ids]
+            responses.append(ModelResponse(
+                text="",
+                tokens=[],
+                logprobs=scores,
+                latency_ms=(time.time() - start_time) * 1000,
+                prompt_tokens=len(prompt_ids),
+                peak_rss_mb=peak_rss_mb()
+            ))
+        return responses
+
+    def _continuation_logprob(self, prompt_length: int, ids: List[int]) -> float:
+        """Summed logprob of ids following the evaluated prompt of prompt_length tokens"""
+        # Rewind to the end of the prompt; eval() drops the KV state of the previous continuation
+        self.model.n_tokens = prompt_length
+        if len(ids) > 1:
+            self.model.eval(ids[:-1])
+        # Row t of the scores holds the logits predicting token t + 1
+        logits = np.asarray(self.model.scores[prompt_length - 1:prompt_length - 1 + len(ids)], dtype=np.float64)
+        peak = logits.max(axis=-1, keepdims=True)
+        logprobs = logits - peak - np.log(np.exp(logits - peak).sum(axis=-1, keepdims=True))
+        return float(logprobs[np.arange(len(ids)), ids].sum())
+
     def get_info(self) -> ModelInfo:
         """Extract metadata from the GGUF model"""
         if not self.model:
@@ -99,11 +240,7 @@ class LlamaCppLoader(ModelLoader):
         """Heuristic to find quantization level (e.g. Q4_K_M) in filename"""
         if not self._model_path:
             return "unknown"
-        filename = os.path.basename(self._model_path).upper()
-        # Look for patterns like Q4_K_M, Q8_0, etc.
-        import re
-        match = re.search(r'Q\d[_A-Z\d]*', filename)
-        return match.group(0) if match else "unknown"
+        return detect_quantization_from_filename(self._model_path)
 
     def unload(self):
         """Free model memory"""
@@ -111,3 +248,5 @@ class LlamaCppLoader(ModelLoader):
             del self.model
             self.model = None
         self._model_path = None
+        if self.prefix_cache is not None:
+            self.prefix_cache.clear()
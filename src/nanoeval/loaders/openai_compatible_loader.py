@@ -0,0 +1,270 @@
+import json
+import time
+import random
+import asyncio
+import threading
+import urllib.request
+from concurrent.futures import Future
+from typing import Any, Coroutine, Dict, List, Optional, Tuple
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from nanoeval.core.model_loader import ModelLoader, ModelInfo, ModelResponse
+from nanoeval.core.telemetry import peak_rss_mb
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class ServerRequestError(RuntimeError):
+    """A request to the inference server failed and will not be retried"""
+
+
+class OpenAICompatibleLoader(ModelLoader):
+    """
+    Loader for models served over an OpenAI-compatible completions API
+    (llama.cpp server, vLLM, TGI, ...).
+    The weights stay resident in the server; this client keeps up to
+    max_in_flight requests open on a pooled connection so the server's
+    continuous batching can work on many prompts at once. Requests run on
+    the loader's own event loop (a daemon thread), whose one HTTP session is
+    reused by every batch, sync or async, until unload().
+    """
+
+    def __init__(self, base_url: str = "http://127.0.0.1:8080/v1", api_key: Optional[str] = None,
+                 max_in_flight: int = 16, timeout_s: float = 120.0, max_retries: int = 3,
+                 backoff_s: float = 0.5):
+        if aiohttp is None:
+            raise ImportError(
+                "aiohttp not installed. Please install it with: "
+                "pip install 'nanoeval[server]'"
+            )
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.max_in_flight = max_in_flight
+        self.timeout_s = timeout_s
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+        self.model_name: Optional[str] = None
+        self._server_info: Dict[str, Any] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._http: Optional["aiohttp.ClientSession"] = None
+        self._lock = threading.Lock()
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    def load(self, model_path: str, **kwargs) -> Any:
+        """
+        Select the served model to evaluate and check the server is reachable.
+        model_path is the model name the server knows it by; load-time
+        kwargs such as n_threads belong to the server and are ignored.
+        """
+        request = urllib.request.Request(f"{self.base_url}/models", headers=self._headers())
+        with urllib.request.urlopen(request, timeout=self.timeout_s) as response:
+            listing = json.load(response)
+
+        self.model_name = model_path
+        for entry in listing.get("data", []):
+            if entry.get("id") == model_path:
+                self._server_info = entry
+                break
+        return self.model_name
+
+    def generate(self, prompt: str, **kwargs) -> ModelResponse:
+        """Blocking single completion; prefer agenerate_batch inside evaluators"""
+        return self.generate_batch([prompt], **kwargs)[0]
+
+    def generate_batch(self, prompts: List[str], **kwargs) -> List[ModelResponse]:
+        return self._submit(self._generate_batch(prompts, **kwargs)).result()
+
+    async def agenerate_batch(self, prompts: List[str], **kwargs) -> List[ModelResponse]:
+        """Send every prompt concurrently, at most max_in_flight at a time"""
+        return await asyncio.wrap_future(self._submit(self._generate_batch(prompts, **kwargs)))
+
+    async def _generate_batch(self, prompts: List[str], **kwargs) -> List[ModelResponse]:
+        if not self.model_name:
+            raise RuntimeError("Model must be loaded before generation.")
+        if not prompts:
+            return []
+
+        temperature = kwargs.get("temperature", 0.7)
+        if not kwargs.get("do_sample", True):
+            temperature = 0.0
+        params = {
+            "model": self.model_name,
+            "max_tokens": kwargs.get("max_tokens", 512),
+            "temperature": temperature,
+        }
+        if kwargs.get("stop"):
+            params["stop"] = kwargs["stop"]
+
+        session = self._session()
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        return await asyncio.gather(*[
+            self._complete(session, semaphore, {**params, "prompt": prompt}) for prompt in prompts
+        ])
+
+    async def _complete(self, session: "aiohttp.ClientSession", semaphore: asyncio.Semaphore,
+                        payload: Dict[str, Any]) -> ModelResponse:
+        async with semaphore:
+            start_time = time.time()
+            body = await self._post(session, "/completions", payload)
+        choice = body["choices"][0]
+        usage = body.get("usage") or {}
+        latency = (time.time() - start_time) * 1000
+        completion_tokens = usage.get("completion_tokens", 0)
+        return ModelResponse(
+            text=choice.get("text", ""),
+            tokens=[],
+            latency_ms=latency,
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=completion_tokens,
+            # Server-side timings are not exposed, so speed includes queueing and prefill
+            tokens_per_second=completion_tokens / (latency / 1000) if latency > 0 else 0.0,
+            peak_rss_mb=peak_rss_mb()
+        )
+
+    def score_continuations(self, prompt: str, continuations: List[str]) -> ModelResponse:
+        return self.score_continuations_batch([prompt], continuations)[0]
+
+    def score_continuations_batch(self, prompts: List[str], continuations: List[str]) -> List[ModelResponse]:
+        return self._submit(self._score_batch(prompts, continuations)).result()
+
+    async def ascore_continuations_batch(self, prompts: List[str], continuations: List[str]) -> List[ModelResponse]:
+        return await asyncio.wrap_future(self._submit(self._score_batch(prompts, continuations)))
+
+    async def _score_batch(self, prompts: List[str], continuations: List[str]) -> List[ModelResponse]:
+        """
+        Score continuations with echoed prompt logprobs: each prompt +
+        continuation is sent with echo=True and max_tokens=0, and the
+        logprobs of the tokens past the prompt are summed. Needs a server
+        that supports echo (e.g. vLLM). Every prompt x continuation pair is
+        in flight at once (bounded by max_in_flight), then regrouped by prompt.
+        """
+        if not self.model_name:
+            raise RuntimeError("Model must be loaded before scoring.")
+
+        async def score(session, semaphore, prompt: str, continuation: str) -> Tuple[float, float]:
+            payload = {
+                "model": self.model_name,
+                "prompt": prompt + continuation,
+                "max_tokens": 0,
+                "echo": True,
+                "logprobs": 0,
+            }
+            async with semaphore:
+                body = await self._post(session, "/completions", payload)
+            logprobs = body["choices"][0]["logprobs"]
+            total = sum(
+                value for value, offset in zip(logprobs["token_logprobs"], logprobs["text_offset"])
+                if value is not None and offset >= len(prompt)
+            )
+            return total, time.time()
+
+        session = self._session()
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        start_time = time.time()
+        scored = await asyncio.gather(*[
+            score(session, semaphore, prompt, continuation)
+            for prompt in prompts for continuation in continuations
+        ])
+
+        responses = []
+        width = len(continuations)
+        for i in range(len(prompts)):
+            row = scored[i * width:(i + 1) * width]
+            responses.append(ModelResponse(
+                text="",
+                tokens=[],
+                logprobs=[total for total, _ in row],
+                # Until this prompt's last continuation was scored
+                latency_ms=(max((finished for _, finished in row), default=start_time) - start_time) * 1000
+            ))
+        return responses
+
+    def _submit(self, coroutine: Coroutine) -> Future:
+        """Schedule a coroutine on the client loop, starting the loop on first use"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="nanoeval-http", daemon=True)
+                self._thread.start()
+            return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def _session(self) -> "aiohttp.ClientSession":
+        """The client loop's HTTP session, whose connection pool is sized to the in-flight limit"""
+        if self._http is None:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_in_flight),
+                timeout=aiohttp.ClientTimeout(total=self.timeout_s),
+                headers=self._headers(),
+            )
+        return self._http
+
+    async def _close_session(self):
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+    def _stop_client(self):
+        """Close the HTTP session and stop the client loop"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_session(), loop).result(self.timeout_s)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+    async def _post(self, session: "aiohttp.ClientSession", route: str,
+                    payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST with retries and exponential backoff on timeouts and transient errors"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with session.post(self.base_url + route, json=payload) as response:
+                    if response.status < 400:
+                        return await response.json()
+                    detail = await response.text()
+                    if response.status not in RETRY_STATUSES:
+                        raise ServerRequestError(f"{route} failed with HTTP {response.status}: {detail}")
+                    error: Exception = ServerRequestError(f"HTTP {response.status}: {detail}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = e
+            if attempt == self.max_retries:
+                raise ServerRequestError(
+                    f"{route} failed after {self.max_retries + 1} attempts: {error!r}"
+                ) from error
+            # Jittered exponential backoff keeps retries from arriving in lockstep
+            await asyncio.sleep(self.backoff_s * (2 ** attempt) * (0.5 + random.random()))
+
+    def get_info(self) -> ModelInfo:
+        """Describe the served model from what the server reports"""
+        if not self.model_name:
+            raise RuntimeError("Model must be loaded to retrieve info.")
+        meta = self._server_info.get("meta") or {}
+        return ModelInfo(
+            name=self.model_name,
+            architecture=meta.get("general.architecture", "remote"),
+            parameters=int(meta.get("n_params", 0)),
+            quantization="unknown",
+            context_length=int(meta.get("n_ctx_train", self._server_info.get("max_model_len", 0))),
+            vocab_size=int(meta.get("n_vocab", 0)),
+            metadata={"base_url": self.base_url, **self._server_info}
+        )
+
+    def unload(self):
+        """Close the client's connections; the server keeps the weights"""
+        self._stop_client()
+        self.model_name = None
+        self._server_info = {}
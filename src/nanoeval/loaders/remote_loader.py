@@ -0,0 +1,76 @@
+import os
+from typing import Any, Dict, List, Optional
+from nanoeval.core.model_loader import ModelLoader, ModelInfo, ModelResponse
+from nanoeval.core.model_server import asend_request, default_socket_path, send_request
+
+
+class RemoteLoader(ModelLoader):
+    """
+    Loader whose model lives in a `nanoeval serve` daemon.
+    Jobs are sent over the daemon's Unix socket, so repeated CLI runs reuse
+    the already loaded weights instead of reloading them every time.
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, backend: str = "huggingface",
+                 load_defaults: Optional[Dict[str, Any]] = None):
+        self.socket_path = socket_path or default_socket_path()
+        self.backend = backend
+        self.model_path: Optional[str] = None
+        # Sent with every load, under any kwargs passed to load() itself
+        self.load_defaults = load_defaults or {}
+        self.load_kwargs: Dict[str, Any] = {}
+        self._info: Optional[ModelInfo] = None
+
+    def load(self, model_path: str, **kwargs) -> Any:
+        """Have the daemon load the model, unless it already holds it"""
+        # The daemon resolves paths against its own working directory
+        if os.path.exists(model_path):
+            model_path = os.path.abspath(model_path)
+        self.model_path = model_path
+        self.load_kwargs = {**self.load_defaults, **kwargs}
+        self._info = ModelInfo(**send_request(self.socket_path, self._job("get_info")))
+        return self.model_path
+
+    def _job(self, op: str, **fields) -> Dict[str, Any]:
+        if not self.model_path:
+            raise RuntimeError("Model must be loaded before sending jobs.")
+        return {"op": op, "backend": self.backend, "model": self.model_path,
+                "load_kwargs": self.load_kwargs, **fields}
+
+    def generate(self, prompt: str, **kwargs) -> ModelResponse:
+        return self.generate_batch([prompt], **kwargs)[0]
+
+    def generate_batch(self, prompts: List[str], **kwargs) -> List[ModelResponse]:
+        results = send_request(self.socket_path, self._job("generate_batch", prompts=prompts, kwargs=kwargs))
+        return [ModelResponse(**result) for result in results]
+
+    async def agenerate_batch(self, prompts: List[str], **kwargs) -> List[ModelResponse]:
+        results = await asend_request(
+            self.socket_path, self._job("generate_batch", prompts=prompts, kwargs=kwargs)
+        )
+        return [ModelResponse(**result) for result in results]
+
+    def score_continuations(self, prompt: str, continuations: List[str]) -> ModelResponse:
+        return self.score_continuations_batch([prompt], continuations)[0]
+
+    def score_continuations_batch(self, prompts: List[str], continuations: List[str]) -> List[ModelResponse]:
+        results = send_request(self.socket_path, self._job(
+            "score_continuations_batch", prompts=prompts, continuations=continuations
+        ))
+        return [ModelResponse(**result) for result in results]
+
+    async def ascore_continuations_batch(self, prompts: List[str], continuations: List[str]) -> List[ModelResponse]:
+        results = await asend_request(self.socket_path, self._job(
+            "score_continuations_batch", prompts=prompts, continuations=continuations
+        ))
+        return [ModelResponse(**result) for result in results]
+
+    def get_info(self) -> ModelInfo:
+        if self._info is None:
+            raise RuntimeError("Model must be loaded to retrieve info.")
+        return self._info
+
+    def unload(self):
+        """Release the model on the client side only; the daemon keeps it warm"""
+        self.model_path = None
+        self._info = None
@@ -0,0 +1,162 @@
+import threading
+import time
+import zlib
+from typing import Any, List, Optional
+from nanoeval.core.model_loader import ModelLoader, ModelResponse, ModelInfo
+from nanoeval.core.telemetry import peak_rss_mb
+from nanoeval.evaluators.refusal_matcher import RefusalEarlyStop
+
+# Canned responses; the first one is recognised as a refusal by the default matcher
+RESPONSES = [
+    "I'm sorry, but I cannot help with that request.",
+    "Here is an overview of the topic with a few practical examples to get started.",
+    "Sure. The short answer is that it depends on the context, but usually it works.",
+    "There are several steps involved, and each one should be checked carefully before moving on.",
+]
+
+PAGE_SIZE = 4096
+
+
+class SimulatedLoader(ModelLoader):
+    """
+    Deterministic stand-in for a real backend, used to benchmark NanoEval itself.
+    Nothing is computed: a batch sleeps for a cost model of prefill and decode
+    time, and each prompt maps to a canned response chosen by its hash, so
+    runs are repeatable and model speed is a fixed, known quantity.
+    """
+
+    def __init__(self, decode_ms_per_token: float = 1.0, prefill_ms_per_token: float = 0.05,
+                 batch_scaling: float = 0.1, max_batch_size: int = 32, memory_mb: float = 64,
+                 refusal_rate: float = 0.5):
+        # A batch of n costs (1 + batch_scaling * (n - 1)) times a single prompt:
+        # 0 is perfect batching, 1 is no benefit over generating one by one
+        self.decode_ms_per_token = decode_ms_per_token
+        self.prefill_ms_per_token = prefill_ms_per_token
+        self.batch_scaling = batch_scaling
+        self.max_batch_size = max_batch_size
+        # Resident memory held while "loaded", standing in for the weights
+        self.memory_mb = memory_mb
+        self.refusal_rate = refusal_rate
+        self._weights: Optional[bytearray] = None
+        self._model_path: Optional[str] = None
+        self._lock = threading.Lock()
+        # Simulated compute time and forward batches since load
+        self.busy_s = 0.0
+        self.batches = 0
+
+    def load(self, model_path: str, **kwargs) -> Any:
+        weights = bytearray(int(self.memory_mb * 1024 * 1024))
+        # Touch every page so the footprint is resident, not just reserved
+        weights[::PAGE_SIZE] = b"\x01" * len(range(0, len(weights), PAGE_SIZE))
+        self._weights = weights
+        self._model_path = model_path
+        self.busy_s = 0.0
+        self.batches = 0
+        return weights
+
+    def _response_text(self, prompt: str) -> str:
+        bucket = zlib.crc32(prompt.encode("utf-8")) % 1000 / 1000
+        if bucket < self.refusal_rate:
+            return RESPONSES[0]
+        return RESPONSES[1 + int(bucket * 1000) % (len(RESPONSES) - 1)]
+
+    def _batch_factor(self, size: int) -> float:
+        return 1 + self.batch_scaling * (size - 1)
+
+    def _run(self, seconds: float):
+        time.sleep(seconds)
+        with self._lock:
+            self.busy_s += seconds
+            self.batches += 1
+
+    def generate(self, prompt: str, **kwargs) -> ModelResponse:
+        return self.generate_batch([prompt], **kwargs)[0]
+
+    def generate_batch(self, prompts: List[str], **kwargs) -> List[ModelResponse]:
+        if self._weights is None:
+            raise RuntimeError("Model not loaded. Call load() first.")
+        max_tokens = kwargs.get("max_tokens", 100)
+        early_stop = RefusalEarlyStop() if kwargs.get("early_stop") else None
+        responses = []
+        for start in range(0, len(prompts), self.max_batch_size):
+            batch = prompts[start:start + self.max_batch_size]
+            texts = [self._response_text(prompt) for prompt in batch]
+            full_lengths = [len(text.split()) for text in texts]
+            if early_stop:
+                texts = [self._stop_early(text, early_stop) for text in texts]
+            prompt_tokens = [len(prompt.split()) for prompt in batch]
+            completion_tokens = [min(max_tokens, len(text.split())) for text in texts]
+            factor = self._batch_factor(len(batch))
+            # Padded batches cost as much as their longest member
+            prefill_s = self.prefill_ms_per_token * max(prompt_tokens) * factor / 1000
+            decode_s = self.decode_ms_per_token * max(completion_tokens) * factor / 1000
+            self._run(prefill_s + decode_s)
+            for text, n_prompt, n_completion, n_full in zip(texts, prompt_tokens, completion_tokens, full_lengths):
+                responses.append(ModelResponse(
+                    text=text,
+                    tokens=list(range(n_completion)),
+                    latency_ms=(prefill_s + decode_s) * 1000,
+                    ttft_ms=prefill_s * 1000,
+                    prompt_tokens=n_prompt,
+                    completion_tokens=n_completion,
+                    tokens_per_second=n_completion / decode_s if decode_s > 0 else 0.0,
+                    peak_rss_mb=peak_rss_mb(),
+                    # Only the tokens between the cut and the response's natural end were saved
+                    tokens_saved=max(0, min(n_full, max_tokens) - n_completion),
+                ))
+        return responses
+
+    @staticmethod
+    def _stop_early(text: str, early_stop: RefusalEarlyStop) -> str:
+        """The canned response cut at the first word that settles its verdict"""
+        words = text.split()
+        for count in range(1, len(words) + 1):
+            if early_stop.settled(" ".join(words[:count]) + " ", count):
+                return " ".join(words[:count])
+        return text
+
+    def score_continuations_batch(self, prompts: List[str], continuations: List[str]) -> List[ModelResponse]:
+        if self._weights is None:
+            raise RuntimeError("Model not loaded. Call load() first.")
+        responses = []
+        for start in range(0, len(prompts), self.max_batch_size):
+            batch = prompts[start:start + self.max_batch_size]
+            prompt_tokens = [len(prompt.split()) for prompt in batch]
+            # One forward pass over prompt plus continuations, no decoding
+            seconds = self.prefill_ms_per_token * (max(prompt_tokens) + len(continuations)) \
+                * self._batch_factor(len(batch) * len(continuations)) / 1000
+            self._run(seconds)
+            for prompt, n_prompt in zip(batch, prompt_tokens):
+                text = self._response_text(prompt)
+                # Likely exactly when the canned response would start with the continuation
+                logprobs = [-1.0 if text.startswith(continuation) else -8.0 for continuation in continuations]
+                responses.append(ModelResponse(
+                    text="", tokens=[], logprobs=logprobs, latency_ms=seconds * 1000,
+                    prompt_tokens=n_prompt, peak_rss_mb=peak_rss_mb(),
+                ))
+        return responses
+
+    def score_continuations(self, prompt: str, continuations: List[str]) -> ModelResponse:
+        return self.score_continuations_batch([prompt], continuations)[0]
+
+    def get_info(self) -> ModelInfo:
+        if self._weights is None:
+            raise RuntimeError("Model must be loaded to retrieve info.")
+        return ModelInfo(
+            name=self._model_path or "simulated",
+            architecture="simulated",
+            parameters=0,
+            quantization="none",
+            context_length=4096,
+            vocab_size=0,
+            metadata={
+                "decode_ms_per_token": self.decode_ms_per_token,
+                "prefill_ms_per_token": self.prefill_ms_per_token,
+                "batch_scaling": self.batch_scaling,
+                "max_batch_size": self.max_batch_size,
+                "memory_mb": self.memory_mb,
+            },
+        )
+
+    def unload(self):
+        self._weights = None
@@ -0,0 +1,244 @@
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from nanoeval.reporters.json_report import COMPRESSION_SUFFIXES, write_json
+
+# Column kinds; "string" and "json" columns hold indices into the shared string table
+NUMERIC_KINDS = ("bool", "int", "float")
+TEXT_KINDS = ("string", "json")
+# Nested per-record dicts flattened into "<field>.<key>" columns
+FLATTENED_FIELDS = ("telemetry",)
+
+COLUMNAR_SUFFIX = ".columns.npz"
+
+
+def columnar_path(report_path: str) -> str:
+    """The columnar store written next to a JSON report"""
+    root, suffix = os.path.splitext(report_path)
+    if suffix in COMPRESSION_SUFFIXES:
+        root, _ = os.path.splitext(root)
+    return root + COLUMNAR_SUFFIX
+
+
+class StringTable:
+    """Deduplicated strings stored as one UTF-8 blob plus offsets"""
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def add(self, text: Optional[str]) -> int:
+        if text is None:
+            return -1
+        position = self.index.get(text)
+        if position is None:
+            position = self.index[text] = len(self.strings)
+            self.strings.append(text)
+        return position
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        encoded = [text.encode("utf-8") for text in self.strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(data) for data in encoded], out=offsets[1:])
+        return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _flatten(record: Dict[str, Any]) -> Dict[str, Any]:
+    row = {}
+    for key, value in record.items():
+        if key in FLATTENED_FIELDS and isinstance(value, dict):
+            row.update({f"{key}.{field}": item for field, item in value.items()})
+        else:
+            row[key] = value
+    return row
+
+
+def _column_kind(values: List[Any]) -> str:
+    present = [value for value in values if value is not None]
+    if all(isinstance(value, bool) for value in present) and len(present) == len(values):
+        return "bool"
+    if all(isinstance(value, int) and not isinstance(value, bool) for value in present) \
+            and len(present) == len(values):
+        return "int"
+    if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+        return "float"
+    if all(isinstance(value, str) for value in present):
+        return "string"
+    return "json"
+
+
+def _encode_table(records: List[Dict[str, Any]], strings: StringTable) -> Tuple[Dict[str, np.ndarray], Dict[str, str]]:
+    """Column arrays and column kinds of a list of per-prompt records"""
+    rows = [_flatten(record) for record in records]
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    arrays, kinds = {}, {}
+    for name in names:
+        values = [row.get(name) for row in rows]
+        kind = kinds[name] = _column_kind(values)
+        if kind == "bool":
+            arrays[name] = np.array(values, dtype=np.bool_)
+        elif kind == "int":
+            arrays[name] = np.array(values, dtype=np.int64)
+        elif kind == "float":
+            arrays[name] = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+        elif kind == "string":
+            arrays[name] = np.array([strings.add(value) for value in values], dtype=np.int32)
+        else:
+            arrays[name] = np.array([
+                -1 if value is None else strings.add(json.dumps(value, default=str)) for value in values
+            ], dtype=np.int32)
+    return arrays, kinds
+
+
+def _is_details(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(record, dict) for record in value)
+
+
+def split_report(report: Dict[str, Any], path: str) -> Dict[str, Any]:
+    """
+    Move every per-prompt "details" list of a report into a columnar store
+    at path and return the report with only aggregate numbers. Each details
+    list is replaced by a reference {"columnar", "table", "rows"}.
+    Prompt and response texts are stored once each, however many records
+    (or evaluators) repeat them.
+    """
+    strings = StringTable()
+    arrays: Dict[str, np.ndarray] = {}
+    tables: Dict[str, Dict[str, Any]] = {}
+
+    def split(tree: Any, table_path: Tuple[str, ...]) -> Any:
+        # Dicts on the way to a details list are copied; the report itself is not modified
+        if not isinstance(tree, dict):
+            return tree
+        copy = {}
+        for key, value in tree.items():
+            if key == "details" and _is_details(value):
+                table = "/".join(table_path) or "details"
+                columns, kinds = _encode_table(value, strings)
+                arrays.update({f"{table}:{name}": array for name, array in columns.items()})
+                tables[table] = {"rows": len(value), "columns": kinds}
+                copy[key] = {"columnar": os.path.basename(path), "table": table, "rows": len(value)}
+            else:
+                copy[key] = split(value, table_path + (str(key),))
+        return copy
+
+    summary = split(report, ())
+    blob, offsets = strings.arrays()
+    metadata = json.dumps({"version": 1, "tables": tables})
+    np.savez(path, __metadata__=np.frombuffer(metadata.encode("utf-8"), dtype=np.uint8),
+             __strings__=blob, __offsets__=offsets, **arrays)
+    return summary
+
+
+def write_report(report: Dict[str, Any], output: str, details: str = "columnar") -> Optional[str]:
+    """
+    Write a JSON report (compressed for .gz/.zst outputs). With
+    details="columnar" the per-prompt records go to a columnar store next to
+    it (returned) and the JSON keeps the aggregates; details="json" writes
+    everything into the JSON file.
+    """
+    store = None
+    if details == "columnar":
+        store = columnar_path(output)
+        report = split_report(report, store)
+    write_json(report, output)
+    return store
+
+
+class ColumnarResults:
+    """
+    Read access to a columnar store. Columns are read from the file as they
+    are requested; text columns decode only the distinct strings they use.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._data = np.load(path)
+        metadata = json.loads(self._data["__metadata__"].tobytes().decode("utf-8"))
+        self.tables: Dict[str, Dict[str, Any]] = metadata["tables"]
+        self._blob = self._data["__strings__"]
+        self._offsets = self._data["__offsets__"]
+
+    def string(self, index: int) -> Optional[str]:
+        if index < 0:
+            return None
+        return self._blob[self._offsets[index]:self._offsets[index + 1]].tobytes().decode("utf-8")
+
+    def column(self, table: str, name: str) -> np.ndarray:
+        """Raw column array (string table indices for text columns)"""
+        return self._data[f"{table}:{name}"]
+
+    def texts(self, table: str, name: str) -> List[Optional[str]]:
+        """Decoded values of a text column"""
+        codes = self.column(table, name)
+        unique, inverse = np.unique(codes, return_inverse=True)
+        decoded = [self.string(int(code)) for code in unique]
+        return [decoded[i] for i in inverse]
+
+    def frame(self, table: str, columns: Optional[List[str]] = None) -> "pd.DataFrame":
+        """
+        The table as a pandas DataFrame. Text columns become categoricals, so
+        repeated values (categories, refusal phrases) are decoded once.
+        """
+        import pandas as pd
+        kinds = self.tables[table]["columns"]
+        data = {}
+        for name in columns or list(kinds):
+            array = self.column(table, name)
+            if kinds[name] in TEXT_KINDS:
+                unique, inverse = np.unique(array, return_inverse=True)
+                categories = [self.string(int(code)) for code in unique]
+                if unique.size and unique[0] < 0:
+                    # -1 (missing) maps to code -1, which pandas reads as NaN
+                    inverse = inverse - 1
+                    categories = categories[1:]
+                data[name] = pd.Categorical.from_codes(inverse, categories=categories)
+            else:
+                data[name] = array
+        return pd.DataFrame(data)
+
+    def aggregate(self, table: str, by: str = "category") -> "pd.DataFrame":
+        """Row count and mean of every numeric and boolean column (e.g. refusal rate) per group"""
+        kinds = self.tables[table]["columns"]
+        numeric = [name for name, kind in kinds.items() if kind in NUMERIC_KINDS and name != "id"]
+        frame = self.frame(table, [by] + numeric)
+        grouped = frame.groupby(by, observed=True)
+        result = grouped[numeric].mean()
+        result.insert(0, "rows", grouped.size())
+        return result
+
+    def records(self, table: str) -> List[Dict[str, Any]]:
+        """The table back as per-prompt record dicts, as evaluators produce them"""
+        kinds = self.tables[table]["columns"]
+        columns = {}
+        for name, kind in kinds.items():
+            if kind == "string":
+                columns[name] = self.texts(table, name)
+            elif kind == "json":
+                columns[name] = [None if text is None else json.loads(text) for text in self.texts(table, name)]
+            else:
+                array = self.column(table, name)
+                columns[name] = [None if kind == "float" and np.isnan(v) else v for v in array.tolist()]
+
+        records = []
+        for i in range(self.tables[table]["rows"]):
+            record: Dict[str, Any] = {}
+            for name, values in columns.items():
+                field, _, key = name.partition(".")
+                if key and field in FLATTENED_FIELDS:
+                    record.setdefault(field, {})[key] = values[i]
+                else:
+                    record[name] = values[i]
+            records.append(record)
+        return records
+
+    def close(self):
+        self._data.close()
+
+
+def load_columnar(path: str) -> ColumnarResults:
+    """Open a columnar store (or the one belonging to a JSON report)"""
+    if not path.endswith(COLUMNAR_SUFFIX):
+        path = columnar_path(path)
+    return ColumnarResults(path)
@@ -0,0 +1,117 @@
+import gzip
+import io
+import json
+import os
+from dataclasses import fields, is_dataclass
+from typing import Any, Dict, IO, Optional
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from nanoeval.core.model_loader import ModelInfo
+
+# Output compression, chosen by the report's file suffix
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+
+# Model metadata larger than this (tokenizer vocab and merges, chat templates)
+# is replaced by a summary of its type and size
+MAX_METADATA_ITEMS = 64
+MAX_METADATA_STRING = 256
+
+# Encoded chunks are joined into writes of about this many characters
+WRITE_CHUNK = 1 << 16
+
+
+def compression_for(path: str) -> Optional[str]:
+    return COMPRESSION_SUFFIXES.get(os.path.splitext(path)[1])
+
+
+def open_report(path: str, mode: str = "r") -> IO[str]:
+    """Open a report as text, compressed according to its suffix (.gz, .zst)"""
+    compression = compression_for(path)
+    if compression == "gzip":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    if compression == "zstd":
+        if zstandard is None:
+            raise ImportError("zstandard not installed. Run `pip install nanoeval[compression]` "
+                              "or write the report as .json or .json.gz")
+        raw = open(path, mode + "b")
+        if "w" in mode:
+            stream = zstandard.ZstdCompressor().stream_writer(raw)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(raw)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def summarize_metadata(value: Any) -> Any:
+    """
+    Model metadata safe to put in a report: scalars and small containers are
+    kept; long lists, dicts and strings become {"omitted", "length"}.
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        if len(value) > MAX_METADATA_STRING:
+            return {"omitted": "str", "length": len(value)}
+        return value
+    if isinstance(value, dict):
+        if len(value) > MAX_METADATA_ITEMS:
+            return {"omitted": "dict", "length": len(value)}
+        return {str(key): summarize_metadata(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if len(value) > MAX_METADATA_ITEMS:
+            return {"omitted": "list", "length": len(value)}
+        return [summarize_metadata(item) for item in value]
+    # dtypes, paths and other objects of HF configs
+    return summarize_metadata(str(value))
+
+
+def model_info_dict(info: Any) -> Any:
+    """A ModelInfo (or its dict form, as worker processes return it) with summarized metadata"""
+    if isinstance(info, ModelInfo):
+        # Not asdict: that would deep-copy the full metadata first
+        info = {field.name: getattr(info, field.name) for field in fields(info)}
+    elif not isinstance(info, dict):
+        return info
+    info = dict(info)
+    info["metadata"] = summarize_metadata(info.get("metadata") or {})
+    return info
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ModelInfo):
+        return model_info_dict(value)
+    if is_dataclass(value) and not isinstance(value, type):
+        return {field.name: getattr(value, field.name) for field in fields(value)}
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def write_json(report: Dict[str, Any], path: str, indent: Optional[int] = 2):
+    """
+    Stream a report to path (gzip or zstd compressed for .gz/.zst). The
+    model_info section is written with summarized metadata.
+    """
+    if "model_info" in report:
+        report = {**report, "model_info": model_info_dict(report["model_info"])}
+    encoder = json.JSONEncoder(indent=indent, default=_default)
+    with open_report(path, "w") as f:
+        buffer, size = [], 0
+        for chunk in encoder.iterencode(report):
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= WRITE_CHUNK:
+                f.write("".join(buffer))
+                buffer, size = [], 0
+        f.write("".join(buffer))
+
+
+def read_json(path: str) -> Dict[str, Any]:
+    """Read a (possibly compressed) JSON report"""
+    with open_report(path, "r") as f:
+        return json.load(f)
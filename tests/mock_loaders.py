@@ -0,0 +1,22 @@
+from functools import partial
+from typing import Iterable, Optional
+from unittest.mock import MagicMock
+from nanoeval.core.model_loader import ModelLoader
+
+def mock_loader(refused: Optional[Iterable[int]] = None) -> MagicMock:
+    """
+    MagicMock loader for evaluator tests. Its async batch API is
+    ModelLoader's default implementation, so tests only mock the sync
+    generate_batch / score_continuations_batch methods.
+    With refused, generate_batch answers prompts named p<N> with a refusal
+    when N is in refused and with a compliance otherwise.
+    """
+    loader = MagicMock()
+    loader.agenerate_batch = partial(ModelLoader.agenerate_batch, loader)
+    loader.ascore_continuations_batch = partial(ModelLoader.ascore_continuations_batch, loader)
+    if refused is not None:
+        refused = set(refused)
+        loader.generate_batch.side_effect = lambda prompts, **kw: [
+            MagicMock(text="I cannot help." if int(p[1:]) in refused else "Sure.") for p in prompts
+        ]
+    return loader
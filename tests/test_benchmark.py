@@ -0,0 +1,84 @@
+import unittest
+import os
+from nanoeval.core.benchmark import BenchmarkCase, benchmark_grid, compare_to_baseline, run_benchmarks, run_case
+from nanoeval.evaluators.refusal_matcher import judge_refusals
+from nanoeval.loaders.simulated_loader import SimulatedLoader
+
+FAST = {"decode_ms_per_token": 0.1, "prefill_ms_per_token": 0.01, "memory_mb": 8}
+
+class TestSimulatedLoader(unittest.TestCase):
+    def test_deterministic_responses_and_cost(self):
+        loader = SimulatedLoader(batch_scaling=0.5, max_batch_size=4, **FAST)
+        loader.load("sim")
+        prompts = [f"prompt {i}" for i in range(6)]
+        first = loader.generate_batch(prompts)
+        again = loader.generate_batch(prompts)
+        self.assertEqual([r.text for r in first], [r.text for r in again])
+        # 6 prompts in batches of at most 4, twice
+        self.assertEqual(loader.batches, 4)
+        self.assertGreater(loader.busy_s, 0)
+        # A batch of 4 costs 1 + 0.5 * 3 times a single prompt
+        batched = loader.generate_batch(["prompt 0"] * 4)[0].latency_ms
+        self.assertAlmostEqual(batched / loader.generate_batch(["prompt 0"])[0].latency_ms, 2.5)
+
+    def test_logprob_verdicts_match_generated_ones(self):
+        loader = SimulatedLoader(**FAST)
+        loader.load("sim")
+        prompts = [f"prompt {i}" for i in range(20)]
+        generated = [v["is_refusal"] for v in judge_refusals(loader, prompts)]
+        scored = [v["is_refusal"] for v in judge_refusals(loader, prompts, mode="logprob")]
+        self.assertEqual(generated, scored)
+        self.assertTrue(any(generated) and not all(generated))
+
+    def test_early_stop_cuts_refusals(self):
+        loader = SimulatedLoader(**FAST)
+        loader.load("sim")
+        prompts = [f"prompt {i}" for i in range(20)]
+        full = loader.generate_batch(prompts, max_tokens=50)
+        stopped = loader.generate_batch(prompts, max_tokens=50, early_stop=True)
+        for before, after in zip(full, stopped):
+            refused = before.text.startswith("I'm sorry")
+            self.assertEqual(after.tokens_saved > 0, refused)
+            self.assertTrue(before.text.startswith(after.text))
+            # Only the words the full response would still have had count as saved
+            self.assertEqual(after.tokens_saved, before.completion_tokens - after.completion_tokens)
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_grid(self):
+        cases = benchmark_grid([8, 16], [4], [1, 2])
+        self.assertEqual([case.name for case in cases], [
+            "evaluate-n8-b4-e1", "evaluate-n8-b4-e2", "evaluate-n16-b4-e1", "evaluate-n16-b4-e2",
+            "pair-n8-b4-e1", "pair-n16-b4-e1",
+        ])
+        with self.assertRaises(ValueError):
+            benchmark_grid([8], [4], [3])
+
+    def test_cases_report_throughput_and_idle_time(self):
+        cwd = os.getcwd()
+        merged = run_case(BenchmarkCase("evaluate", 8, 4, evaluators=2), FAST)
+        pair = run_case(BenchmarkCase("pair", 8, 4), FAST)
+        self.assertEqual(os.getcwd(), cwd)
+
+        # Both evaluators share each model batch: 2 rounds instead of 4
+        self.assertEqual(merged["model_batches"], 2)
+        # Teacher and student each run 2 batches
+        self.assertEqual(pair["model_batches"], 4)
+        for result in (merged, pair):
+            self.assertGreater(result["prompts_per_sec"], 0)
+            self.assertTrue(0 <= result["idle_fraction"] < 1)
+            self.assertGreater(result["peak_rss_mb"], 0)
+
+    def test_spawned_run_and_baseline_comparison(self):
+        results = run_benchmarks([BenchmarkCase("evaluate", 8, 8)], FAST)
+        self.assertEqual(len(results["cases"]), 1)
+        self.assertEqual(compare_to_baseline(results, results), [])
+
+        case = results["cases"][0]
+        faster = {"cases": [{**case, "prompts_per_sec": case["prompts_per_sec"] * 2,
+                             "idle_fraction": max(0.0, case["idle_fraction"] - 0.5)}]}
+        regressions = compare_to_baseline(results, faster, tolerance=0.1)
+        self.assertIn("prompts_per_sec", [regression["metric"] for regression in regressions])
+        self.assertEqual(compare_to_baseline(results, {"cases": []}), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import asyncio
+import json
+import os
+import tempfile
+from nanoeval.core.pipeline import SmallModelEvaluationPipeline
+from nanoeval.evaluators.finetuning.regression import load_baseline
+from nanoeval.evaluators.standard.refusal_rate import RefusalRateEvaluator
+from nanoeval.reporters.columnar import columnar_path, load_columnar, split_report, write_report
+from mock_loaders import mock_loader
+
+def sample_report():
+    details = []
+    for i in range(6):
+        refused = i % 3 != 2
+        details.append({
+            "id": i,
+            "prompt": f"p{i % 2}",
+            "response": "I cannot help." if refused else "Sure.",
+            "is_refusal": refused,
+            "refusal_phrase": "i cannot" if refused else None,
+            "category": "weapons" if i < 3 else "fraud",
+            "severity": "high" if i % 2 == 0 else None,
+            "telemetry": {"latency_ms": 10.0 * (i + 1), "completion_tokens": i + 1},
+        })
+    return {"model": "m", "results": {"refusal_rate": {"score": 4 / 6, "details": details}}}
+
+class TestColumnarResults(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmp.name, "report.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_and_deduplicated_text(self):
+        report = sample_report()
+        store = write_report(report, self.output)
+        self.assertEqual(store, columnar_path(self.output))
+
+        with open(self.output) as f:
+            summary = json.load(f)
+        self.assertEqual(summary["results"]["refusal_rate"]["details"],
+                         {"columnar": "report.columns.npz", "table": "results/refusal_rate", "rows": 6})
+        # The report passed in keeps its records
+        self.assertEqual(len(report["results"]["refusal_rate"]["details"]), 6)
+
+        results = load_columnar(self.output)
+        self.assertEqual(results.records("results/refusal_rate"), report["results"]["refusal_rate"]["details"])
+        # Six prompts and responses share two texts each
+        self.assertEqual(len(set(results.column("results/refusal_rate", "prompt").tolist())), 2)
+        self.assertEqual(results.texts("results/refusal_rate", "refusal_phrase")[2], None)
+        results.close()
+
+    def test_aggregate_by_category_and_severity(self):
+        write_report(sample_report(), self.output)
+        results = load_columnar(self.output)
+
+        by_category = results.aggregate("results/refusal_rate")
+        self.assertEqual(by_category.loc["weapons", "rows"], 3)
+        self.assertAlmostEqual(by_category.loc["weapons", "is_refusal"], 2 / 3)
+        self.assertAlmostEqual(by_category.loc["fraud", "telemetry.latency_ms"], 50.0)
+
+        # Records without a severity are left out of the grouping
+        by_severity = results.aggregate("results/refusal_rate", by="severity")
+        self.assertEqual(list(by_severity.index), ["high"])
+        self.assertEqual(by_severity.loc["high", "rows"], 3)
+        results.close()
+
+    def test_json_details_and_smaller_summary(self):
+        inline = os.path.join(self.tmp.name, "inline.json")
+        self.assertIsNone(write_report(sample_report(), inline, details="json"))
+        write_report(sample_report(), self.output)
+        with open(inline) as f:
+            self.assertEqual(len(json.load(f)["results"]["refusal_rate"]["details"]), 6)
+        self.assertFalse(os.path.exists(columnar_path(inline)))
+        self.assertLess(os.path.getsize(self.output), os.path.getsize(inline))
+
+    def test_nested_tables(self):
+        report = {"results": {"a": {"details": [{"id": 0, "x": 1.5}]},
+                              "b": {"nested": {"details": [{"id": 0, "x": None}]}}}}
+        summary = split_report(report, columnar_path(self.output))
+        self.assertEqual(summary["results"]["b"]["nested"]["details"]["table"], "results/b/nested")
+        results = load_columnar(columnar_path(self.output))
+        self.assertEqual(results.records("results/b/nested"), [{"id": 0, "x": None}])
+        results.close()
+
+    def test_regression_baseline_from_columnar_report(self):
+        dataset = os.path.join(self.tmp.name, "prompts.jsonl")
+        with open(dataset, "w") as f:
+            for i in range(4):
+                f.write(json.dumps({"prompt": f"p{i}", "category": "test", "severity": "low"}) + "\n")
+        loader = mock_loader(refused=[0])
+        pipeline = SmallModelEvaluationPipeline(config={"cache": {"enabled": False}})
+        pipeline.loader = loader
+        pipeline.register_evaluator(RefusalRateEvaluator(dataset))
+        report = asyncio.run(pipeline.evaluate_model("base"))
+        write_report(report, self.output)
+
+        records, config = load_baseline(self.output)
+        self.assertEqual([r["is_refusal"] for r in records], [True, False, False, False])
+        self.assertEqual(records[0]["severity"], "low")
+        self.assertEqual(config, {"mode": "generate"})
+
+if __name__ == '__main__':
+    unittest.main()
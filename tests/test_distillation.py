@@ -3,25 +3,33 @@ from unittest.mock import MagicMock, patch
 import asyncio
 import json
 import os
+import tempfile
+import threading
 from nanoeval.core.pipeline import SmallModelEvaluationPipeline
 from nanoeval.evaluators.distillation.safety_preservation import SafetyPreservationEvaluator
+from mock_loaders import mock_loader
 
 class TestDistillationAudit(unittest.TestCase):
     
     def setUp(self):
-        # Create temporary test dataset
+        # Create temporary test dataset where the pipeline looks for it,
+        # inside a scratch working directory so the tracked benchmarks stay untouched
         self.test_data = [
             {"prompt": "Harmful Prompt 1", "category": "harmful"},
             {"prompt": "Harmful Prompt 2", "category": "harmful"}
         ]
-        os.makedirs("benchmarks", exist_ok=True)
-        with open("benchmarks/safety_critical_prompts.jsonl", "w") as f:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        os.makedirs("benchmarks")
+        self.dataset = os.path.join(self.tmp.name, "benchmarks", "safety_critical_prompts.jsonl")
+        with open(self.dataset, "w") as f:
             for item in self.test_data:
                 f.write(json.dumps(item) + "\n")
 
     def tearDown(self):
-        if os.path.exists("benchmarks/safety_critical_prompts.jsonl"):
-            os.remove("benchmarks/safety_critical_prompts.jsonl")
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
 
     @patch("nanoeval.loaders.huggingface_loader.AutoTokenizer")
     @patch("nanoeval.loaders.huggingface_loader.AutoModelForCausalLM")
@@ -53,18 +61,21 @@ class TestDistillationAudit(unittest.TestCase):
 
     def test_evaluator_logic(self):
         """Test the SafetyPreservationEvaluator logic directly"""
-        evaluator = SafetyPreservationEvaluator("benchmarks/safety_critical_prompts.jsonl")
+        evaluator = SafetyPreservationEvaluator(self.dataset)
         
-        teacher_loader = MagicMock()
-        student_loader = MagicMock()
+        teacher_loader = mock_loader()
+        student_loader = mock_loader()
         
         # Scenario: Teacher refuses both, Student complies with one (50% regression)
         
         # Teacher: "I cannot..." (Safe)
-        teacher_loader.generate.return_value.text = "I cannot assist with that harmful request."
+        teacher_loader.generate_batch.return_value = [
+            MagicMock(text="I cannot assist with that harmful request."),
+            MagicMock(text="I cannot assist with that harmful request.")
+        ]
         
         # Student: First "Sure!", Second "I cannot..."
-        student_loader.generate.side_effect = [
+        student_loader.generate_batch.return_value = [
             MagicMock(text="Sure! Here is how you do it..."), # Fail
             MagicMock(text="I cannot do that.")               # Pass
         ]
@@ -77,5 +88,41 @@ class TestDistillationAudit(unittest.TestCase):
         self.assertEqual(len(results["regressions"]), 1)
         self.assertEqual(results["regressions"][0]["prompt"], "Harmful Prompt 1")
 
+    def test_teacher_and_student_generate_concurrently(self):
+        """Both generation streams must be in flight at the same time"""
+        evaluator = SafetyPreservationEvaluator(self.dataset)
+        barrier = threading.Barrier(2, timeout=5)
+
+        def generate_batch(text):
+            def _generate(prompts, **kwargs):
+                barrier.wait()  # Raises BrokenBarrierError if run sequentially
+                return [MagicMock(text=text) for _ in prompts]
+            return _generate
+
+        teacher_loader = mock_loader()
+        teacher_loader.generate_batch.side_effect = generate_batch("I cannot help with that.")
+        student_loader = mock_loader()
+        student_loader.generate_batch.side_effect = generate_batch("Sure, here you go.")
+
+        results = asyncio.run(evaluator.evaluate_pair(teacher_loader, student_loader))
+
+        self.assertEqual(results["teacher_refusals"], 2)
+        self.assertEqual(len(results["regressions"]), 2)
+        self.assertEqual(results["preservation_score"], 0.0)
+
+    def test_failed_pair_load_unloads_both_models(self):
+        pipeline = SmallModelEvaluationPipeline(config={"cache": {"enabled": False}})
+        teacher = mock_loader()
+        student = mock_loader()
+        student.load.side_effect = OSError("no such model")
+        pipeline.loader = teacher
+        pipeline._create_loader = MagicMock(return_value=student)
+
+        with self.assertRaises(OSError):
+            asyncio.run(pipeline.evaluate_model_pair("teacher", "student"))
+        teacher.load.assert_called_once()
+        teacher.unload.assert_called_once()
+        student.unload.assert_called_once()
+
 if __name__ == "__main__":
     unittest.main()
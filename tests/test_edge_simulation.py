@@ -0,0 +1,96 @@
+import unittest
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from nanoeval.core.pipeline import SmallModelEvaluationPipeline
+from nanoeval.evaluators.edge.device_simulation import (
+    EdgeSimulationEvaluator, ResourceProfile, apply_resource_limits
+)
+
+def allocate_mb(size_mb):
+    """Runs inside a limited worker: allocate size_mb and report the CPUs available"""
+    try:
+        block = bytearray(size_mb * 1024 * 1024)
+        allocated = len(block) > 0
+    except MemoryError:
+        allocated = False
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None
+    return allocated, cpus
+
+class TestResourceProfile(unittest.TestCase):
+    def test_parse(self):
+        profile = ResourceProfile.parse("2/2G/1024")
+        self.assertEqual(profile, ResourceProfile(cores=2, memory_mb=2048, n_ctx=1024))
+        self.assertEqual(profile.name, "2 cores / 2 GB / ctx 1024")
+        self.assertEqual(ResourceProfile.parse("4/1536M").memory_mb, 1536)
+        self.assertEqual(ResourceProfile.parse("4/1.5G").memory_mb, 1536)
+        self.assertEqual(profile.load_kwargs()["n_threads"], 2)
+        self.assertEqual(profile.load_kwargs()["n_gpu_layers"], 0)
+        for spec in ("4", "four/4G", "4/4T", "4/4G/x/y"):
+            with self.assertRaises(ValueError):
+                ResourceProfile.parse(spec)
+
+    @unittest.skipUnless(hasattr(os, "sched_getaffinity"), "needs Linux resource limits")
+    def test_limits_apply_to_worker(self):
+        profile = ResourceProfile(cores=1, memory_mb=512)
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context,
+                                 initializer=apply_resource_limits, initargs=(profile,)) as pool:
+            self.assertEqual(pool.submit(allocate_mb, 1024).result(), (False, 1))
+            self.assertTrue(pool.submit(allocate_mb, 16).result()[0])
+
+class TestEdgeSimulation(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dataset = os.path.join(self.tmp.name, "prompts.jsonl")
+        with open(self.dataset, "w") as f:
+            for i in range(4):
+                f.write(json.dumps({"prompt": f"p{i}", "category": "test"}) + "\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _result(self, refusals, latency):
+        records = [
+            {"id": i, "category": "test", "is_refusal": refused} for i, refused in enumerate(refusals)
+        ]
+        performance = {
+            "latency_ms": {"p50": latency, "p95": latency, "p99": latency, "mean": latency},
+            "ttft_ms": {"p50": 5.0, "p95": 5.0, "p99": 5.0, "mean": 5.0},
+            "tokens_per_second": {"p50": 20.0, "p95": 20.0, "p99": 20.0, "mean": 20.0},
+            "peak_rss_mb": 900.0,
+        }
+        return {"records": records, "performance": performance}
+
+    def test_matrix_report(self):
+        evaluator = EdgeSimulationEvaluator(self.dataset, profiles=["2/2G", "4/4G", "1/512M"])
+        matrix = evaluator.summarize_matrix({
+            "4 cores / 4 GB": self._result([True, True, False, False], 100.0),
+            "2 cores / 2 GB": self._result([True, False, False, False], 250.0),
+            "1 cores / 512 MB": {"error": "MemoryError: "},
+        })
+
+        rows = matrix["profiles"]
+        self.assertEqual([row["profile"] for row in rows],
+                         ["4 cores / 4 GB", "2 cores / 2 GB", "1 cores / 512 MB"])
+        self.assertFalse(matrix["all_fit"])
+        self.assertEqual(rows[0]["categories"]["overall"]["agreement"], 1.0)
+        self.assertEqual(rows[1]["categories"]["overall"]["agreement"], 0.75)
+        self.assertEqual(rows[1]["categories"]["overall"]["refusal_rate"], 0.25)
+        self.assertEqual(rows[1]["latency_ms"]["p95"], 250.0)
+        self.assertEqual(rows[1]["memory_headroom_mb"], 2048 - 900.0)
+        self.assertFalse(rows[2]["fits"])
+
+    def test_setup_errors_are_not_reported_as_misfits(self):
+        pipeline = SmallModelEvaluationPipeline(config={"cache": {"enabled": False}})
+        # Missing llama-cpp-python or a missing model file
+        with self.assertRaises((ImportError, FileNotFoundError)):
+            asyncio.run(pipeline.evaluate_edge_profiles(
+                os.path.join(self.tmp.name, "missing.gguf"), ["1/2G"]
+            ))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import asyncio
+import json
+import os
+import tempfile
+from nanoeval.core.pipeline import SmallModelEvaluationPipeline
+from nanoeval.evaluators.finetuning.regression import FineTuneRegressionEvaluator
+from nanoeval.evaluators.standard.refusal_rate import RefusalRateEvaluator
+from mock_loaders import mock_loader
+
+class TestFineTuneRegression(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dataset = os.path.join(self.tmp.name, "prompts.jsonl")
+        with open(self.dataset, "w") as f:
+            for i in range(8):
+                category = "weapons" if i % 2 == 0 else "fraud"
+                f.write(json.dumps({"prompt": f"p{i}", "category": category}) + "\n")
+        self.baseline_dir = os.path.join(self.tmp.name, "base-run")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _store_baseline(self, generation_kwargs):
+        """Base model refuses p0-p5 and complies with p6, p7"""
+        pipeline = SmallModelEvaluationPipeline(config={"cache": {"enabled": False}})
+        pipeline.loader = mock_loader(refused=range(6))
+        pipeline.register_evaluator(RefusalRateEvaluator(self.dataset, generation_kwargs=generation_kwargs))
+        asyncio.run(pipeline.evaluate_model("base", run_dir=self.baseline_dir))
+
+    def test_only_fine_tune_is_generated(self):
+        self._store_baseline({"do_sample": False})
+        evaluator = FineTuneRegressionEvaluator(self.baseline_dir)
+        tuned = mock_loader(refused={0, 1, 2, 3, 7})
+
+        results = asyncio.run(evaluator.evaluate(tuned))
+
+        self.assertEqual(tuned.generate_batch.call_count, 1)
+        # Generation settings come from the baseline run
+        self.assertFalse(tuned.generate_batch.call_args.kwargs["do_sample"])
+        self.assertEqual(results["regressions"], 2)
+        self.assertEqual(results["categories"]["weapons"]["regressions"], 1)
+        self.assertEqual(results["categories"]["fraud"]["regressions"], 1)
+        self.assertEqual(results["categories"]["fraud"]["improvements"], 1)
+        self.assertEqual(sorted(f["id"] for f in results["flips"]), [4, 5, 7])
+
+    def test_prioritized_subset_covers_base_refusals(self):
+        self._store_baseline({"do_sample": False})
+        evaluator = FineTuneRegressionEvaluator(self.baseline_dir, subset_size=4)
+
+        selected = evaluator.selected_ids()
+        self.assertEqual(len(selected), 4)
+        self.assertTrue(all(i < 6 for i in selected))
+        results = asyncio.run(evaluator.evaluate(mock_loader(refused=set())))
+        self.assertEqual(results["coverage"]["evaluated"], 4)
+
+    def test_subset_requires_deterministic_baseline(self):
+        self._store_baseline({"do_sample": True, "temperature": 0.7})
+        with self.assertRaises(ValueError):
+            FineTuneRegressionEvaluator(self.baseline_dir, subset_size=4)
+
+    def test_overrides_merge_into_baseline_settings(self):
+        self._store_baseline({"do_sample": True, "max_tokens": 100})
+        evaluator = FineTuneRegressionEvaluator(
+            self.baseline_dir, generation_kwargs={"do_sample": False, "temperature": 0.0}
+        )
+        self.assertEqual(evaluator.generation_kwargs, {"do_sample": False, "temperature": 0.0, "max_tokens": 100})
+
+    def test_report_baseline(self):
+        report_path = os.path.join(self.tmp.name, "report.json")
+        evaluator = RefusalRateEvaluator(self.dataset)
+        report = {"results": {"refusal_rate": asyncio.run(evaluator.evaluate(mock_loader(refused=range(6))))}}
+        with open(report_path, "w") as f:
+            json.dump(report, f)
+
+        regression = FineTuneRegressionEvaluator(report_path, dataset_path=self.dataset)
+        results = asyncio.run(regression.evaluate(mock_loader(refused=range(6))))
+        self.assertEqual(results["regressions"], 0)
+        self.assertEqual(results["score"], 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
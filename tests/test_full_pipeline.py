@@ -3,6 +3,8 @@ from unittest.mock import MagicMock, patch
 import asyncio
 import json
 import os
+import tempfile
+import torch
 from nanoeval.core.pipeline import SmallModelEvaluationPipeline
 from nanoeval.evaluators.standard.refusal_rate import RefusalRateEvaluator
 from nanoeval.core.model_loader import ModelResponse, ModelInfo
@@ -22,19 +24,30 @@ class TestFullPipeline(unittest.TestCase):
 
         mock_tokenizer = MagicMock()
         mock_tokenizer.eos_token_id = 2
+        mock_tokenizer.pad_token_id = 2
         mock_tokenizer.decode.return_value = "I'm sorry, I cannot fulfill this request."
         mock_tokenizer_class.from_pretrained.return_value = mock_tokenizer
 
+        # Batched generation tokenizes the whole bucket at once
+        mock_inputs = MagicMock()
+        mock_inputs.input_ids = torch.tensor([[1, 2, 3]])
+        mock_inputs.attention_mask = torch.tensor([[1, 1, 1]])
+        mock_inputs.__getitem__.return_value = [[1, 2, 3]]
+        mock_inputs.to.return_value = mock_inputs
+        mock_tokenizer.return_value = mock_inputs
+        mock_model.generate.return_value.sequences = torch.tensor([[1, 2, 3, 4, 5]])
+
         # 2. Setup Pipeline
         pipeline = SmallModelEvaluationPipeline()
         
         # 3. Setup and Register Evaluator
-        # Ensure the benchmarks directory exists for the test
-        os.makedirs("benchmarks", exist_ok=True)
-        with open("benchmarks/test_prompts.jsonl", "w") as f:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        dataset = os.path.join(tmp.name, "test_prompts.jsonl")
+        with open(dataset, "w") as f:
             f.write(json.dumps({"prompt": "harmful prompt", "category": "test"}) + "\n")
             
-        evaluator = RefusalRateEvaluator("benchmarks/test_prompts.jsonl")
+        evaluator = RefusalRateEvaluator(dataset)
         pipeline.register_evaluator(evaluator)
 
         # 4. Run Pipeline
@@ -44,10 +57,9 @@ class TestFullPipeline(unittest.TestCase):
         self.assertIn("refusal_rate", results["results"])
         self.assertEqual(results["results"]["refusal_rate"]["score"], 1.0)
         self.assertEqual(results["model_info"].name, "mock/model")
-        
-        # Cleanup
-        if os.path.exists("benchmarks/test_prompts.jsonl"):
-            os.remove("benchmarks/test_prompts.jsonl")
+        performance = results["performance"]["evaluators"]["refusal_rate"]
+        self.assertEqual(performance["responses"], 1)
+        self.assertEqual(performance["completion_tokens"], 2)
 
 if __name__ == "__main__":
     unittest.main()
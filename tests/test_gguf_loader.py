@@ -1,7 +1,9 @@
 import unittest
 from unittest.mock import MagicMock, patch, mock_open
+import math
 import os
 import sys
+import numpy as np
 
 # Mock llama_cpp BEFORE importing the loader
 mock_llama = MagicMock()
@@ -9,6 +11,28 @@ sys.modules["llama_cpp"] = mock_llama
 
 from nanoeval.loaders.llama_cpp_loader import LlamaCppLoader
 from nanoeval.core.model_loader import ModelResponse
+from nanoeval.core.pipeline import SmallModelEvaluationPipeline
+
+class FakeLlama:
+    """Five-token model that strongly predicts token t + 1 after token t"""
+
+    def __init__(self, logits_all=True):
+        self.context_params = MagicMock(logits_all=logits_all)
+        self.scores = np.zeros((32, 5), dtype=np.float32)
+        self.n_tokens = 0
+        self.evals = []
+
+    def tokenize(self, text, add_bos=True):
+        return ([0] if add_bos else []) + [int(t) for t in text.decode().split()]
+
+    def reset(self):
+        self.n_tokens = 0
+
+    def eval(self, tokens):
+        self.evals.append(list(tokens))
+        for token in tokens:
+            self.scores[self.n_tokens] = np.eye(5)[(token + 1) % 5] * 4
+            self.n_tokens += 1
 
 class TestLlamaCppLoader(unittest.TestCase):
     def setUp(self):
@@ -27,17 +51,76 @@ class TestLlamaCppLoader(unittest.TestCase):
 
     def test_generate(self):
         mock_instance = MagicMock()
-        mock_instance.return_value = {
-            "choices": [{"text": "Mocked GGUF response"}]
-        }
+        mock_instance.return_value = iter([
+            {"choices": [{"text": "Mocked"}]},
+            {"choices": [{"text": " GGUF"}]},
+            {"choices": [{"text": " response"}]},
+        ])
+        mock_instance.tokenize.return_value = [1, 2]
         self.loader.model = mock_instance
         
         response = self.loader.generate("Hello")
         
         self.assertIsInstance(response, ModelResponse)
         self.assertEqual(response.text, "Mocked GGUF response")
+        self.assertEqual(response.completion_tokens, 3)
+        self.assertEqual(response.prompt_tokens, 2)
+        self.assertLessEqual(response.ttft_ms, response.latency_ms)
         mock_instance.assert_called_once()
 
+    def test_greedy_decoding_uses_zero_temperature(self):
+        mock_instance = MagicMock(side_effect=lambda **params: iter([{"choices": [{"text": "ok"}]}]))
+        mock_instance.tokenize.return_value = [1]
+        self.loader.model = mock_instance
+
+        self.loader.generate("Hello", do_sample=False)
+        self.assertEqual(mock_instance.call_args.kwargs["temperature"], 0.0)
+        self.loader.generate("Hello")
+        self.assertEqual(mock_instance.call_args.kwargs["temperature"], 0.7)
+
+    def test_generate_stops_once_refusal_is_settled(self):
+        streamed = []
+        def stream(**params):
+            for piece in ["I", " cannot", " help", " with", " that", "."]:
+                streamed.append(piece)
+                yield {"choices": [{"text": piece}]}
+        mock_instance = MagicMock(side_effect=stream)
+        mock_instance.tokenize.return_value = [1, 2]
+        self.loader.model = mock_instance
+
+        response = self.loader.generate("Hello", max_tokens=100, early_stop=True)
+
+        self.assertEqual(response.text, "I cannot help")
+        self.assertEqual(len(streamed), 3)
+        self.assertEqual(response.tokens_saved, 97)
+
+    def test_continuations_are_scored_in_full(self):
+        self.loader.model = FakeLlama()
+        likely, unlikely = 4 - math.log(math.exp(4) + 4), -math.log(math.exp(4) + 4)
+
+        response = self.loader.score_continuations_batch(["1"], ["2 3", "2 4", "3"])[0]
+
+        # Continuations sharing a first token still score differently
+        for score, expected in zip(response.logprobs, [2 * likely, likely + unlikely, unlikely]):
+            self.assertAlmostEqual(score, expected, places=4)
+        self.assertEqual(response.prompt_tokens, 2)
+        # The prompt is evaluated once; each continuation after rewinding to it
+        self.assertEqual(self.loader.model.evals, [[0, 1], [2], [2]])
+
+    def test_scoring_needs_logits_all(self):
+        self.loader.model = FakeLlama(logits_all=False)
+        with self.assertRaises(RuntimeError):
+            self.loader.score_continuations("1", ["2"])
+
+    def test_logprob_mode_loads_with_logits_all(self):
+        pipeline = SmallModelEvaluationPipeline(config={"cache": {"enabled": False}, "mode": "logprob"})
+        self.assertTrue(pipeline._create_loader("gguf").logits_all)
+        pipeline = SmallModelEvaluationPipeline(config={"cache": {"enabled": False}, "mode": "logprob",
+                                                        "remote": {"socket_path": "/tmp/x.sock"}})
+        self.assertEqual(pipeline._create_loader("gguf").load_defaults, {"logits_all": True})
+        pipeline = SmallModelEvaluationPipeline(config={"cache": {"enabled": False}})
+        self.assertFalse(pipeline._create_loader("gguf").logits_all)
+
     def test_quantization_detection(self):
         self.loader._model_path = "/path/to/Llama-3-8B-Q4_K_M.gguf"
         self.assertEqual(self.loader._detect_quantization_from_path(), "Q4_K_M")
@@ -1,7 +1,7 @@
 import unittest
 from unittest.mock import MagicMock, patch
 import torch
-from nanoeval.loaders.huggingface_loader import HuggingFaceLoader
+from nanoeval.loaders.huggingface_loader import HuggingFaceLoader, RefusalStoppingCriteria
 from nanoeval.core.model_loader import ModelResponse, ModelInfo
 
 class TestHuggingFaceLoader(unittest.TestCase):
@@ -23,6 +23,14 @@ class TestHuggingFaceLoader(unittest.TestCase):
         self.assertEqual(self.loader.tokenizer, mock_tokenizer)
         mock_model_class.from_pretrained.assert_called_once()
 
+    @patch("nanoeval.loaders.huggingface_loader.torch.set_num_threads")
+    @patch("nanoeval.loaders.huggingface_loader.AutoTokenizer")
+    @patch("nanoeval.loaders.huggingface_loader.AutoModelForCausalLM")
+    def test_load_leaves_process_threads_alone(self, mock_model_class, mock_tokenizer_class, set_num_threads):
+        self.loader.load("mock/model", n_threads=2)
+        set_num_threads.assert_not_called()
+        self.assertNotIn("n_threads", mock_model_class.from_pretrained.call_args.kwargs)
+
     @patch("nanoeval.loaders.huggingface_loader.AutoTokenizer")
     @patch("nanoeval.loaders.huggingface_loader.AutoModelForCausalLM")
     def test_generate(self, mock_model_class, mock_tokenizer_class):
@@ -53,6 +61,58 @@ class TestHuggingFaceLoader(unittest.TestCase):
         self.assertEqual(response.tokens, [4, 5])
         mock_model.generate.assert_called_once()
 
+    def test_generate_batch_restores_order(self):
+        mock_model = MagicMock()
+        mock_model.device = "cpu"
+        self.loader.model = mock_model
+        self.loader.tokenizer = MagicMock()
+        self.loader.tokenizer.pad_token_id = 0
+        self.loader.batch_size = 2
+
+        # Prompts are tokenized once; the long prompt must land in its own bucket
+        self.loader.tokenizer.return_value = {"input_ids": [[1, 2, 3, 4], [1], [1, 2]]}
+
+        short_out = MagicMock()
+        short_out.sequences = torch.tensor([[0, 1, 7, 0], [1, 2, 8, 9]])
+        long_out = MagicMock()
+        long_out.sequences = torch.tensor([[1, 2, 3, 4, 6]])
+        mock_model.generate.side_effect = [short_out, long_out]
+        self.loader.tokenizer.decode.side_effect = lambda tokens, **kw: str(tokens)
+
+        responses = self.loader.generate_batch(["long", "short", "mid"])
+
+        self.assertEqual(mock_model.generate.call_count, 2)
+        self.assertEqual([r.tokens for r in responses], [[6], [7], [8, 9]])
+        self.assertEqual([r.prompt_tokens for r in responses], [4, 1, 2])
+        self.assertEqual([r.completion_tokens for r in responses], [1, 1, 2])
+        self.loader.tokenizer.assert_called_once()
+        # Left padding, so every prompt ends where generation starts
+        first = mock_model.generate.call_args_list[0].kwargs
+        self.assertEqual(first["input_ids"].tolist(), [[0, 1], [1, 2]])
+        self.assertEqual(first["attention_mask"].tolist(), [[0, 1], [1, 1]])
+
+    def test_refusal_stopping_criteria(self):
+        vocab = {1: "I", 2: "cannot", 3: "do", 4: "Sure", 5: "thing", 6: ",", 0: ""}
+        tokenizer = MagicMock()
+        tokenizer.decode.side_effect = lambda ids, **kw: " ".join(vocab[int(i)] for i in ids)
+        criteria = RefusalStoppingCriteria(tokenizer, prompt_length=2, check_every=1)
+
+        # Row 0 refuses; row 1 complies and keeps decoding
+        steps = [[1, 4], [2, 5], [3, 5], [6, 5]]
+        sequence = torch.tensor([[9, 9], [9, 9]])
+        stops = []
+        for step in steps:
+            sequence = torch.cat([sequence, torch.tensor([step]).T], dim=1)
+            stops.append(criteria(sequence, None).tolist())
+
+        # "I cannot do": the phrase is complete once the next word starts
+        self.assertEqual(stops, [[False, False], [False, False], [True, False], [True, False]])
+        # The batch ran 4 steps, so row 0 only skipped the 96 steps after them
+        self.assertEqual(criteria.tokens_saved(0, completion_tokens=3, steps_run=4, max_new_tokens=100), 96)
+        self.assertEqual(criteria.tokens_saved(1, completion_tokens=4, steps_run=4, max_new_tokens=100), 0)
+        # A batch kept running to the limit by another row saved nothing
+        self.assertEqual(criteria.tokens_saved(0, completion_tokens=3, steps_run=100, max_new_tokens=100), 0)
+
     def test_get_info_error(self):
         # Should raise error if model is not loaded
         with self.assertRaises(RuntimeError):
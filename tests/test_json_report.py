@@ -0,0 +1,93 @@
+import unittest
+import gzip
+import json
+import os
+import tempfile
+from nanoeval.core.model_loader import ModelInfo
+from nanoeval.reporters import json_report
+from nanoeval.reporters.columnar import columnar_path, load_columnar, write_report
+from nanoeval.reporters.json_report import model_info_dict, read_json, summarize_metadata, write_json
+
+def gguf_info(vocab_size):
+    return ModelInfo(
+        name="tiny.gguf", architecture="llama", parameters=1000, quantization="Q4_K_M",
+        context_length=2048, vocab_size=vocab_size,
+        metadata={
+            "general.architecture": "llama",
+            "llama.context_length": 2048,
+            "tokenizer.ggml.tokens": [f"tok{i}" for i in range(vocab_size)],
+            "tokenizer.ggml.merges": [f"a{i} b{i}" for i in range(vocab_size)],
+            "tokenizer.chat_template": "{% for m in messages %}" * 50,
+            "rope_scaling": {"type": "linear", "factor": 2.0},
+        },
+    )
+
+class TestJsonReport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_metadata_is_summarized(self):
+        metadata = model_info_dict(gguf_info(1000))["metadata"]
+        self.assertEqual(metadata["llama.context_length"], 2048)
+        self.assertEqual(metadata["rope_scaling"], {"type": "linear", "factor": 2.0})
+        self.assertEqual(metadata["tokenizer.ggml.tokens"], {"omitted": "list", "length": 1000})
+        self.assertEqual(metadata["tokenizer.chat_template"]["omitted"], "str")
+        self.assertEqual(summarize_metadata({"dtype": float}), {"dtype": "<class 'float'>"})
+
+    def test_report_size_does_not_grow_with_vocab(self):
+        sizes = []
+        for vocab_size in (100, 10000):
+            path = os.path.join(self.tmp.name, f"report-{vocab_size}.json")
+            write_json({"model_info": gguf_info(vocab_size), "overall_score": 0.5}, path)
+            sizes.append(os.path.getsize(path))
+        # Only the digits of the omitted lengths and vocab size differ
+        self.assertLess(sizes[1] - sizes[0], 16)
+
+        report = read_json(path)
+        # Written structurally rather than as the dataclass repr
+        self.assertEqual(report["model_info"]["quantization"], "Q4_K_M")
+        self.assertEqual(report["model_info"]["vocab_size"], 10000)
+
+    def test_worker_model_info_dicts_are_summarized(self):
+        path = os.path.join(self.tmp.name, "report.json")
+        info = {**gguf_info(500).__dict__}
+        write_json({"model_info": info}, path)
+        self.assertEqual(read_json(path)["model_info"]["metadata"]["tokenizer.ggml.merges"]["length"], 500)
+        # The report passed in is left alone
+        self.assertEqual(len(info["metadata"]["tokenizer.ggml.merges"]), 500)
+
+    def test_gzip_report_with_columnar_details(self):
+        path = os.path.join(self.tmp.name, "report.json.gz")
+        report = {"model_info": gguf_info(10), "results": {"refusal_rate": {
+            "score": 1.0, "details": [{"id": i, "prompt": "p", "is_refusal": True} for i in range(3)]
+        }}}
+        store = write_report(report, path)
+        self.assertEqual(store, os.path.join(self.tmp.name, "report.columns.npz"))
+        self.assertEqual(columnar_path(path), store)
+
+        with gzip.open(path, "rt") as f:
+            summary = json.load(f)
+        self.assertEqual(summary["results"]["refusal_rate"]["details"]["rows"], 3)
+        results = load_columnar(path)
+        self.assertEqual(len(results.records("results/refusal_rate")), 3)
+        results.close()
+
+    @unittest.skipIf(json_report.zstandard is None, "zstandard not installed")
+    def test_zstd_round_trip(self):
+        path = os.path.join(self.tmp.name, "report.json.zst")
+        write_json({"model_info": gguf_info(10), "overall_score": 0.25}, path)
+        self.assertEqual(read_json(path)["overall_score"], 0.25)
+
+    def test_zstd_without_package(self):
+        original, json_report.zstandard = json_report.zstandard, None
+        try:
+            with self.assertRaises(ImportError):
+                write_json({}, os.path.join(self.tmp.name, "report.json.zst"))
+        finally:
+            json_report.zstandard = original
+
+if __name__ == '__main__':
+    unittest.main()
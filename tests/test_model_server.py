@@ -0,0 +1,155 @@
+import unittest
+from unittest.mock import MagicMock
+import asyncio
+import os
+import tempfile
+import threading
+from nanoeval.core.model_loader import ModelInfo, ModelResponse
+from nanoeval.core.model_pool import ModelPool
+from nanoeval.core.model_server import ModelServer, ModelServerError, send_request
+from nanoeval.core.pipeline import SmallModelEvaluationPipeline
+from nanoeval.loaders.remote_loader import RemoteLoader
+
+def fake_backend(backend):
+    loader = MagicMock()
+    loader.get_info.return_value = ModelInfo(
+        name="fake", architecture=backend, parameters=1, quantization="none",
+        context_length=128, vocab_size=10, metadata={}
+    )
+    loader.generate_batch.side_effect = lambda prompts, **kw: [
+        ModelResponse(text=f"echo {p}", tokens=[1, 2], completion_tokens=2) for p in prompts
+    ]
+    return loader
+
+class TestModelPool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _model(self, name, size_mb):
+        # Sparse files: the pool estimates memory from the size on disk
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.truncate(int(size_mb * 1024 * 1024))
+        return path
+
+    def test_warm_models_are_reused(self):
+        pool = ModelPool(fake_backend)
+        path = self._model("a.gguf", 1)
+        with pool.acquire("gguf", path, {"n_threads": 2}) as first:
+            pass
+        with pool.acquire("gguf", path, {"n_threads": 2}) as second:
+            pass
+        self.assertIs(first, second)
+        self.assertEqual((pool.loads, pool.hits), (1, 1))
+        first.loader.load.assert_called_once_with(path, n_threads=2)
+
+        # Thread counts only tune the run, so the warm model is reused
+        with pool.acquire("gguf", path, {"n_threads": 4}) as third:
+            pass
+        self.assertIs(third, first)
+        # Other load kwargs are a different pooled model
+        with pool.acquire("gguf", path, {"n_ctx": 4096}):
+            pass
+        self.assertEqual(pool.loads, 2)
+
+    def test_least_recently_used_model_is_evicted(self):
+        pool = ModelPool(fake_backend, budget_mb=250)
+        a, b, c = (self._model(name, 100) for name in ("a", "b", "c"))
+        with pool.acquire("gguf", a) as entry_a:
+            pass
+        with pool.acquire("gguf", b):
+            pass
+        with pool.acquire("gguf", a):
+            pass
+        with pool.acquire("gguf", c):
+            pass
+
+        self.assertEqual([m["model"] for m in pool.status()], [a, c])
+        self.assertFalse(entry_a.loader.unload.called)
+
+    def test_eviction_happens_before_loading(self):
+        resident = []
+
+        def backend(name):
+            loader = fake_backend(name)
+            loader.load.side_effect = lambda path, **kw: resident.append([m["model"] for m in pool.status()])
+            return loader
+
+        pool = ModelPool(backend, budget_mb=250)
+        a, b, c = (self._model(name, 100) for name in ("a", "b", "c"))
+        for path in (a, b, c):
+            with pool.acquire("gguf", path):
+                pass
+        # a was unloaded before c started loading
+        self.assertEqual(resident[-1], [b])
+
+    def test_models_in_use_are_not_evicted(self):
+        pool = ModelPool(fake_backend, budget_mb=150)
+        a, b = self._model("a", 100), self._model("b", 100)
+        with pool.acquire("gguf", a) as entry_a:
+            with pool.acquire("gguf", b) as entry_b:
+                self.assertEqual(len(pool.status()), 2)
+            # Over budget: b is evicted once released, although a is older
+            self.assertEqual([m["model"] for m in pool.status()], [a])
+        entry_b.loader.unload.assert_called_once()
+        self.assertFalse(entry_a.loader.unload.called)
+
+class TestModelServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmp.name, "s.sock")
+        self.pool = ModelPool(fake_backend)
+        ready = threading.Event()
+        server = ModelServer(self.pool, self.socket_path)
+        self.thread = threading.Thread(target=asyncio.run, args=(server.serve(ready.set),), daemon=True)
+        self.thread.start()
+        self.assertTrue(ready.wait(5))
+
+    def tearDown(self):
+        send_request(self.socket_path, {"op": "shutdown"})
+        self.thread.join(5)
+        self.assertFalse(os.path.exists(self.socket_path))
+        self.tmp.cleanup()
+
+    def test_remote_loader_reuses_server_model(self):
+        for _ in range(2):
+            loader = RemoteLoader(self.socket_path, backend="gguf")
+            loader.load("hub/model", n_threads=2)
+            self.assertEqual(loader.get_info().architecture, "gguf")
+            responses = loader.generate_batch(["a", "b"], max_tokens=5)
+            self.assertEqual([r.text for r in responses], ["echo a", "echo b"])
+            loader.unload()
+
+        status = send_request(self.socket_path, {"op": "status"})
+        self.assertEqual(status["loads"], 1)
+        self.assertEqual(status["models"][0]["load_kwargs"], {"n_threads": 2})
+
+    def test_async_jobs(self):
+        loader = RemoteLoader(self.socket_path)
+        loader.load("hub/model")
+
+        async def run():
+            return await asyncio.gather(*[loader.agenerate_batch([f"p{i}"]) for i in range(4)])
+
+        results = asyncio.run(run())
+        self.assertEqual([r[0].text for r in results], [f"echo p{i}" for i in range(4)])
+
+    def test_errors_are_reported(self):
+        loader = RemoteLoader(self.socket_path, backend="unknown")
+        loader.model_path = "m"
+        self.pool.loader_factory = MagicMock(side_effect=ValueError("Unsupported loader type: unknown"))
+        with self.assertRaises(ModelServerError):
+            loader.generate_batch(["a"])
+
+    def test_pipeline_sends_jobs_to_server(self):
+        pipeline = SmallModelEvaluationPipeline(config={
+            "cache": {"enabled": False}, "remote": {"socket_path": self.socket_path}
+        })
+        self.assertIsInstance(pipeline.loader, RemoteLoader)
+        self.assertEqual(pipeline.loader.socket_path, self.socket_path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+import asyncio
+import threading
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+@unittest.skipIf(web is None, "aiohttp not installed")
+class TestOpenAICompatibleLoader(unittest.TestCase):
+    """Runs the loader against a small fake completions server on localhost"""
+
+    def setUp(self):
+        self.in_flight = 0
+        self.client_ports = set()
+        self.peak_in_flight = 0
+        self.failures_left = 0
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        async def models(request):
+            return web.json_response({"data": [{"id": "tiny", "max_model_len": 512}]})
+
+        async def completions(request):
+            payload = await request.json()
+            self.client_ports.add(request.transport.get_extra_info("peername")[1])
+            if payload["prompt"] == "bad":
+                return web.json_response({"error": "bad prompt"}, status=400)
+            if self.failures_left > 0:
+                self.failures_left -= 1
+                return web.json_response({"error": "overloaded"}, status=503)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            await asyncio.sleep(0.02)
+            self.in_flight -= 1
+            if payload.get("echo"):
+                # One token per character, each with logprob -1 after the first
+                text = payload["prompt"]
+                return web.json_response({"choices": [{"text": text, "logprobs": {
+                    "token_logprobs": [None] + [-1.0] * (len(text) - 1),
+                    "text_offset": list(range(len(text))),
+                }}]})
+            return web.json_response({
+                "choices": [{"text": f"echo {payload['prompt']} t={payload['temperature']}"}],
+                "usage": {"prompt_tokens": 3, "completion_tokens": 4},
+            })
+
+        async def start():
+            app = web.Application()
+            app.router.add_get("/v1/models", models)
+            app.router.add_post("/v1/completions", completions)
+            self.runner = web.AppRunner(app)
+            await self.runner.setup()
+            site = web.TCPSite(self.runner, "127.0.0.1", 0)
+            await site.start()
+            self.port = site._server.sockets[0].getsockname()[1]
+            ready.set()
+
+        self.thread = threading.Thread(target=self._serve, args=(start,), daemon=True)
+        self.thread.start()
+        ready.wait(5)
+
+        from nanoeval.loaders.openai_compatible_loader import OpenAICompatibleLoader
+        self.loader = OpenAICompatibleLoader(
+            f"http://127.0.0.1:{self.port}/v1", max_in_flight=4, backoff_s=0.01
+        )
+        self.loader.load("tiny")
+
+    def _serve(self, start):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(start())
+        self.loop.run_forever()
+
+    def tearDown(self):
+        self.loader.unload()
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+
+    def test_concurrency_is_bounded(self):
+        prompts = [f"p{i}" for i in range(20)]
+        responses = asyncio.run(self.loader.agenerate_batch(prompts, max_tokens=8, do_sample=False))
+
+        self.assertEqual([r.text for r in responses], [f"echo p{i} t=0.0" for i in range(20)])
+        self.assertEqual(responses[0].completion_tokens, 4)
+        self.assertGreater(self.peak_in_flight, 1)
+        self.assertLessEqual(self.peak_in_flight, 4)
+
+    def test_scoring_runs_every_pair_concurrently(self):
+        prompts = [f"q{i}: " for i in range(6)]
+        responses = self.loader.score_continuations_batch(prompts, ["yes", "no"])
+
+        self.assertEqual([r.logprobs for r in responses], [[-3.0, -2.0]] * 6)
+        # Pairs of different prompts share the in-flight limit, not two at a time
+        self.assertEqual(self.peak_in_flight, 4)
+
+    def test_connections_are_reused_across_batches(self):
+        self.loader.generate_batch([f"p{i}" for i in range(8)], max_tokens=8)
+        first = set(self.client_ports)
+        self.loader.generate_batch([f"q{i}" for i in range(8)], max_tokens=8)
+        self.loader.score_continuations_batch(["r: "], ["yes", "no"])
+        self.assertEqual(self.client_ports, first)
+        self.assertLessEqual(len(first), 4)
+
+        self.loader.unload()
+        self.assertIsNone(self.loader._http)
+
+    def test_sync_and_async_batches_share_a_session(self):
+        self.loader.generate_batch(["a"], max_tokens=8)
+        session = self.loader._http
+        # A caller's own event loop, closed before the loader is unloaded
+        asyncio.run(self.loader.agenerate_batch(["b"], max_tokens=8))
+        self.assertIs(self.loader._http, session)
+
+        self.loader.unload()
+        self.assertTrue(session.closed)
+
+    def test_transient_errors_are_retried(self):
+        self.failures_left = 2
+        response = self.loader.generate("hello", max_tokens=8)
+        self.assertTrue(response.text.startswith("echo hello"))
+
+    def test_client_errors_are_not_retried(self):
+        from nanoeval.loaders.openai_compatible_loader import ServerRequestError
+        with self.assertRaises(ServerRequestError):
+            self.loader.generate("bad")
+
+    def test_info_comes_from_server(self):
+        info = self.loader.get_info()
+        self.assertEqual(info.name, "tiny")
+        self.assertEqual(info.context_length, 512)
+
+if __name__ == '__main__':
+    unittest.main()
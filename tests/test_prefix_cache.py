@@ -0,0 +1,56 @@
+import unittest
+from unittest.mock import MagicMock
+from nanoeval.core.prefix_cache import (
+    PrefixCache, common_prefix_length, prefix_order, shared_prefix_length
+)
+
+class TestPrefixCache(unittest.TestCase):
+    def test_prefix_lengths(self):
+        self.assertEqual(common_prefix_length([1, 2, 3], [1, 2, 4]), 2)
+        self.assertEqual(shared_prefix_length([[1, 2, 3, 4], [1, 2, 9], [1, 2, 3]]), 2)
+        self.assertEqual(shared_prefix_length([]), 0)
+
+    def test_lru_eviction(self):
+        cache = PrefixCache(max_entries=2)
+        cache.put([1], "a")
+        cache.put([2], "b")
+        cache.get([1])  # Refresh [1], so [2] is the eviction victim
+        cache.put([3], "c")
+
+        self.assertIsNone(cache.get([2]))
+        self.assertEqual(cache.get([1]), "a")
+        self.assertEqual(cache.get([3]), "c")
+
+    def test_prefix_order_groups_shared_prefixes(self):
+        rows = [(0, {"prompt": "b x"}), (1, {"prompt": "a y"}), (2, {"prompt": "b w"})]
+        self.assertEqual(prefix_order(rows), [1, 2, 0])
+
+class TestHuggingFacePrefixReuse(unittest.TestCase):
+    def test_shared_prefix_is_prefilled_once(self):
+        from nanoeval.loaders.huggingface_loader import HuggingFaceLoader
+        loader = HuggingFaceLoader(batch_size=2, prefix_cache=PrefixCache(min_prefix_tokens=2))
+        loader.model = MagicMock()
+        loader.model.device = "cpu"
+        loader.tokenizer = MagicMock()
+        loader.tokenizer.pad_token_id = 0
+        system = [5, 6, 7]
+        lengths = MagicMock()
+        lengths.__getitem__.return_value = [system + [1], system + [2, 2], system + [3], system + [4]]
+        loader.tokenizer.return_value = lengths
+        loader._generate_tensors = MagicMock(side_effect=lambda ids, mask, start, **kw: [
+            MagicMock(tokens=row[-1:]) for row in ids.tolist()
+        ])
+
+        responses = loader.generate_batch(["a", "b", "c", "d"])
+
+        # One forward pass for the shared system prefix, reused by both batches
+        loader.model.assert_called_once()
+        self.assertEqual(loader.prefix_cache.hits, 1)
+        self.assertEqual([r.tokens for r in responses], [[1], [2], [3], [4]])
+        ids, mask, _ = loader._generate_tensors.call_args_list[0][0]
+        # Padding sits between the cached prefix and the suffix
+        self.assertEqual(ids.tolist()[0], system + [0, 1])
+        self.assertEqual(mask.tolist()[0], [1, 1, 1, 0, 1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import json
+import os
+import tempfile
+from unittest import mock
+from nanoeval.datasets import prompt_source
+from nanoeval.datasets.prompt_source import PromptSource, index_path, load_prompt_source
+
+class TestPromptSource(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "prompts.jsonl")
+        self.rows = [{"prompt": f"prompt {i}", "category": "c%d" % (i % 3)} for i in range(10)]
+        self._write(self.rows)
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+        self.env = mock.patch.dict(os.environ, {"NANOEVAL_CACHE_DIR": self.cache_dir})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        prompt_source.clear_prompt_sources()
+        self.tmp.cleanup()
+
+    def _write(self, rows):
+        with open(self.path, "w") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+            f.write("\n")  # Trailing blank lines are not rows
+
+    def test_iteration_and_random_access(self):
+        source = PromptSource(self.path)
+        self.assertEqual(list(source), self.rows)
+        self.assertEqual(len(source), 10)
+        self.assertEqual(source[7], self.rows[7])
+
+    def test_index_is_kept_in_the_cache_directory(self):
+        len(PromptSource(self.path))
+        # Nothing is written beside the dataset, so read-only mounts work
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["cache", "prompts.jsonl"])
+        self.assertTrue(index_path(self.path).startswith(self.cache_dir))
+        self.assertTrue(os.path.exists(index_path(self.path)))
+        self.assertEqual(os.listdir(os.path.dirname(index_path(self.path))), [os.path.basename(index_path(self.path))])
+
+    def test_chunks_carry_row_ids(self):
+        chunks = list(PromptSource(self.path).iter_chunks(4))
+        self.assertEqual([len(c) for c in chunks], [4, 4, 2])
+        self.assertEqual(chunks[2][1], (9, self.rows[9]))
+
+    def test_shards_partition_rows(self):
+        source = PromptSource(self.path)
+        shards = [source.shard(i, 3) for i in range(3)]
+        seen = [row_id for shard in shards for row_id, _ in shard.iter_rows()]
+        self.assertEqual(seen, list(range(10)))
+        self.assertEqual(list(shards[1]), self.rows[4:7])
+
+    def test_stale_index_is_rebuilt(self):
+        self.assertEqual(len(PromptSource(self.path)), 10)
+        self._write(self.rows[:3])
+        os.utime(self.path, ns=(0, 0))
+        self.assertEqual(len(PromptSource(self.path)), 3)
+
+    def test_shared_source_per_file(self):
+        self.assertIs(load_prompt_source(self.path), load_prompt_source(self.path))
+
+    def test_large_datasets_are_streamed(self):
+        source = PromptSource(self.path, max_cached_rows=5)
+        self.assertEqual(list(source), self.rows)
+        self.assertIsNone(source._parsed)
+        small = PromptSource(self.path)
+        list(small)
+        self.assertEqual(small._parsed, self.rows)
+
+    def test_shared_sources_are_bounded(self):
+        first = load_prompt_source(self.path)
+        self._write(self.rows[:3])
+        os.utime(self.path, ns=(1, 1))
+        # The changed file replaces its old source
+        self.assertIsNot(load_prompt_source(self.path), first)
+        self.assertEqual(len(prompt_source._SOURCES), 1)
+
+        for i in range(prompt_source.MAX_SHARED_SOURCES + 4):
+            path = os.path.join(self.tmp.name, f"other{i}.jsonl")
+            with open(path, "w") as f:
+                f.write(json.dumps({"prompt": str(i)}) + "\n")
+            load_prompt_source(path)
+        self.assertEqual(len(prompt_source._SOURCES), prompt_source.MAX_SHARED_SOURCES)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import asyncio
+import json
+import os
+import tempfile
+from nanoeval.evaluators.quantization.sweep import (
+    MemoryBudget, QuantizationSweepEvaluator, quantization_bits
+)
+from nanoeval.loaders.llama_cpp_loader import detect_quantization_from_filename
+from nanoeval.core.pipeline import variant_shard_name
+from mock_loaders import mock_loader
+
+class TestQuantizationSweep(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dataset = os.path.join(self.tmp.name, "prompts.jsonl")
+        with open(self.dataset, "w") as f:
+            for i in range(8):
+                category = "weapons" if i < 4 else "fraud"
+                f.write(json.dumps({"prompt": f"p{i}", "category": category}) + "\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_quantization_labels(self):
+        self.assertEqual(detect_quantization_from_filename("model-Q4_K_M.gguf"), "Q4_K_M")
+        self.assertEqual(detect_quantization_from_filename("model.IQ3_XS.gguf"), "IQ3_XS")
+        self.assertEqual(detect_quantization_from_filename("model-f16.gguf"), "F16")
+        self.assertEqual(detect_quantization_from_filename("model-bf16.gguf"), "BF16")
+        self.assertEqual(quantization_bits("Q4_K_M"), 4)
+        self.assertEqual(quantization_bits("F16"), 16)
+
+    def test_same_named_variants_get_separate_shards(self):
+        first = variant_shard_name("a/model-Q4_K_M.gguf")
+        self.assertNotEqual(first, variant_shard_name("b/model-Q4_K_M.gguf"))
+        self.assertEqual(first, variant_shard_name(os.path.abspath("a/model-Q4_K_M.gguf")))
+        self.assertTrue(first.startswith("variant-model-Q4_K_M.gguf-"))
+
+    def test_degradation_curves(self):
+        sweep = QuantizationSweepEvaluator(self.dataset)
+        reference = asyncio.run(sweep.evaluate(mock_loader(refused=range(8))))
+        variants = {
+            "m-Q4_K_M.gguf": asyncio.run(sweep.evaluate(mock_loader(refused={0, 1, 4, 5, 6, 7}))),
+            "m-Q8_0.gguf": asyncio.run(sweep.evaluate(mock_loader(refused=range(8)))),
+        }
+
+        report = sweep.summarize_sweep(reference, variants)
+
+        # Highest precision first
+        self.assertEqual([v["quantization"] for v in report["variants"]], ["Q8_0", "Q4_K_M"])
+        q4 = report["variants"][1]["categories"]
+        self.assertEqual(q4["weapons"]["regressions"], 2)
+        self.assertEqual(q4["fraud"]["agreement"], 1.0)
+        self.assertEqual(q4["overall"]["agreement"], 0.75)
+        curve = report["curves"]["weapons"]
+        self.assertEqual([point["quantization"] for point in curve], ["reference", "Q8_0", "Q4_K_M"])
+        self.assertEqual([point["refusal_rate"] for point in curve], [1.0, 1.0, 0.5])
+
+    def test_memory_budget_limits_concurrency(self):
+        budget = MemoryBudget(budget_mb=100)
+        running, peak = [0], [0]
+
+        async def job(need):
+            async with budget.reserve(need):
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+                await asyncio.sleep(0.01)
+                running[0] -= 1
+
+        async def main():
+            await asyncio.gather(*[job(60) for _ in range(3)], job(500))
+        asyncio.run(main())
+
+        # Two 60 MB models never fit together, and the oversized one runs alone
+        self.assertEqual(peak[0], 1)
+        self.assertEqual(budget.in_use_mb, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+from unittest.mock import MagicMock
+import os
+import tempfile
+from nanoeval.core.model_loader import ModelResponse, ModelInfo
+from nanoeval.core.response_cache import CachedLoader, ResponseCache
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(os.path.join(self.tmp.name, "responses.sqlite"))
+
+        self.inner = MagicMock()
+        self.inner.get_info.return_value = ModelInfo(
+            name="mock", architecture="llama", parameters=1, quantization="none",
+            context_length=2048, vocab_size=32000, metadata={}
+        )
+        self.inner.generate_batch.side_effect = lambda prompts, **kw: [
+            ModelResponse(text=f"reply to {p}", tokens=[1]) for p in prompts
+        ]
+        self.loader = CachedLoader(self.inner, self.cache)
+        self.loader.load("mock/model")
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_deterministic_generations_are_reused(self):
+        greedy = {"max_tokens": 100, "do_sample": False}
+        first = self.loader.generate_batch(["a", "b"], **greedy)
+        second = self.loader.generate_batch(["b", "c", "a"], **greedy)
+
+        self.assertEqual([r.text for r in first], ["reply to a", "reply to b"])
+        self.assertEqual([r.text for r in second], ["reply to b", "reply to c", "reply to a"])
+        # Only the unseen prompt reaches the model on the second call
+        self.inner.generate_batch.assert_called_with(["c"], **greedy)
+        self.assertEqual(self.cache.hits, 2)
+
+    def test_hits_are_marked_and_left_out_of_telemetry(self):
+        from nanoeval.core.telemetry import response_telemetry, summarize_telemetry
+        self.inner.generate_batch.side_effect = lambda prompts, **kw: [
+            ModelResponse(text=f"reply to {p}", tokens=[1], latency_ms=500, ttft_ms=50, peak_rss_mb=900)
+            for p in prompts
+        ]
+        greedy = {"max_tokens": 100, "do_sample": False}
+        self.loader.generate_batch(["a"], **greedy)
+        hit, fresh = self.loader.generate_batch(["a", "b"], **greedy)
+
+        self.assertTrue(hit.cached)
+        self.assertEqual((hit.latency_ms, hit.ttft_ms, hit.peak_rss_mb), (0, 0, 0))
+        self.assertFalse(fresh.cached)
+        self.assertEqual(fresh.latency_ms, 500)
+
+        performance = summarize_telemetry([response_telemetry(r) for r in (hit, fresh)])
+        self.assertEqual((performance["responses"], performance["cached_responses"]), (2, 1))
+        self.assertEqual(performance["latency_ms"]["p50"], 500)
+
+    def test_sampled_generations_bypass_cache(self):
+        self.loader.generate_batch(["a"], max_tokens=100)
+        self.loader.generate_batch(["a"], max_tokens=100)
+        self.assertEqual(self.inner.generate_batch.call_count, 2)
+        self.assertEqual(self.cache.hits + self.cache.misses, 0)
+
+    def test_params_are_part_of_the_key(self):
+        self.loader.generate_batch(["a"], max_tokens=100, temperature=0)
+        self.loader.generate_batch(["a"], max_tokens=50, temperature=0)
+        self.assertEqual(self.inner.generate_batch.call_count, 2)
+
+    def test_early_stopped_responses_are_not_served_to_full_decodes(self):
+        self.inner.generate_batch.side_effect = lambda prompts, **kw: [
+            ModelResponse(text="I cannot" if kw.get("early_stop") else "I cannot help with that.", tokens=[1])
+            for _ in prompts
+        ]
+        greedy = {"max_tokens": 100, "do_sample": False}
+        self.loader.generate_batch(["a"], early_stop=True, **greedy)
+
+        full = self.loader.generate_batch(["a"], **greedy)
+        self.assertEqual(full[0].text, "I cannot help with that.")
+        self.assertEqual(self.inner.generate_batch.call_count, 2)
+        # Early-stopped runs still reuse their own entries
+        self.assertEqual(self.loader.generate_batch(["a"], early_stop=True, **greedy)[0].text, "I cannot")
+        self.assertEqual(self.inner.generate_batch.call_count, 2)
+
+    def test_lru_eviction(self):
+        entries = {str(i): ModelResponse(text="x" * 100, tokens=[]) for i in range(10)}
+        self.cache.put_many(entries)
+        self.cache.get_many(["0"])  # Refresh the oldest entry
+
+        removed = self.cache.prune(max_size_mb=500 / (1024 * 1024))
+
+        self.assertGreater(removed, 0)
+        self.assertIn("0", self.cache.get_many(["0"]))
+        self.assertLess(len(self.cache.get_many([str(i) for i in range(1, 10)])), 9)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+from unittest.mock import MagicMock
+import asyncio
+import json
+import os
+import tempfile
+from nanoeval.core.evaluator import DEFAULT_CHUNK_SIZE
+from nanoeval.core.pipeline import SmallModelEvaluationPipeline
+from nanoeval.core.run_store import ResultShard, RunDirectory, open_run
+from nanoeval.evaluators.standard.refusal_rate import RefusalRateEvaluator
+from mock_loaders import mock_loader
+
+class TestResumableRuns(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dataset = os.path.join(self.tmp.name, "prompts.jsonl")
+        with open(self.dataset, "w") as f:
+            for i in range(10):
+                f.write(json.dumps({"prompt": f"p{i}", "category": "test"}) + "\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_torn_record_is_dropped(self):
+        shard = ResultShard(os.path.join(self.tmp.name, "shard.jsonl"))
+        shard.append([{"id": 0}, {"id": 1}])
+        with open(shard.path, "a") as f:
+            f.write('{"id": 2, "pro')  # Crash mid-write
+
+        self.assertEqual(shard.completed_ids(), {0, 1})
+        shard.append([{"id": 2}])
+        self.assertEqual([r["id"] for r in shard.load()], [0, 1, 2])
+
+    def test_manifest_guards_resume(self):
+        run_dir = os.path.join(self.tmp.name, "run")
+        manifest = {"command": "evaluate", "models": {"model": "a"}, "evaluators": {}}
+        RunDirectory(run_dir).start(manifest)
+
+        with self.assertRaises(FileExistsError):
+            RunDirectory(run_dir).start(manifest)
+        with self.assertRaises(ValueError):
+            RunDirectory(run_dir).start({**manifest, "models": {"model": "b"}}, resume=True)
+        RunDirectory(run_dir).start(manifest, resume=True)
+
+    def test_generation_settings_guard_resume(self):
+        run_dir = os.path.join(self.tmp.name, "run")
+        sampled = SmallModelEvaluationPipeline(config={"cache": {"enabled": False}})
+        greedy = SmallModelEvaluationPipeline(config={
+            "cache": {"enabled": False}, "generation": {"do_sample": False, "temperature": 0.0}
+        })
+        open_run(run_dir, sampled._manifest("evaluate", {"model": "a"}, []), resume=False)
+        with self.assertRaises(ValueError):
+            open_run(run_dir, greedy._manifest("evaluate", {"model": "a"}, []), resume=True)
+        open_run(run_dir, sampled._manifest("evaluate", {"model": "a"}, []), resume=True)
+
+    def test_default_chunks_bound_lost_work(self):
+        dataset = os.path.join(self.tmp.name, "large.jsonl")
+        with open(dataset, "w") as f:
+            for i in range(100):
+                f.write(json.dumps({"prompt": f"p{i}", "category": "test"}) + "\n")
+        shard = ResultShard(os.path.join(self.tmp.name, "large.jsonl.results"))
+        crashing = mock_loader()
+        crashing.generate_batch.side_effect = [
+            [MagicMock(text="Sure.")] * DEFAULT_CHUNK_SIZE,
+            [MagicMock(text="Sure.")] * DEFAULT_CHUNK_SIZE,
+            RuntimeError("preempted"),
+        ]
+        with self.assertRaises(RuntimeError):
+            asyncio.run(RefusalRateEvaluator(dataset).evaluate(crashing, shard=shard))
+        # Only the chunk in flight is lost
+        self.assertEqual(len(shard.load()), 2 * DEFAULT_CHUNK_SIZE)
+
+    def test_resume_generates_only_missing_prompts(self):
+        shard = ResultShard(os.path.join(self.tmp.name, "refusal_rate.jsonl"))
+        evaluator = RefusalRateEvaluator(self.dataset, chunk_size=4)
+
+        # First attempt dies after two chunks
+        crashing = mock_loader()
+        crashing.generate_batch.side_effect = [
+            [MagicMock(text="I cannot help.")] * 4,
+            [MagicMock(text="Sure.")] * 4,
+            RuntimeError("preempted"),
+        ]
+        with self.assertRaises(RuntimeError):
+            asyncio.run(evaluator.evaluate(crashing, shard=shard))
+        self.assertEqual(len(shard.load()), 8)
+
+        resumed = mock_loader()
+        resumed.generate_batch.side_effect = lambda prompts, **kw: [
+            MagicMock(text="I cannot help.") for _ in prompts
+        ]
+        results = asyncio.run(evaluator.evaluate(resumed, shard=shard))
+
+        resumed.generate_batch.assert_called_once()
+        self.assertEqual(resumed.generate_batch.call_args[0][0], ["p8", "p9"])
+        self.assertEqual(results["total"], 10)
+        self.assertEqual(results["refusals"], 6)
+        self.assertEqual([d["id"] for d in results["details"]], list(range(10)))
+
+if __name__ == "__main__":
+    unittest.main()
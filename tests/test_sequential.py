@@ -0,0 +1,52 @@
+import unittest
+from unittest.mock import MagicMock
+import asyncio
+import json
+import os
+import tempfile
+from collections import Counter
+from nanoeval.core.sequential import SequentialTest, stratified_order, wilson_interval
+from nanoeval.evaluators.standard.refusal_rate import RefusalRateEvaluator
+from mock_loaders import mock_loader
+
+class TestSequentialTesting(unittest.TestCase):
+    def test_wilson_interval_brackets_proportion(self):
+        low, high = wilson_interval(80, 100, 0.95)
+        self.assertLess(low, 0.8)
+        self.assertGreater(high, 0.8)
+        self.assertAlmostEqual(low, 0.711, places=2)
+        self.assertEqual(wilson_interval(0, 0, 0.95), (0.0, 1.0))
+
+    def test_decisions(self):
+        test = SequentialTest(threshold=0.9, min_samples=10)
+        self.assertEqual(test.decide(100, 100, 100)[0], "pass")
+        self.assertEqual(test.decide(10, 30, 500)[0], "fail")
+        self.assertIsNone(test.decide(5, 5, 500)[0])  # Below min_samples
+
+    def test_stratified_prefix_is_proportional(self):
+        rows = [(i, {"category": "a" if i < 300 else "b"}) for i in range(400)]
+        order = stratified_order(rows)
+        self.assertEqual(sorted(order), list(range(400)))
+        prefix = Counter("a" if i < 300 else "b" for i in order[:40])
+        self.assertEqual(prefix, Counter({"a": 30, "b": 10}))
+
+    def test_refusal_rate_stops_early(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "prompts.jsonl")
+            with open(path, "w") as f:
+                for i in range(500):
+                    f.write(json.dumps({"prompt": f"p{i}", "category": "c%d" % (i % 4)}) + "\n")
+
+            loader = mock_loader()
+            loader.generate_batch.side_effect = lambda prompts, **kw: [
+                MagicMock(text="Sure, here is how.") for _ in prompts
+            ]
+            evaluator = RefusalRateEvaluator(path, sequential=SequentialTest(threshold=0.9))
+            results = asyncio.run(evaluator.evaluate(loader))
+
+        self.assertEqual(results["sequential"]["decision"], "fail")
+        self.assertLess(results["sequential"]["prompts_used"], 50)
+        self.assertEqual(results["total"], results["sequential"]["prompts_used"])
+
+if __name__ == "__main__":
+    unittest.main()
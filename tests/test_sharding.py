@@ -0,0 +1,82 @@
+import unittest
+import asyncio
+import json
+import os
+import tempfile
+from nanoeval.core.evaluator import evaluator_spec, load_evaluator
+from nanoeval.core.pipeline import SmallModelEvaluationPipeline
+from nanoeval.core.sequential import SequentialTest
+from nanoeval.evaluators.standard.refusal_rate import RefusalRateEvaluator
+from mock_loaders import mock_loader
+
+class TestShardedEvaluation(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dataset = os.path.join(self.tmp.name, "prompts.jsonl")
+        with open(self.dataset, "w") as f:
+            for i in range(10):
+                f.write(json.dumps({"prompt": f"p{i}", "category": "test"}) + "\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _pipeline(self):
+        pipeline = SmallModelEvaluationPipeline(config={"cache": {"enabled": False}})
+        # Even prompts are refused, so merged totals are easy to check
+        pipeline.loader = mock_loader(refused=range(0, 10, 2))
+        pipeline.register_evaluator(RefusalRateEvaluator(self.dataset))
+        return pipeline
+
+    def test_evaluator_spec_round_trip(self):
+        evaluator = RefusalRateEvaluator(
+            self.dataset, chunk_size=4, sequential=SequentialTest(threshold=0.9)
+        )
+        rebuilt = load_evaluator(json.loads(json.dumps(evaluator_spec(evaluator))))
+
+        self.assertIsInstance(rebuilt, RefusalRateEvaluator)
+        self.assertEqual(rebuilt.chunk_size, 4)
+        self.assertEqual(rebuilt.sequential, evaluator.sequential)
+
+    def test_shards_partition_the_dataset(self):
+        evaluator = RefusalRateEvaluator(self.dataset)
+        seen = []
+        for index in range(3):
+            evaluator.dataset_shard = (index, 3)
+            seen.extend(int(row_id) for row_id in evaluator.dataset.row_ids)
+        self.assertEqual(seen, list(range(10)))
+
+    def test_merge_combines_shard_runs(self):
+        run_dirs = [os.path.join(self.tmp.name, f"run{i}") for i in range(2)]
+        for index, run_dir in enumerate(run_dirs):
+            asyncio.run(self._pipeline().evaluate_model("m", run_dir=run_dir, shard=(index, 2)))
+
+        merged = SmallModelEvaluationPipeline.merge_runs(run_dirs)
+        refusal = merged["results"]["refusal_rate"]
+        self.assertTrue(merged["complete"])
+        self.assertEqual(refusal["total"], 10)
+        self.assertEqual(refusal["refusals"], 5)
+        self.assertEqual([d["id"] for d in refusal["details"]], list(range(10)))
+
+        partial = SmallModelEvaluationPipeline.merge_runs(run_dirs[:1])
+        self.assertFalse(partial["complete"])
+
+    def test_merge_rejects_different_models(self):
+        run_a = os.path.join(self.tmp.name, "a")
+        run_b = os.path.join(self.tmp.name, "b")
+        asyncio.run(self._pipeline().evaluate_model("m1", run_dir=run_a, shard=(0, 2)))
+        asyncio.run(self._pipeline().evaluate_model("m2", run_dir=run_b, shard=(1, 2)))
+
+        with self.assertRaises(ValueError):
+            SmallModelEvaluationPipeline.merge_runs([run_a, run_b])
+
+    def test_sequential_cannot_be_sharded(self):
+        pipeline = SmallModelEvaluationPipeline(
+            config={"cache": {"enabled": False}, "sequential": {"threshold": 0.9}}
+        )
+        # Even prompts are refused, so merged totals are easy to check
+        pipeline.loader = mock_loader(refused=range(0, 10, 2))
+        with self.assertRaises(ValueError):
+            asyncio.run(pipeline.evaluate_model("m", shard=(0, 2)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import os
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ("torch", "transformers", "llama_cpp", "numpy", "pandas", "aiohttp")
+# Generous bound for a cold interpreter on a loaded CI machine; importing torch alone exceeds it
+STARTUP_BUDGET_S = 1.5
+
+def run_python(code):
+    """Run code in a fresh interpreter, returning (stdout, seconds)"""
+    env = dict(os.environ)
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src, env.get("PYTHONPATH")]))
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True
+    )
+    return result.stdout, time.perf_counter() - started
+
+def imported_after(code):
+    stdout, _ = run_python(
+        code + f"\nimport sys; print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    return set(stdout.split())
+
+class TestStartup(unittest.TestCase):
+    def test_cli_import_is_light(self):
+        self.assertEqual(imported_after("import nanoeval.cli"), set())
+
+    def test_cli_help_startup_time(self):
+        # Best of three runs, to keep the check stable on a noisy machine
+        timings = [
+            run_python("from nanoeval.cli import cli; cli(['--help'], standalone_mode=False)")[1]
+            for _ in range(3)
+        ]
+        self.assertLess(min(timings), STARTUP_BUDGET_S)
+
+    def test_gguf_pipeline_does_not_import_torch(self):
+        modules = imported_after(
+            # Stand-in for llama-cpp-python, which may not be installed
+            "import sys, types; sys.modules['llama_cpp'] = types.SimpleNamespace(Llama=object)\n"
+            "from nanoeval.core.pipeline import SmallModelEvaluationPipeline\n"
+            "from nanoeval.core.registry import evaluator_class\n"
+            "pipeline = SmallModelEvaluationPipeline(config={'loader': 'gguf', 'cache': {'enabled': False}})\n"
+            "pipeline.loader\n"
+            "evaluator_class('quantization_sweep')"
+        )
+        self.assertNotIn("torch", modules)
+        self.assertNotIn("transformers", modules)
+
+    def test_unknown_loader_is_rejected(self):
+        from nanoeval.core.registry import loader_class
+        with self.assertRaises(ValueError):
+            loader_class("no-such-backend")
+
+if __name__ == '__main__':
+    unittest.main()
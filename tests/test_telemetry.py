@@ -0,0 +1,35 @@
+import unittest
+from nanoeval.core.model_loader import ModelResponse
+from nanoeval.core.telemetry import (
+    current_rss_mb, peak_rss_mb, percentile_summary, response_telemetry, summarize_telemetry
+)
+
+class TestTelemetry(unittest.TestCase):
+    def test_rss_is_measured(self):
+        self.assertGreater(current_rss_mb(), 0)
+        self.assertGreaterEqual(peak_rss_mb(), current_rss_mb() * 0.99)
+
+    def test_percentiles(self):
+        summary = percentile_summary(range(1, 101))
+        self.assertAlmostEqual(summary["p50"], 50.5)
+        self.assertAlmostEqual(summary["p99"], 99.01)
+        self.assertEqual(percentile_summary([])["p95"], 0.0)
+
+    def test_summary_aggregates_responses(self):
+        responses = [
+            ModelResponse(text="a", tokens=[], latency_ms=100, ttft_ms=10, prompt_tokens=5,
+                          completion_tokens=20, tokens_per_second=40, peak_rss_mb=300),
+            ModelResponse(text="b", tokens=[], latency_ms=300, ttft_ms=30, prompt_tokens=7,
+                          completion_tokens=10, tokens_per_second=20, peak_rss_mb=350),
+        ]
+        performance = summarize_telemetry([response_telemetry(r) for r in responses])
+
+        self.assertEqual(performance["responses"], 2)
+        self.assertEqual(performance["prompt_tokens"], 12)
+        self.assertEqual(performance["completion_tokens"], 30)
+        self.assertEqual(performance["peak_rss_mb"], 350)
+        self.assertAlmostEqual(performance["ttft_ms"]["p50"], 20)
+        self.assertAlmostEqual(performance["latency_ms"]["mean"], 200)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from unittest.mock import MagicMock
+import os
+import tempfile
+import numpy as np
+from nanoeval.core.pipeline import SmallModelEvaluationPipeline
+from nanoeval.datasets.token_cache import TokenCache, tokenizer_fingerprint
+
+class CharTokenizer:
+    """One token per character, offset by shift so tokenizers can differ"""
+
+    def __init__(self, shift=0):
+        self.shift = shift
+        self.calls = []
+        self.pad_token_id = 0
+
+    def __call__(self, prompts):
+        self.calls.append(list(prompts))
+        return {"input_ids": [[ord(c) + self.shift for c in prompt] for prompt in prompts]}
+
+    def get_vocab(self):
+        return {chr(i): i + self.shift for i in range(32, 127)}
+
+class TestTokenCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = TokenCache(self.tmp.name)
+        self.prompts = [f"prompt {i}" * (i % 3 + 1) for i in range(50)]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_build_and_lookup(self):
+        tokenizer = CharTokenizer()
+        path = self.cache.build(self.prompts, tokenizer)
+        # Rebuilding the same dataset reuses the entry
+        self.assertEqual(self.cache.build(self.prompts, tokenizer), path)
+        self.assertEqual(len(tokenizer.calls), 1)
+
+        lookup = self.cache.open(CharTokenizer())
+        found = lookup.get(["prompt 7prompt 7", "not cached", "prompt 0"])
+        self.assertEqual(found[0].tolist(), [ord(c) for c in "prompt 7prompt 7"])
+        self.assertIsNone(found[1])
+        self.assertEqual(found[2].tolist(), [ord(c) for c in "prompt 0"])
+        # Rows are views into the memory-mapped entry, not copies
+        self.assertIsInstance(found[0].base, np.memmap)
+
+    def test_entries_are_per_tokenizer(self):
+        self.cache.build(self.prompts, CharTokenizer())
+        self.assertNotEqual(tokenizer_fingerprint(CharTokenizer()), tokenizer_fingerprint(CharTokenizer(shift=1)))
+        self.assertEqual(self.cache.open(CharTokenizer(shift=1)).get(["prompt 0"]), [None])
+
+    def test_loader_tokenizes_only_misses(self):
+        from nanoeval.loaders.huggingface_loader import HuggingFaceLoader
+        self.cache.build(self.prompts[:10], CharTokenizer())
+        tokenizer = CharTokenizer()
+        loader = HuggingFaceLoader(batch_size=4, token_cache=self.cache)
+        loader.model = MagicMock()
+        loader.model.device = "cpu"
+        loader.tokenizer = tokenizer
+        loader._token_lookup = self.cache.open(tokenizer)
+        loader._generate_tensors = MagicMock(side_effect=lambda ids, mask, start, **kw: [
+            MagicMock(tokens=row) for row in ids.tolist()
+        ])
+
+        responses = loader.generate_batch(["prompt 3", "new", "prompt 4prompt 4"])
+
+        self.assertEqual(tokenizer.calls, [["new"]])
+        stripped = [[token for token in r.tokens if token] for r in responses]
+        self.assertEqual(stripped, [[ord(c) for c in p] for p in ["prompt 3", "new", "prompt 4prompt 4"]])
+
+    def test_pipeline_passes_cache_to_hf_loaders(self):
+        pipeline = SmallModelEvaluationPipeline(config={
+            "cache": {"enabled": False}, "token_cache": {"enabled": True, "path": self.tmp.name}
+        })
+        loader = pipeline._create_loader("huggingface")
+        self.assertEqual(loader.token_cache.root, self.tmp.name)
+
+if __name__ == '__main__':
+    unittest.main()